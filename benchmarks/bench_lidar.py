@@ -0,0 +1,55 @@
+"""
+Замер производительности лидара на 2000 лучей по карте configs/field.yaml.
+
+Запуск из корня репозитория: `python -m benchmarks.bench_lidar`.
+Лидар должен укладываться в такт 10 Гц (100 мс) при всех методах замера.
+"""
+
+import time
+from math import radians
+
+import pymunk
+
+from game.map import Map
+from game.raycast import MapRaycaster, PymunkBatchQuery
+from game.scene import Scene
+from game.sightingsystem import Lidar
+from game.spatialindex import UniformGrid
+
+MAP = "configs/field.yaml"
+CONFIG = "configs/lidar_test.yaml"
+RATE = 10
+TICKS = 50
+
+
+def run(name: str, method) -> float:
+    lidar = Lidar("bench", CONFIG)
+    lidar.set_batch_measurement_method(method)
+
+    start = time.perf_counter()
+    for tick in range(TICKS):
+        lidar.update_navigation(640 + tick, 360, radians(tick))
+        lidar.receive({"turn": radians(2 * tick), "distance": True})
+        lidar.step()
+    tick_time = (time.perf_counter() - start) / TICKS
+
+    status = "ok" if tick_time < 1 / RATE else "SLOW"
+    print(
+        f"{name:>12}: {tick_time * 1000:7.2f} ms/tick, "
+        f"{lidar.ray_count / tick_time:10.0f} rays/s [{status}]"
+    )
+    return tick_time
+
+
+def main():
+    space = pymunk.Space()
+    field = Map(MAP)
+    Scene(space, map_object=field).set_scene()
+
+    run("pymunk", PymunkBatchQuery(space))
+    run("brute force", MapRaycaster(field))
+    run("grid", UniformGrid(field))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,141 +1,1167 @@
+import sys
+
+import numpy as np
+
+from game.detection import ShapeDetector
 from game.map import Map
-from game.mathfunction import distanse2D
+from game.snapshot import load_arrays, save_arrays
+from geometry.primitives import Circle, Rectangle
 
 CLUSTER_DISTANCE = 20
 
 
+class PointStorage:
+    """
+    Растущий массив float32 формы (n, ...) с удвоением емкости при заполнении.
+    """
+
+    def __init__(self, shape: tuple = (2,), dtype=np.float32, capacity: int = 8):
+        self._data = np.empty((capacity, *shape), dtype=dtype)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data[: self.size]
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def _reserve(self, size: int):
+        if size <= len(self._data):
+            return
+
+        capacity = max(len(self._data) * 2, size)
+        data = np.empty((capacity, *self._data.shape[1:]), dtype=self._data.dtype)
+        data[: self.size] = self._data[: self.size]
+        self._data = data
+
+    def append(self, item):
+        self._reserve(self.size + 1)
+        self._data[self.size] = item
+        self.size += 1
+
+    def extend(self, items: np.ndarray):
+        self._reserve(self.size + len(items))
+        self._data[self.size : self.size + len(items)] = items
+        self.size += len(items)
+
+    def replace(self, items: np.ndarray):
+        """
+        Замена содержимого с освобождением лишней емкости.
+        """
+        self._data = np.empty(
+            (max(len(items), 8), *self._data.shape[1:]), self._data.dtype
+        )
+        self._data[: len(items)] = items
+        self.size = len(items)
+
+
+def cell_keys(points: np.ndarray) -> np.ndarray:
+    """
+    Целочисленные ключи точек (n, 2): координаты, округленные до целых,
+    упакованные в одно 64-битное число.
+    """
+    cells = np.round(np.asarray(points, dtype=float)).astype(np.int64)
+    return (cells[..., 0] << 32) | (cells[..., 1] & 0xFFFFFFFF)
+
+
+def group_by(keys: np.ndarray) -> list[tuple[tuple, np.ndarray]]:
+    """
+    Группировка строк целочисленных ключей (n, k).
+
+    :return: Ключ группы и номера ее строк по возрастанию.
+    """
+    keys = np.asarray(keys).astype(np.int64).reshape(len(keys), -1)
+    if not len(keys):
+        return []
+
+    order = np.lexsort(keys.T[::-1])
+    ordered = keys[order]
+    bounds = np.flatnonzero((ordered[1:] != ordered[:-1]).any(axis=1)) + 1
+
+    return list(
+        zip(
+            map(tuple, ordered[np.r_[0, bounds]].tolist()),
+            np.split(order, bounds),
+        )
+    )
+
+
+def components(count: int, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Компоненты связности графа из `count` вершин с ребрами (`first`, `second`).
+
+    Корень большего номера подвешивается к корню меньшего номера соседа, затем
+    пути сжимаются до корней; число несвязанных компонент за проход уменьшается
+    хотя бы вдвое.
+
+    :return: Для каждой вершины - наименьший номер вершины ее компоненты.
+    """
+    labels = np.arange(count)
+
+    while True:
+        a, b = labels[first], labels[second]
+        differ = a != b
+        if not differ.any():
+            return labels
+
+        np.minimum.at(labels, np.maximum(a, b)[differ], np.minimum(a, b)[differ])
+        while True:
+            parents = labels[labels]
+            if np.array_equal(parents, labels):
+                break
+            labels = parents
+
+
+class ClusterGrid:
+    """
+    Пространственный индекс точек карты.
+
+    Точки, номера их кластеров и числа попаданий хранятся в массивах. Номера точек
+    упорядочены по ключу ячейки со стороной `cell_size` (`_cell_keys`, `_cell_ids`),
+    так что точки трех соседних по вертикали ячеек занимают непрерывный отрезок,
+    который находится двоичным поиском. При `cell_size` не меньше расстояния поиска
+    все соседи точки лежат в ее ячейке и восьми соседних.
+
+    Точки, добавленные после последнего упорядочивания, просматриваются перебором
+    и вливаются в индекс, когда их становится больше `pending_limit` (или 1/16 всех точек).
+    Удаленные точки остаются в индексе до `compact`.
+    """
+
+    # число неупорядоченных точек, после которого они вливаются в индекс
+    pending_limit = 256
+
+    def __init__(self, cell_size: float = CLUSTER_DISTANCE):
+        self.cell_size = cell_size
+
+        self._points = PointStorage()
+        self._owners = PointStorage((), np.int32)
+        self._hits = PointStorage((), np.float32)
+
+        # ключи ячеек по возрастанию и номера точек в том же порядке
+        self._cell_keys = np.zeros(0, dtype=np.int64)
+        self._cell_ids = np.zeros(0, dtype=np.int32)
+
+        # число удаленных точек, место которых еще не освобождено (`compact`)
+        self.removed = 0
+
+    def __len__(self):
+        return len(self._points) - self.removed
+
+    @property
+    def points(self) -> np.ndarray:
+        return self._points.data
+
+    @property
+    def owners(self) -> np.ndarray:
+        """
+        Номера кластеров точек, -1 - точка удалена.
+        """
+        return self._owners.data
+
+    @property
+    def hits(self) -> np.ndarray:
+        """
+        Число попаданий в точку (с учетом затухания).
+        """
+        return self._hits.data
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self._points.nbytes
+            + self._owners.nbytes
+            + self._hits.nbytes
+            + self._cell_keys.nbytes
+            + self._cell_ids.nbytes
+        )
+
+    def __contains__(self, point: tuple[int | float, int | float]):
+        return bool((self.neighbours(point)[1] == 0).any())
+
+    def cell_key(self, points: np.ndarray) -> np.ndarray:
+        """
+        Ключи ячеек точек (n, 2): номер столбца в старших 32 битах, номер строки
+        прибавляется со знаком, поэтому ключи упорядочены по столбцу, затем по строке.
+        """
+        cells = np.floor(np.asarray(points, dtype=float) / self.cell_size)
+        cells = cells.astype(np.int64)
+        return (cells[..., 0] << 32) + cells[..., 1]
+
+    def extend(
+        self, points: np.ndarray, owners: np.ndarray, hits: np.ndarray
+    ) -> np.ndarray:
+        """
+        Добавление точек.
+
+        :param points: Точки (n, 2);
+        :param owners: Номера кластеров точек;
+        :param hits: Число попаданий в точки;
+        :return: Номера точек.
+        """
+        start = len(self._points)
+
+        self._points.extend(points)
+        self._owners.extend(owners)
+        self._hits.extend(hits)
+
+        return np.arange(start, len(self._points), dtype=np.int32)
+
+    def _index(self):
+        """
+        Вливание неупорядоченных точек в индекс.
+        """
+        start = len(self._cell_ids)
+        if start == len(self._points):
+            return
+
+        keys = self.cell_key(self._points.data[start:])
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        ids = (order + start).astype(np.int32)
+
+        # точки одной ячейки остаются упорядоченными по номеру
+        at = np.searchsorted(self._cell_keys, keys, side="right")
+        self._cell_keys = np.insert(self._cell_keys, at, keys)
+        self._cell_ids = np.insert(self._cell_ids, at, ids)
+
+    def _candidates(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Неудаленные точки индекса в ячейках запросов и восьми соседних.
+
+        :param points: Точки запросов (m, 2);
+        :return: Номера запросов и номера точек.
+        """
+        cells = np.floor(np.asarray(points, dtype=float) / self.cell_size)
+        cells = cells.astype(np.int64)
+
+        # для каждого из трех столбцов - отрезок ключей строк от y - 1 до y + 1
+        columns = (cells[:, :1] + np.arange(-1, 2)) << 32
+        lo = np.searchsorted(self._cell_keys, columns + cells[:, 1:] - 1, side="left")
+        hi = np.searchsorted(self._cell_keys, columns + cells[:, 1:] + 1, side="right")
+
+        lo, counts = lo.ravel(), (hi - lo).ravel()
+        total = int(counts.sum())
+        offsets = np.repeat(lo - np.cumsum(counts) + counts, counts)
+
+        queries = np.repeat(np.arange(len(cells)).repeat(3), counts)
+        ids = self._cell_ids[offsets + np.arange(total)]
+
+        alive = self._owners.data[ids] >= 0
+        return queries[alive], ids[alive]
+
+    def query(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Неудаленные точки в ячейках точек запросов и восьми соседних, для пакета
+        запросов (все точки предварительно вливаются в индекс).
+
+        :param points: Точки запросов (m, 2);
+        :return: Номера запросов и номера точек.
+        """
+        self._index()
+        return self._candidates(points)
+
+    def candidates(self, point: tuple[int | float, int | float]) -> np.ndarray:
+        """
+        Номера неудаленных точек в ячейке точки и восьми соседних.
+        """
+        pending = len(self._points) - len(self._cell_ids)
+        if pending > max(self.pending_limit, len(self._points) // 16):
+            self._index()
+
+        _, ids = self._candidates(np.asarray(point, dtype=float).reshape(1, 2))
+
+        start = len(self._cell_ids)
+        if start < len(self._points):
+            pending = np.arange(start, len(self._points))
+            ids = np.concatenate([ids, pending[self._owners.data[start:] >= 0]])
+        return ids
+
+    def neighbours(
+        self, point: tuple[int | float, int | float], distance: float = CLUSTER_DISTANCE
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Точки, лежащие ближе `distance` к точке (`distance` не больше `cell_size`).
+
+        :return: Номера точек и квадраты расстояний до них.
+        """
+        ids = self.candidates(point)
+        delta = self._points.data[ids] - np.asarray(point, dtype=np.float32)
+        squared = (delta**2).sum(axis=1)
+        near = squared < distance**2
+        return ids[near], squared[near]
+
+    def near(
+        self, point: tuple[int | float, int | float], distance: float = CLUSTER_DISTANCE
+    ) -> list[int]:
+        """
+        Номера точек, лежащих ближе `distance` к точке (`distance` не больше `cell_size`).
+        """
+        return self.neighbours(point, distance)[0].tolist()
+
+    def remove(self, ids: np.ndarray):
+        """
+        Удаление точек. Место в массивах и индексе освобождается при `compact`.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        ids = ids[self._owners.data[ids] >= 0]
+
+        self._owners.data[ids] = -1
+        self.removed += len(ids)
+
+    def compact(self) -> np.ndarray:
+        """
+        Освобождение места удаленных точек, номера оставшихся точек меняются.
+
+        :return: Новые номера точек по старым, -1 - точка удалена.
+        """
+        alive = self._owners.data >= 0
+        remap = np.full(len(alive), -1, dtype=np.int32)
+        remap[alive] = np.arange(np.count_nonzero(alive), dtype=np.int32)
+
+        self._points.replace(self._points.data[alive])
+        self._owners.replace(self._owners.data[alive])
+        self._hits.replace(self._hits.data[alive])
+        self.removed = 0
+
+        self._cell_keys = np.zeros(0, dtype=np.int64)
+        self._cell_ids = np.zeros(0, dtype=np.int32)
+        self._index()
+
+        return remap
+
+
 class Cluster:
-    def __init__(self, points: list = None):
-        self.points = []
+    """
+    Кластер точек карты.
+
+    Кластер хранит номера своих точек (int32) в хранилище координат `storage`.
+    У кластеров картографа это массив точек его сетки (`ClusterGrid`), так что
+    координаты каждой точки карты хранятся один раз; отдельный кластер хранит
+    свои точки сам.
+
+    Статистики кластера (число точек, суммы координат, описанный прямоугольник)
+    обновляются при добавлении точек и складываются при слиянии кластеров за O(1),
+    номера точек присоединяемого кластера дописываются в конец массива (картограф
+    присоединяет меньший кластер к большему, поэтому каждый номер копируется
+    не больше O(log n) раз).
+    Точный радиус (расстояние от центра до самой дальней точки) считается
+    только при обращении к нему и запоминается до следующего изменения кластера.
+    """
+
+    # число строк в блоке при попарном сравнении точек
+    block_size = 1024
+
+    # память объекта кластера без массива номеров точек (сам объект, его атрибуты,
+    # хранилище номеров, ключ в словаре картографа), байты; замерено tracemalloc
+    overhead = 640
+
+    def __init__(self, points: list = None, storage: PointStorage | None = None):
+        """
+        :param points: Точки кластера, добавляются в хранилище;
+        :param storage: Хранилище координат, по умолчанию - собственное.
+        """
+        self.id = None
         self.itr = None
-        self.center = None
-        self.radius = None
         self.updated = False
 
-        if points:
-            self.points = [
-                points[0],
-            ]
-            self.radius = 0
-            self.center = points[0]
-            self.update_center_and_radius(self.points[1:])
+        self.count = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.bbox = None
+
+        # номер версии, увеличивается при каждом изменении точек кластера
+        self.version = 0
+
+        self._storage = PointStorage() if storage is None else storage
+        self._ids = PointStorage((), np.int32)
+        self._radius = None
+
+        if points is not None and len(points):
+            points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+            start = len(self._storage)
+            self._storage.extend(points)
+            self._extend(np.arange(start, start + len(points), dtype=np.int32))
 
-    def update_center_and_radius(self, points):
-        x_center, y_center = self.center
-        radius = self.radius
+    @property
+    def ids(self) -> np.ndarray:
+        """
+        Номера точек кластера в хранилище.
+        """
+        return self._ids.data
 
-        for x, y in points:
-            x_center = (x_center * len(self.points) + x) / (len(self.points) + 1)
-            y_center = (y_center * len(self.points) + y) / (len(self.points) + 1)
+    @property
+    def points(self) -> np.ndarray:
+        """
+        Координаты точек кластера (новый массив).
+        """
+        return self._storage.data[self.ids]
 
-            radius = max(radius, distanse2D((x_center, y_center), (x, y)))
+    @property
+    def nbytes(self) -> int:
+        return self._ids.nbytes
 
-        self.center = (x_center, y_center)
-        self.radius = radius
+    @property
+    def center(self) -> tuple[float, float] | None:
+        if not self.count:
+            return None
+        return self.sum_x / self.count, self.sum_y / self.count
+
+    @property
+    def radius(self) -> float | None:
+        if not self.count:
+            return None
+        if self._radius is None:
+            delta = self.points - np.array(self.center, dtype=np.float32)
+            self._radius = float(np.sqrt((delta**2).sum(axis=1).max()))
+        return self._radius
+
+    def _grow(self, bbox: tuple | None):
+        """
+        Расширение описанного прямоугольника.
+        """
+        if self.bbox is None:
+            self.bbox = bbox
+        elif bbox is not None:
+            self.bbox = (
+                min(self.bbox[0], bbox[0]),
+                min(self.bbox[1], bbox[1]),
+                max(self.bbox[2], bbox[2]),
+                max(self.bbox[3], bbox[3]),
+            )
+
+    def _extend(self, ids: np.ndarray):
+        """
+        Добавление точек хранилища с номерами `ids` без проверки на повтор.
+        """
+        if not len(ids):
+            return
+
+        points = self._storage.data[ids]
+
+        self._ids.extend(ids)
+        self._radius = None
+        self.version += 1
+
+        self.count += len(ids)
+        self.sum_x += float(points[:, 0].sum(dtype=float))
+        self.sum_y += float(points[:, 1].sum(dtype=float))
+        self._grow(tuple(points.min(axis=0).tolist() + points.max(axis=0).tolist()))
+
+    def _add(self, point: tuple[int | float, int | float]):
+        """
+        Добавление точки в хранилище и кластер без проверки на повтор.
+        """
+        self._storage.append(point)
+        self._extend(np.array([len(self._storage) - 1], dtype=np.int32))
+
+    def _replace(self, ids: np.ndarray):
+        """
+        Замена всех точек кластера с пересчетом статистик.
+        """
+        ids = np.asarray(ids, dtype=np.int32)
+
+        self._ids = PointStorage((), np.int32, capacity=max(len(ids), 8))
+
+        self.count = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.bbox = None
+        self._extend(ids)
+
+    def _remap(self, remap: np.ndarray):
+        """
+        Перенумерация точек после уплотнения хранилища (см. `ClusterGrid.compact`).
+        """
+        self._ids.replace(remap[self.ids])
+
+    def _absorb(self, other: "Cluster"):
+        """
+        Присоединение точек и статистик другого кластера того же хранилища.
+        """
+        self._ids.extend(other.ids)
+        self._radius = None
+        self.version += 1
+
+        self.count += other.count
+        self.sum_x += other.sum_x
+        self.sum_y += other.sum_y
+        self._grow(other.bbox)
 
     def __contains__(self, item: tuple[int | float, int | float]):
-        return item in self.points
+        """
+        Повтор точки (после округления до целых). Картограф ищет повторы
+        по своей сетке (`ClusterGrid.neighbours`), а не по кластерам.
+        """
+        if not self.count:
+            return False
+        return bool((cell_keys(self.points) == cell_keys(item)).any())
 
     def belong(self, item: tuple[int | float, int | float]):
-        for point in self.points:
-            if distanse2D(item, point) < CLUSTER_DISTANCE:
-                return True
-        return False
+        if not self.count:
+            return False
+
+        delta = self.points - np.asarray(item, dtype=np.float32)
+        return bool(((delta**2).sum(axis=1) < CLUSTER_DISTANCE**2).any())
 
     def is_same(self, other: "Cluster"):
-        if self.radius + other.radius < distanse2D(self.center, other.center):
+        if not self.count or not other.count:
+            return False
+
+        # описанные прямоугольники, расширенные на CLUSTER_DISTANCE, не пересекаются
+        if (
+            self.bbox[0] - CLUSTER_DISTANCE > other.bbox[2]
+            or other.bbox[0] - CLUSTER_DISTANCE > self.bbox[2]
+            or self.bbox[1] - CLUSTER_DISTANCE > other.bbox[3]
+            or other.bbox[1] - CLUSTER_DISTANCE > self.bbox[3]
+        ):
             return False
 
-        for point in self:
-            for other_point in other:
-                if distanse2D(other_point, point) < CLUSTER_DISTANCE:
-                    return True
+        points, other_points = self.points, other.points
+        for i in range(0, len(points), self.block_size):
+            delta = points[i : i + self.block_size, None, :] - other_points[None, :, :]
+            if ((delta**2).sum(axis=2) < CLUSTER_DISTANCE**2).any():
+                return True
         return False
 
     def append_clusters(self, others):
         for other in others:
-            self.points += other.points
-
-        x_center, y_center, radius = 0, 0, 0
-        for x, y in self.points:
-            x_center += x
-            y_center += y
-
-        self.center = (x_center / len(self.points), y_center / len(self.points))
-
-        for x, y in self.points:
-            distance = distanse2D((x, y), self.center)
-            if radius < distance:
-                radius = distance
-
-        self.radius = radius
+            self._absorb(other)
 
     def append(self, item):
-        if item in self.points:
+        if item in self:
             return
 
-        self.points.append(item)
-        self.update_center_and_radius(
-            [
-                item,
-            ]
-        )
+        self._add(item)
         self.updated = True
 
     def __iter__(self):
-        self.itr = iter(self.points)
+        self.itr = iter(self.points.tolist())
         return self
 
     def __next__(self):
-        return next(self.itr)
+        return tuple(next(self.itr))
 
 
 class Cartographer:
-    def __init__(self, map: Map = None):
+    """
+    Картограф: собирает точки замеров в кластеры.
+
+    Объем хранимых точек можно ограничить:
+     - прореживанием по вокселям: в ячейке со стороной `voxel_size` хранится
+       не больше `points_per_voxel` точек, остальные попадания засчитываются
+       ближайшей сохраненной точке (число точек вокселя считается по сетке),
+     - бюджетом кластера: при превышении `cluster_budget` точек число попаданий
+       точек кластера умножается на `decay` и реже всего встречавшиеся точки удаляются,
+     - общим лимитом памяти `memory_limit` (байты) с вытеснением по всей карте.
+
+    Текущий объем и статистика вытеснения - `report`.
+    """
+
+    # доля бюджета, до которой сокращается переполненный кластер или карта
+    eviction_ratio = 0.75
+
+    def __init__(
+        self,
+        map: Map = None,
+        voxel_size: float | None = None,
+        points_per_voxel: int = 1,
+        cluster_budget: int | None = None,
+        decay: float = 0.5,
+        memory_limit: int | None = None,
+    ):
+        """
+        :param map: Карта;
+        :param voxel_size: Сторона вокселя, не больше CLUSTER_DISTANCE, None - без прореживания;
+        :param points_per_voxel: Число точек в вокселе;
+        :param cluster_budget: Максимальное число точек кластера, None - без ограничения;
+        :param decay: Множитель затухания числа попаданий при вытеснении;
+        :param memory_limit: Лимит памяти под точки, байты, None - без ограничения.
+        """
+        if voxel_size is not None and not 0 < voxel_size <= CLUSTER_DISTANCE:
+            raise ValueError(f"voxel_size must be in (0, {CLUSTER_DISTANCE}]")
+
         self.map = map or Map()
         self.is_complete = self.map.complete
 
         self.border = None
         self.objects = []
-        self.clusters = []
-
-    def append(self, points: list):
-        for item in points:
-            find_cluster = 0
-            point = (round(item[0], 0), round(item[1], 0))
-            for i, cluster in enumerate(self.clusters):
-                if (
-                        distanse2D(point, cluster.center)
-                        < cluster.radius + CLUSTER_DISTANCE
-                ):
-                    if cluster.belong(point):
-                        cluster.append(point)
-                        find_cluster += 1
-
-            if not find_cluster:
-                self.clusters.append(
-                    Cluster(
-                        [
-                            point,
-                        ]
-                    )
-                )
-
-            if find_cluster > 1:
-                old_clusters = [c for c in self.clusters if c.updated is False]
-                new_clusters = [c for c in self.clusters if c.updated is True]
-
-                new_cluster = new_clusters[0]
-                new_cluster.append_clusters(new_clusters[1:])
-                self.clusters = old_clusters + [
-                    new_cluster,
-                ]
-
-            for i in range(len(self.clusters)):
-                self.clusters[i].updated = False
-
-    def detect(self):
-
-        for cluster in self.clusters:
-            # TODO
-            pass
+        self.lines = []
+        self.detector = ShapeDetector()
+
+        self.voxel_size = voxel_size
+        self.points_per_voxel = points_per_voxel
+        self.cluster_budget = cluster_budget
+        self.decay = decay
+        self.memory_limit = memory_limit
+
+        # точки карты и их индекс по ячейкам
+        self.grid = ClusterGrid(CLUSTER_DISTANCE)
+
+        # система непересекающихся множеств над номерами кластеров:
+        # родитель каждого номера и кластеры-представители в порядке обновления
+        self._parent = PointStorage((), np.int32)
+        self._roots = {}
+
+        # кластеры, изменившиеся после последнего распознавания, и последние
+        # результаты распознавания по кластерам: номер -> (версия кластера, фигуры)
+        self.dirty = set()
+        self.fits = {}
+
+        # статистика: отброшенные при прореживании и вытесненные точки, число распознаваний
+        self.dropped = 0
+        self.evicted = 0
+        self.refits = 0
+
+    @property
+    def clusters(self) -> list[Cluster]:
+        return list(self._roots.values())
+
+    def memory_usage(self) -> int:
+        """
+        Память под точки карты, их индекс и кластеры, байты: массивы сетки,
+        номера точек кластеров и родители номеров кластеров - по емкости,
+        объекты кластеров вместе с записями о них - по `Cluster.overhead`.
+        """
+        return (
+            self.grid.nbytes
+            + self._parent.nbytes
+            + sum(cluster.nbytes for cluster in self._roots.values())
+            + len(self._roots) * Cluster.overhead
+            + sys.getsizeof(self._roots)
+            + sys.getsizeof(self.dirty)
+            + sys.getsizeof(self.fits)
+        )
+
+    def voxel_count(self) -> int:
+        """
+        Число занятых вокселей.
+        """
+        if self.voxel_size is None:
+            return 0
+        points = self.grid.points[self.grid.owners >= 0]
+        return len(np.unique(cell_keys(np.floor(points / self.voxel_size))))
+
+    def report(self) -> dict:
+        return {
+            "points": len(self.grid),
+            "clusters": len(self._roots),
+            "voxels": self.voxel_count(),
+            "memory": self.memory_usage(),
+            "memory_limit": self.memory_limit,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+        }
+
+    def save(self, path: str):
+        """
+        Запись состояния картографа: точек, их кластеров, числа попаданий,
+        настроек и статистики (формат - `game.snapshot.save_arrays`).
+        Фигуры не записываются, после `load` все кластеры распознаются заново.
+
+        :param path: Путь к файлу.
+        """
+        alive = np.flatnonzero(self.grid.owners >= 0)
+        clusters = list(self._roots.values())
+
+        save_arrays(
+            path,
+            {
+                "points": self.grid.points[alive],
+                "owners": self.find_all(self.grid.owners[alive]).astype(np.int32),
+                "hits": self.grid.hits[alive],
+                "clusters": np.array([c.id for c in clusters], dtype=np.int32),
+                "versions": np.array([c.version for c in clusters], dtype=np.int64),
+                "updated": np.array([c.updated for c in clusters], dtype=bool),
+            },
+            {
+                "voxel_size": self.voxel_size,
+                "points_per_voxel": self.points_per_voxel,
+                "cluster_budget": self.cluster_budget,
+                "decay": self.decay,
+                "memory_limit": self.memory_limit,
+                "next_id": len(self._parent),
+                "dropped": self.dropped,
+                "evicted": self.evicted,
+                "refits": self.refits,
+            },
+        )
+
+    @classmethod
+    def load(cls, path: str, map: Map = None) -> "Cartographer":
+        """
+        Картограф из файла, записанного `save`.
+
+        Массивы файла отображаются в память и копируются в хранилища картографа,
+        индекс ячеек и кластеры строятся сортировкой и группировкой массивов
+        без повторной обработки точек.
+
+        :param path: Путь к файлу;
+        :param map: Карта.
+        """
+        meta, arrays = load_arrays(path)
+
+        cartographer = cls(
+            map,
+            voxel_size=meta["voxel_size"],
+            points_per_voxel=meta["points_per_voxel"],
+            cluster_budget=meta["cluster_budget"],
+            decay=meta["decay"],
+            memory_limit=meta["memory_limit"],
+        )
+        cartographer.dropped = meta["dropped"]
+        cartographer.evicted = meta["evicted"]
+        cartographer.refits = meta["refits"]
+
+        points = np.array(arrays["points"], dtype=np.float32).reshape(-1, 2)
+        owners = np.array(arrays["owners"], dtype=np.int32)
+
+        grid = cartographer.grid
+        grid._points.extend(points)
+        grid._owners.extend(owners)
+        grid._hits.extend(np.asarray(arrays["hits"], dtype=np.float32))
+        grid._index()
+
+        cartographer._parent.extend(np.arange(meta["next_id"], dtype=np.int32))
+        members = {owner: ids for (owner,), ids in group_by(owners[:, None])}
+        for root, version, updated in zip(
+            arrays["clusters"].tolist(),
+            arrays["versions"].tolist(),
+            arrays["updated"].tolist(),
+        ):
+            cluster = Cluster(storage=grid._points)
+            cluster.id = root
+            cluster._replace(members[root])
+            cluster.version = version
+            cluster.updated = updated
+
+            cartographer._roots[root] = cluster
+            cartographer.dirty.add(root)
+
+        return cartographer
+
+    def find(self, cluster_id: int) -> int:
+        """
+        Номер представителя множества, в которое входит кластер (со сжатием путей).
+        """
+        parent = self._parent.data
+
+        root = int(cluster_id)
+        while parent[root] != root:
+            root = int(parent[root])
+
+        while parent[cluster_id] != root:
+            parent[cluster_id], cluster_id = root, parent[cluster_id]
+
+        return root
+
+    def find_all(self, cluster_ids: np.ndarray) -> np.ndarray:
+        """
+        Номера представителей для массива номеров кластеров.
+        """
+        parent = self._parent.data
+        roots = np.asarray(cluster_ids, dtype=np.int32)
+
+        while True:
+            next_roots = parent[roots]
+            if np.array_equal(next_roots, roots):
+                return roots
+            roots = next_roots
+
+    def union(self, first: int, second: int) -> int:
+        """
+        Слияние двух множеств, меньший кластер присоединяется к большему.
+
+        :return: Номер представителя объединенного множества.
+        """
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return first
+
+        if self._roots[first].count < self._roots[second].count:
+            first, second = second, first
+
+        self._roots[first]._absorb(self._roots.pop(second))
+        self._parent.data[second] = first
+
+        self._forget(second)
+        self._touch(first)
+        return first
+
+    def _touch(self, root: int):
+        """
+        Отметка кластера как измененного.
+        """
+        self.dirty.add(root)
+        self._roots[root].updated = True
+
+    def _forget(self, root: int):
+        """
+        Удаление сведений о кластере, которого больше нет.
+        """
+        self.dirty.discard(root)
+        self.fits.pop(root, None)
+
+    def _new_cluster(self) -> int:
+        """
+        Новый пустой кластер, точки которого хранятся в сетке.
+        """
+        cluster = Cluster(storage=self.grid._points)
+        cluster.id = len(self._parent)
+
+        self._parent.append(cluster.id)
+        self._roots[cluster.id] = cluster
+        self._touch(cluster.id)
+        return cluster.id
+
+    def append(self, points: np.ndarray | list):
+        """
+        Добавление пакета точек замеров.
+
+        Точки округляются до целых. Повтор сохраненной точки засчитывается ей
+        попаданием, точка переполненного вокселя - ближайшей соседней точке.
+        Остальные точки добавляются в сетку: новые точки, лежащие ближе
+        CLUSTER_DISTANCE друг к другу, образуют компоненту, которая становится новым
+        кластером или присоединяется к кластерам своих соседей в сетке, сливая их.
+        Соседи всех точек пакета находятся одним запросом к индексу сетки,
+        цикл идет по компонентам, а не по точкам.
+
+        :param points: Точки (n, 2).
+        """
+        points = np.round(np.asarray(points, dtype=float).reshape(-1, 2))
+        if not len(points):
+            return
+
+        # повторы внутри пакета: точки в порядке первого появления и число повторов
+        _, first, counts = np.unique(
+            cell_keys(points), return_index=True, return_counts=True
+        )
+        order = np.argsort(first)
+        points, counts = points[first[order]].astype(np.float32), counts[order]
+
+        grid = self.grid
+        queries, ids = grid.query(points)
+        squared = ((grid.points[ids] - points[queries]) ** 2).sum(axis=1)
+
+        repeated = squared == 0
+        np.add.at(grid.hits, ids[repeated], counts[queries[repeated]])
+        fresh = np.ones(len(points), dtype=bool)
+        fresh[queries[repeated]] = False
+
+        admitted = fresh
+        if self.voxel_size is not None:
+            admitted = fresh & self._voxel_room(points, fresh, queries, ids)
+
+        near = squared < CLUSTER_DISTANCE**2
+        queries, ids, squared = queries[near], ids[near], squared[near]
+
+        new = np.flatnonzero(admitted)
+        batch = ClusterGrid(grid.cell_size)
+        batch.extend(points[new], np.zeros(len(new), dtype=np.int32), counts[new])
+
+        # номера кластеров новых точек проставляются по компонентам
+        new_ids = grid.extend(
+            points[new], np.full(len(new), -1, dtype=np.int32), counts[new]
+        )
+        link = admitted[queries]
+        touched = self._link(
+            batch,
+            new_ids,
+            np.searchsorted(new, queries[link]),
+            self.find_all(grid.owners[ids[link]]),
+        )
+
+        dropped = np.flatnonzero(fresh & ~admitted)
+        if len(dropped):
+            self.dropped += int(counts[dropped].sum())
+
+            # попадания отброшенной точки засчитываются ближайшей точке сетки,
+            # в том числе добавленной этим пакетом
+            link = ~admitted[queries] & fresh[queries]
+            found, near_ids = batch.query(points[dropped])
+            delta = batch.points[near_ids] - points[dropped][found]
+            close = (delta**2).sum(axis=1) < CLUSTER_DISTANCE**2
+
+            self._credit(
+                np.concatenate([queries[link], dropped[found[close]]]),
+                np.concatenate([ids[link], new_ids[near_ids[close]]]),
+                np.concatenate([squared[link], (delta**2).sum(axis=1)[close]]),
+                counts,
+            )
+
+        if self.cluster_budget is not None:
+            for root in {self.find(root) for root in touched}:
+                if self._roots[root].count > self.cluster_budget:
+                    self._evict_cluster(root)
+
+        if self.memory_limit is not None and self.memory_usage() > self.memory_limit:
+            self._evict_map()
+
+    def _voxel_room(
+        self,
+        points: np.ndarray,
+        fresh: np.ndarray,
+        queries: np.ndarray,
+        ids: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Есть ли место в вокселе каждой новой точки пакета: места занимают сохраненные
+        точки вокселя, затем новые точки в порядке поступления.
+
+        :param points: Точки пакета;
+        :param fresh: Признаки новых точек;
+        :param queries: Номера точек пакета и
+        :param ids: номера точек сетки в их ячейках и восьми соседних.
+        """
+        voxels = cell_keys(np.floor(points / self.voxel_size))
+
+        # точки вокселя не дальше voxel_size <= CLUSTER_DISTANCE от точки,
+        # то есть лежат в ее ячейке сетки или восьми соседних
+        stored = cell_keys(np.floor(self.grid.points[ids] / self.voxel_size))
+        taken = np.bincount(queries[stored == voxels[queries]], minlength=len(points))
+
+        index = np.flatnonzero(fresh)
+        index = index[np.argsort(voxels[index], kind="stable")]
+        keys = voxels[index]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        rank = np.arange(len(index)) - np.repeat(
+            starts, np.diff(np.r_[starts, len(index)])
+        )
+
+        room = np.zeros(len(points), dtype=bool)
+        room[index] = taken[index] + rank < self.points_per_voxel
+        return room
+
+    def _link(
+        self,
+        batch: ClusterGrid,
+        ids: np.ndarray,
+        positions: np.ndarray,
+        roots: np.ndarray,
+    ) -> list[int]:
+        """
+        Распределение новых точек по кластерам.
+
+        :param batch: Новые точки отдельной сеткой;
+        :param ids: Номера новых точек в сетке картографа;
+        :param positions: Номера новых точек в `batch` и
+        :param roots: кластеры их соседей в сетке картографа;
+        :return: Кластеры, получившие точки.
+        """
+        first, second = batch.query(batch.points)
+        delta = batch.points[first] - batch.points[second]
+        close = (first != second) & ((delta**2).sum(axis=1) < CLUSTER_DISTANCE**2)
+        labels = components(len(ids), first[close], second[close])
+
+        linked = {}
+        for (label, root), _ in group_by(np.column_stack([labels[positions], roots])):
+            linked.setdefault(label, []).append(root)
+
+        touched = []
+        # компоненты в порядке их первой точки, номер метки - номер этой точки
+        for (label,), members in group_by(labels):
+            roots = linked.get(label)
+            if roots is None:
+                root = self._new_cluster()
+            else:
+                root = roots[0]
+                for other in roots[1:]:
+                    root = self.union(root, other)
+                self._touch(root)
+
+                # объединенный кластер переносится в конец списка
+                if len(roots) > 1:
+                    self._roots[root] = self._roots.pop(root)
+
+            self.grid.owners[ids[members]] = root
+            self._roots[root]._extend(ids[members])
+            touched.append(root)
+
+        return touched
+
+    def _credit(
+        self,
+        queries: np.ndarray,
+        ids: np.ndarray,
+        squared: np.ndarray,
+        counts: np.ndarray,
+    ):
+        """
+        Зачет попаданий ближайшим точкам сетки.
+
+        :param queries: Номера точек пакета,
+        :param ids: номера соседних точек сетки и
+        :param squared: квадраты расстояний до них;
+        :param counts: Число попаданий в каждую точку пакета.
+        """
+        order = np.lexsort((squared, queries))
+        queries, ids = queries[order], ids[order]
+        nearest = np.r_[True, queries[1:] != queries[:-1]]
+        np.add.at(self.grid.hits, ids[nearest], counts[queries[nearest]])
+
+    def integrate(self, starts: np.ndarray, points: np.ndarray, hits: np.ndarray):
+        """
+        Обработка скана: в карту попадают только точки касания.
+
+        :param starts: Начала лучей (n, 2);
+        :param points: Точки касания или концы лучей без касания (n, 2);
+        :param hits: Признаки касания (n,).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.append(points[np.asarray(hits, dtype=bool)])
+
+    def _evict(self, ids: np.ndarray, keep: int) -> np.ndarray:
+        """
+        Удаление точек `ids` с наименьшим числом попаданий, остается `keep` точек.
+        При равном числе попаданий сохраняются более новые точки.
+
+        :return: Удаленные точки.
+        """
+        order = np.lexsort((ids, self.grid.hits[ids]))
+        removed = ids[order[: max(len(ids) - keep, 0)]]
+
+        self.grid.remove(removed)
+        self.evicted += len(removed)
+        return removed
+
+    def _rebuild(self, roots: list[int]):
+        """
+        Пересборка кластеров по их оставшимся точкам, пустые кластеры удаляются.
+        Просматриваются только точки самих кластеров.
+        """
+        for root in roots:
+            ids = self._roots[root].ids
+            ids = ids[self.grid.owners[ids] >= 0]
+            if len(ids):
+                self._roots[root]._replace(ids)
+                self._touch(root)
+            else:
+                del self._roots[root]
+                self._forget(root)
+
+        if self.grid.removed > len(self.grid):
+            self._compact()
+
+    def _compact(self):
+        """
+        Освобождение места удаленных точек сетки с перенумерацией точек кластеров.
+        """
+        remap = self.grid.compact()
+        for cluster in self._roots.values():
+            cluster._remap(remap)
+
+        # словари и множества не уменьшаются при удалении элементов
+        self._roots = dict(self._roots)
+        self.dirty = set(self.dirty)
+        self.fits = dict(self.fits)
+
+    def _evict_cluster(self, root: int):
+        ids = self._roots[root].ids
+
+        self.grid.hits[ids] *= self.decay
+        self._evict(ids, int(self.cluster_budget * self.eviction_ratio))
+        self._rebuild([root])
+
+    def _evict_map(self):
+        """
+        Вытеснение по всей карте до `eviction_ratio` лимита памяти. Каждый проход
+        сокращает число точек пропорционально превышению; память кластера
+        освобождается только вместе с его последней точкой, поэтому проходов
+        может быть несколько.
+        """
+        target = self.eviction_ratio * self.memory_limit
+        self.grid.hits[self.grid.owners >= 0] *= self.decay
+
+        usage = self.memory_usage()
+        while len(self.grid) and usage > target:
+            alive = np.flatnonzero(self.grid.owners >= 0)
+            owners = self.grid.owners[alive]
+
+            self._evict(alive, int(len(alive) * target / usage))
+            lost = self.grid.owners[alive] < 0
+            self._rebuild(np.unique(self.find_all(owners[lost])).tolist())
+            self._compact()
+
+            usage = self.memory_usage()
+
+    def detect(self) -> list[Circle | Rectangle]:
+        """
+        Распознавание фигур по кластерам (см. `game.detection.ShapeDetector`).
+
+        Окружности и прямоугольники попадают в `objects`, отрезки кластеров,
+        не похожих ни на одну фигуру, - в `lines`. Прямоугольник, внутри которого
+        лежат центры всех остальных кластеров, считается границей поля (`border`).
+
+        Заново распознаются только кластеры, изменившиеся после прошлого вызова,
+        для остальных берутся сохраненные результаты. В карту добавляются
+        только фигуры заново распознанных кластеров.
+        """
+        changed = []
+
+        for root in self.dirty:
+            cluster = self._roots[root]
+            cluster.updated = False
+
+            fit = self.fits.get(root)
+            if fit is not None and fit[0] == cluster.version:
+                continue
+
+            shapes = []
+            if cluster.count >= self.detector.min_points:
+                for shape in self.detector.detect(cluster.points):
+                    kind = self._classify(cluster, shape)
+                    if kind == "border":
+                        shape = Rectangle(
+                            shape.vertices, (255, 0, 247), object_type="border"
+                        )
+                    shapes.append((kind, shape))
+
+            self.fits[root] = cluster.version, shapes
+            self.refits += 1
+            changed.append(root)
+
+        self.dirty.clear()
+
+        self.objects = []
+        self.lines = []
+        for _, shapes in self.fits.values():
+            for kind, shape in shapes:
+                if kind == "line":
+                    self.lines.append(shape)
+                elif kind == "border":
+                    self.border = shape
+                else:
+                    self.objects.append(shape)
+
+        for root in changed:
+            for kind, shape in self.fits[root][1]:
+                if kind != "line":
+                    self.map.add_object(shape)
+
+        return self.objects
+
+    def _classify(self, cluster: Cluster, shape) -> str:
+        """
+        Вид фигуры кластера: отрезок ("line"), граница поля ("border") или препятствие ("object").
+        """
+        if shape.object_type == "line":
+            return "line"
+
+        if shape.object_type != "rectangle" or len(self._roots) < 2:
+            return "object"
+
+        xs = [vertex.x for vertex in shape.vertices]
+        ys = [vertex.y for vertex in shape.vertices]
+
+        for other in self._roots.values():
+            if other is cluster or other.count < self.detector.min_points:
+                continue
+            x, y = other.center
+            if not (min(xs) < x < max(xs) and min(ys) < y < max(ys)):
+                return "object"
+
+        return "border"
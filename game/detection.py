@@ -0,0 +1,317 @@
+import numpy as np
+
+from geometry.geometry import TOLERANCE
+from geometry.primitives import Circle, Line, Point, Rectangle
+
+
+def fit_line(points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Прямая по методу наименьших квадратов (по расстояниям до прямой).
+
+    :param points: Точки (n, 2);
+    :return: Точка на прямой и единичный направляющий вектор.
+    """
+    center = points.mean(axis=0)
+    _, _, vt = np.linalg.svd(points - center, full_matrices=False)
+    return center, vt[0]
+
+
+def fit_circle(points: np.ndarray) -> tuple[float, float, float]:
+    """
+    Окружность по методу наименьших квадратов (алгебраическая аппроксимация Kasa).
+
+    :param points: Точки (n, 2), не меньше трех;
+    :return: Центр и радиус (x, y, r).
+    """
+    x, y = points[:, 0], points[:, 1]
+    a = np.column_stack([x, y, np.ones(len(points))])
+    (cx, cy, c), *_ = np.linalg.lstsq(a, x**2 + y**2, rcond=None)
+    cx, cy = cx / 2, cy / 2
+    return float(cx), float(cy), float(np.sqrt(max(c + cx**2 + cy**2, 0.0)))
+
+
+def circles_by_three_points(
+    p0: np.ndarray, p1: np.ndarray, p2: np.ndarray
+) -> np.ndarray:
+    """
+    Окружности, проходящие через тройки точек.
+
+    :param p0: Первые точки троек (k, 2);
+    :param p1: Вторые точки троек (k, 2);
+    :param p2: Третьи точки троек (k, 2);
+    :return: Центры и радиусы (k, 3), для вырожденных троек - nan.
+    """
+    ax, ay = p0[:, 0], p0[:, 1]
+    bx, by = p1[:, 0], p1[:, 1]
+    cx, cy = p2[:, 0], p2[:, 1]
+
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    a2, b2, c2 = ax**2 + ay**2, bx**2 + by**2, cx**2 + cy**2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ux = (a2 * (by - cy) + b2 * (cy - ay) + c2 * (ay - by)) / d
+        uy = (a2 * (cx - bx) + b2 * (ax - cx) + c2 * (bx - ax)) / d
+
+    result = np.column_stack([ux, uy, np.hypot(ax - ux, ay - uy)])
+    result[np.abs(d) < 1e-9] = np.nan
+    return result
+
+
+def rectangle_distances(points: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """
+    Расстояния от точек (n, 2) до контура прямоугольника (left, bottom, right, top).
+    """
+    left, bottom, right, top = bounds
+    x, y = points[:, 0], points[:, 1]
+
+    dx = np.maximum(np.maximum(left - x, x - right), 0.0)
+    dy = np.maximum(np.maximum(bottom - y, y - top), 0.0)
+    outside = np.hypot(dx, dy)
+
+    inside = np.minimum(
+        np.minimum(x - left, right - x), np.minimum(y - bottom, top - y)
+    )
+    return np.where((dx > 0) | (dy > 0), outside, np.abs(inside))
+
+
+class ShapeDetector:
+    """
+    Распознавание фигур в облаке точек одного кластера: окружностей, прямоугольников
+    со сторонами вдоль осей и отрезков прямых.
+
+    Гипотезы RANSAC строятся и оцениваются пакетом на случайной подвыборке точек,
+    лучшая гипотеза уточняется методом наименьших квадратов по всем точкам,
+    так что время работы почти не зависит от размера кластера.
+    """
+
+    def __init__(
+        self,
+        tolerance: float = TOLERANCE,
+        iterations: int = 64,
+        sample_size: int = 1024,
+        min_inliers: float = 0.8,
+        min_points: int = 10,
+        max_radius: float = 300.0,
+        max_lines: int = 4,
+        seed: int | None = 0,
+    ):
+        """
+        :param tolerance: Допустимое расстояние от точки до фигуры;
+        :param iterations: Число гипотез RANSAC;
+        :param sample_size: Размер подвыборки для оценки гипотез;
+        :param min_inliers: Доля точек, которые должны лежать на окружности или прямоугольнике;
+        :param min_points: Минимальное число точек фигуры;
+        :param max_radius: Максимальный радиус окружности;
+        :param max_lines: Максимальное число отрезков в одном кластере;
+        :param seed: Начальное значение генератора случайных чисел.
+        """
+        self.tolerance = tolerance
+        self.iterations = iterations
+        self.sample_size = sample_size
+        self.min_inliers = min_inliers
+        self.min_points = min_points
+        self.max_radius = max_radius
+        self.max_lines = max_lines
+        self.rng = np.random.default_rng(seed)
+
+    def _sample(self, points: np.ndarray) -> np.ndarray:
+        if len(points) <= self.sample_size:
+            return points
+        return points[self.rng.choice(len(points), self.sample_size, replace=False)]
+
+    def ransac_circle(self, points: np.ndarray) -> tuple[tuple, np.ndarray] | None:
+        """
+        Окружность с наибольшим числом точек.
+
+        :return: Центр и радиус (x, y, r) и маска точек окружности или None.
+        """
+        if len(points) < max(self.min_points, 3):
+            return None
+
+        sample = self._sample(points)
+        triples = self.rng.integers(0, len(sample), (self.iterations, 3))
+        hypotheses = circles_by_three_points(
+            sample[triples[:, 0]], sample[triples[:, 1]], sample[triples[:, 2]]
+        )
+        hypotheses = hypotheses[
+            np.isfinite(hypotheses).all(axis=1)
+            & (hypotheses[:, 2] > self.tolerance)
+            & (hypotheses[:, 2] < self.max_radius)
+        ]
+        if not len(hypotheses):
+            return None
+
+        residuals = np.abs(
+            np.hypot(
+                sample[None, :, 0] - hypotheses[:, None, 0],
+                sample[None, :, 1] - hypotheses[:, None, 1],
+            )
+            - hypotheses[:, None, 2]
+        )
+        circle = hypotheses[(residuals < self.tolerance).sum(axis=1).argmax()]
+
+        # уточнение по всем точкам
+        for _ in range(2):
+            inliers = (
+                np.abs(np.hypot(*(points - circle[:2]).T) - circle[2]) < self.tolerance
+            )
+            if inliers.sum() < 3:
+                return None
+            circle = np.array(fit_circle(points[inliers]))
+
+        inliers = (
+            np.abs(np.hypot(*(points - circle[:2]).T) - circle[2]) < self.tolerance
+        )
+        if not self.tolerance < circle[2] < self.max_radius:
+            return None
+        return tuple(circle.tolist()), inliers
+
+    def ransac_lines(self, points: np.ndarray) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Последовательный поиск отрезков: найденный отрезок исключается из облака,
+        поиск повторяется по оставшимся точкам.
+
+        :return: Концы отрезков (2, 2) и маски их точек.
+        """
+        result = []
+        remaining = np.ones(len(points), dtype=bool)
+
+        while len(result) < self.max_lines and remaining.sum() >= self.min_points:
+            candidates = points[remaining]
+            sample = self._sample(candidates)
+
+            pairs = self.rng.integers(0, len(sample), (self.iterations, 2))
+            direction = sample[pairs[:, 1]] - sample[pairs[:, 0]]
+            length = np.hypot(direction[:, 0], direction[:, 1])
+            valid = length > 0
+            if not valid.any():
+                break
+
+            origin = sample[pairs[valid, 0]]
+            direction = direction[valid] / length[valid, None]
+
+            distance = np.abs(
+                (sample[None, :, 0] - origin[:, None, 0]) * direction[:, None, 1]
+                - (sample[None, :, 1] - origin[:, None, 1]) * direction[:, None, 0]
+            )
+            best = (distance < self.tolerance).sum(axis=1).argmax()
+            center, axis = origin[best], direction[best]
+
+            for _ in range(2):
+                offset = points - center
+                inliers = remaining & (
+                    np.abs(offset[:, 0] * axis[1] - offset[:, 1] * axis[0])
+                    < self.tolerance
+                )
+                if inliers.sum() < self.min_points:
+                    break
+                center, axis = fit_line(points[inliers])
+
+            if inliers.sum() < self.min_points:
+                break
+
+            projection = (points[inliers] - center) @ axis
+            ends = center + np.outer([projection.min(), projection.max()], axis)
+
+            result.append((ends, inliers))
+            remaining &= ~inliers
+
+        return result
+
+    def fit_rectangle(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Прямоугольник со сторонами вдоль осей.
+
+        Границы берутся по крайним точкам без выбросов, каждая сторона уточняется
+        средним по точкам, лежащим на ней. Должны быть видны хотя бы две соседние стороны.
+
+        :return: Границы (left, bottom, right, top) и маска точек контура или None.
+        """
+        if len(points) < self.min_points:
+            return None
+
+        low = np.percentile(points, 1, axis=0)
+        high = np.percentile(points, 99, axis=0)
+        bounds = np.array([low[0], low[1], high[0], high[1]])
+
+        supported = np.zeros(4, dtype=bool)
+        for _ in range(2):
+            left, bottom, right, top = bounds
+            x, y = points[:, 0], points[:, 1]
+            along_x = (x > left - self.tolerance) & (x < right + self.tolerance)
+            along_y = (y > bottom - self.tolerance) & (y < top + self.tolerance)
+
+            sides = [
+                (np.abs(x - left) < self.tolerance) & along_y,
+                (np.abs(y - bottom) < self.tolerance) & along_x,
+                (np.abs(x - right) < self.tolerance) & along_y,
+                (np.abs(y - top) < self.tolerance) & along_x,
+            ]
+            for i, side in enumerate(sides):
+                # сторона видна, если ее точки протянулись вдоль нее, а не только у угла
+                along = points[side, 1 - i % 2]
+                supported[i] = (
+                    side.sum() >= self.min_points
+                    and along.max() - along.min() > 4 * self.tolerance
+                )
+                if supported[i]:
+                    bounds[i] = points[side, i % 2].mean()
+
+            # невидимая сторона проходит через концы видимых соседних сторон
+            for i in range(4):
+                adjacent = (1, 3) if i % 2 == 0 else (0, 2)
+                ends = sides[adjacent[0]] & supported[adjacent[0]]
+                ends |= sides[adjacent[1]] & supported[adjacent[1]]
+                if not supported[i] and ends.any():
+                    coordinates = points[ends, i % 2]
+                    bounds[i] = coordinates.min() if i < 2 else coordinates.max()
+
+        width, height = bounds[2] - bounds[0], bounds[3] - bounds[1]
+        if width < 2 * self.tolerance or height < 2 * self.tolerance:
+            return None
+
+        # стороны, видимые вместе, должны быть соседними: лево/право + низ/верх
+        if not (supported[[0, 2]].any() and supported[[1, 3]].any()):
+            return None
+
+        return bounds, rectangle_distances(points, bounds) < self.tolerance
+
+    def detect(self, points: np.ndarray) -> list[Circle | Rectangle | Line]:
+        """
+        Распознавание фигуры кластера. Из окружности и прямоугольника выбирается
+        фигура с большей долей точек, если эта доля не меньше `min_inliers`,
+        иначе кластер описывается отрезками.
+
+        :param points: Точки кластера (n, 2).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if len(points) < self.min_points:
+            return []
+
+        circle = self.ransac_circle(points)
+        rectangle = self.fit_rectangle(points)
+
+        circle_score = circle[1].mean() if circle else 0.0
+        rectangle_score = rectangle[1].mean() if rectangle else 0.0
+
+        if max(circle_score, rectangle_score) >= self.min_inliers:
+            if circle_score > rectangle_score:
+                x, y, r = circle[0]
+                return [Circle(Point(x, y), r)]
+
+            left, bottom, right, top = rectangle[0].tolist()
+            return [
+                Rectangle(
+                    [
+                        Point(left, bottom),
+                        Point(right, bottom),
+                        Point(right, top),
+                        Point(left, top),
+                    ]
+                )
+            ]
+
+        return [
+            Line(Point(*ends[0].tolist()), Point(*ends[1].tolist()))
+            for ends, _ in self.ransac_lines(points)
+        ]
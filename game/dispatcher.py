@@ -1,10 +1,13 @@
 from math import radians, cos, sin
 from typing import Callable
 
+import numpy as np
 import pymunk
 
 from game.cartographer import Cartographer
 from game.navigation import NavigationSystem
+from game.raycast import PymunkBatchQuery
+from game.scheduler import RayScheduler
 from game.sightingsystem import Laser
 from game.sightingsystem import Locator
 from game.train import Train
@@ -19,7 +22,17 @@ class TPlayer:
         init_alpha: float | int,
         method: Callable,
         method_kwargs: dict,
+        batch_method: Callable | None = None,
+        mapper=None,
     ):
+        """
+        :param method: Метод замера дальности одним лучом;
+        :param method_kwargs: Аргументы метода;
+        :param batch_method: Пакетный метод замера дальности для локатора;
+        :param mapper: Картограф, принимающий сканы (`integrate`), например
+            `game.occupancy.OccupancyGrid` или `game.mappingworker.CartographyWorker`;
+            по умолчанию - `self.cartographer`.
+        """
         place = [5, 0]
 
         full_train_config = {
@@ -63,8 +76,11 @@ class TPlayer:
 
         self.locator = Locator("test_locator", full_locator_config)
         self.locator.set_measurement_method(method, **method_kwargs)
+        if batch_method is not None:
+            self.locator.set_batch_measurement_method(batch_method)
 
         self.cartographer = Cartographer()
+        self.mapper = self.cartographer if mapper is None else mapper
 
         self.train = Train("test_locator", full_train_config)
 
@@ -80,35 +96,73 @@ class TPlayer:
 
         self.points = []
 
+    @property
+    def sensors(self) -> list[Laser | Locator]:
+        return [self.laser, self.locator]
+
+    @property
+    def clusters(self) -> list:
+        """
+        Кластеры для отрисовки: снимок картографа `mapper`, если он их публикует.
+        """
+        return getattr(self.mapper, "clusters", self.cartographer.clusters)
+
     def step(self):
-        self.navigation.receive(self.to_navigation)
+        self.begin_step()
         self.navigation.step()
+        self.update_sensors()
+        for sensor in self.sensors:
+            sensor.step()
+        self.end_step()
+
+    def begin_step(self):
+        """
+        Начало такта: передача управления навигации.
+        """
+        self.navigation.receive(self.to_navigation)
+
+    def update_sensors(self):
+        """
+        После шага навигации: передача координат и запросов визирным подсистемам.
+        """
         self.from_navigation = self.navigation.send()
 
         self.from_navigation.pop("collision")
 
         self.laser.update_navigation(**self.from_navigation)
         self.laser.receive(self.to_laser)
-        self.laser.step()
-        self.from_laser = self.laser.send()
 
         self.locator.update_navigation(**self.from_navigation)
         self.locator.receive(self.to_locator)
-        self.locator.step()
-        self.from_locator = self.locator.send()
-
-        self.points = []
 
-        if self.from_locator:
-            for point in self.from_locator["distance"]:
-                if point["measurement"]:
-                    self.points.append((point["x"], point["y"]))
-        if self.from_laser:
-            for point in self.from_laser["distance"]:
-                if point["measurement"]:
-                    self.points.append((point["x"], point["y"]))
+    def end_step(self):
+        """
+        Конец такта: сбор замеров, картография и управление поездом.
+        """
+        self.from_laser = self.laser.send()
+        self.from_locator = self.locator.send()
 
-        self.cartographer.append(self.points)
+        starts, points, hits = [], [], []
+
+        for sensor, data in (
+            (self.locator, self.from_locator),
+            (self.laser, self.from_laser),
+        ):
+            if "distance" in data:
+                # лучи, не замеренные на этом такте (расписание замера, нет запроса),
+                # уже переданы картографу на своем такте
+                scan = data["distance"]
+                fresh = scan.fresh(sensor.tick)
+                starts.append(scan.origins[fresh])
+                points.append(np.column_stack([scan.x[fresh], scan.y[fresh]]))
+                hits.append(scan.measurement[fresh])
+
+        if starts:
+            starts, points, hits = map(np.concatenate, (starts, points, hits))
+            self.points = list(map(tuple, points[hits].tolist()))
+            self.mapper.integrate(starts, points, hits)
+        else:
+            self.points = []
         # self.cartographer.update()
 
         self.to_train["laser"] = self.from_laser
@@ -132,7 +186,8 @@ class Player:
         position: tuple[float | int, float | int],
         angle: float,
         name: str = "Unknown Train",
-        color: tuple[int] = (0, 0, 255)
+        color: tuple[int] = (0, 0, 255),
+        mapper=None
     ):
         self.space = space
 
@@ -144,7 +199,16 @@ class Player:
 
         method = self.space.segment_query_first
         method_kwargs = {"radius": 0.01, "shape_filter": pymunk.ShapeFilter()}
-        self.train = TPlayer(position[0], position[1], angle, method, method_kwargs)
+        batch_method = PymunkBatchQuery(self.space, **method_kwargs)
+        self.train = TPlayer(
+            position[0],
+            position[1],
+            angle,
+            method,
+            method_kwargs,
+            batch_method,
+            mapper=mapper,
+        )
         self.create_shapes()
         self.bullets = []
         self.rockets = []
@@ -198,17 +262,11 @@ class Player:
         laser_lines["ray"] = []
         laser_lines["measurement"] = []
         if "distance" in vs_data:
-            for ray in vs_data["distance"]:
-                laser_lines["ray"].append(
-                    (
-                        (vs.x, vs.y),
-                        (
-                            ray["x"],
-                            ray["y"],
-                        ),
-                    )
-                )
-                laser_lines["measurement"].append(ray["measurement"])
+            scan = vs_data["distance"]
+            laser_lines["ray"] = [
+                ((vs.x, vs.y), point) for point in zip(scan.x.tolist(), scan.y.tolist())
+            ]
+            laser_lines["measurement"] = scan.measurement.tolist()
 
         if "alpha" in vs_data:
             laser_lines["alpha_restriction"] = vs_data["alpha"]["restriction"]
@@ -222,6 +280,29 @@ class Player:
 
         self.train.step()
 
+        self.spawn_weapons()
+
+        for rocket in self.rockets:
+            rocket.step()
+        self.update_rocket_targets()
+
+        for bullet in self.bullets:
+            bullet.step()
+
+        return self.collect()
+
+    @property
+    def weapons(self) -> list[Cannon | Rocket]:
+        return self.rockets + self.bullets
+
+    def update_rocket_targets(self):
+        for rocket in self.rockets:
+            rocket.update_target(
+                self.train.from_train["rocket"]["target"]["x"],
+                self.train.from_train["rocket"]["target"]["y"],
+            )
+
+    def spawn_weapons(self):
         # порождаем ракеты
         if "rocket" in self.train.from_train:
             fire_rocket = self.train.from_train["rocket"].get("fire_rocket", False)
@@ -246,13 +327,6 @@ class Player:
             self.rockets.append(rocket)
         self.rockets = [rocket for rocket in self.rockets if rocket.alive]
 
-        for rocket in self.rockets:
-            rocket.step()
-            rocket.update_target(
-                self.train.from_train["rocket"]["target"]["x"],
-                self.train.from_train["rocket"]["target"]["y"],
-            )
-
         # порождаем снаряды
         if "cannon" in self.train.from_train:
             fire_cannon = self.train.from_train["cannon"].get("fire_cannon", False)
@@ -279,9 +353,7 @@ class Player:
 
         self.bullets = [bullet for bullet in self.bullets if bullet.alive]
 
-        for bullet in self.bullets:
-            bullet.step()
-
+    def collect(self) -> dict[str, list]:
         lines = []
         arcs = []
 
@@ -300,9 +372,56 @@ class Player:
             "arcs": arcs,
             "laser": laser_lines,
             "locator": locator_lines,
-            "clusters": self.train.cartographer.clusters,
+            "clusters": self.train.clusters,
             "bullets": [bullet.send() for bullet in self.bullets],
             "rockets": [rocket.send() for rocket in self.rockets],
         }
 
         return data
+
+
+class World:
+    """
+    Такт всех игроков с пакетным замером дальности: на каждом этапе такта
+    (навигация, визирные подсистемы, снаряды и ракеты) лучи всех игроков
+    замеряются одним запросом (см. `RayScheduler`).
+    """
+
+    def __init__(self, players: list[Player], method: Callable, mapping=None, **kwargs):
+        """
+        :param players: Игроки;
+        :param method: Пакетный метод замера дальности (см. `game.raycast`);
+        :param mapping: Общая карта игроков (см. `game.mappingservice.MappingService`),
+            изменения карты объединяются в конце каждого такта;
+        :param kwargs: Аргументы этого метода.
+        """
+        self.players = players
+        self.mapping = mapping
+        self.scheduler = RayScheduler(method, **kwargs)
+
+    def step(self) -> list[dict[str, list]]:
+        trains = [player.train for player in self.players]
+
+        for train in trains:
+            train.begin_step()
+        self.scheduler.run(train.navigation for train in trains)
+
+        for train in trains:
+            train.update_sensors()
+        self.scheduler.run(sensor for train in trains for sensor in train.sensors)
+
+        for train in trains:
+            train.end_step()
+        if self.mapping is not None:
+            self.mapping.merge()
+
+        for player in self.players:
+            player.spawn_weapons()
+        self.scheduler.run(
+            weapon for player in self.players for weapon in player.weapons
+        )
+
+        for player in self.players:
+            player.update_rocket_targets()
+
+        return [player.collect() for player in self.players]
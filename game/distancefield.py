@@ -0,0 +1,242 @@
+import hashlib
+import os
+
+import numpy as np
+
+from game.map import Map
+from game.raycast import MapGeometry, Raycaster
+
+SDF_SUFFIX = ".sdf.npz"
+
+
+class DistanceField(Raycaster):
+    """
+    Знаковое поле расстояний до статической геометрии карты.
+
+    Поле хранится сеткой значений с шагом `resolution`: положительные значения -
+    свободное пространство внутри границы поля, отрицательные - внутри препятствий
+    или за границей. Между узлами значения интерполируются билинейно.
+
+    Одно обращение к полю отвечает на вопрос о свободном расстоянии вокруг точки,
+    а лучи проходят методом sphere tracing за несколько шагов.
+    """
+
+    # ограничение на размер промежуточных массивов (узлы х фигуры)
+    chunk_size = 1 << 22
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        origin: tuple[float, float],
+        resolution: float,
+        tolerance: float | None = None,
+        max_steps: int = 64,
+    ):
+        """
+        :param values: Значения поля, форма (nx, ny), `values[i, j]` - в точке `origin + (i, j) * resolution`;
+        :param origin: Координаты узла (0, 0);
+        :param resolution: Шаг сетки;
+        :param tolerance: Расстояние до поверхности, на котором луч считается коснувшимся,
+            по умолчанию - четверть шага сетки;
+        :param max_steps: Максимальное число шагов sphere tracing.
+        """
+        self.values = np.asarray(values, dtype=np.float32)
+        self.origin = np.asarray(origin, dtype=float)
+        self.resolution = float(resolution)
+        self.tolerance = self.resolution / 4 if tolerance is None else float(tolerance)
+        self.max_steps = max_steps
+
+    @classmethod
+    def compute(
+        cls, map_object: Map | MapGeometry, resolution: float = 5.0, **kwargs
+    ) -> "DistanceField":
+        """
+        Расчет поля по карте.
+
+        :param map_object: Карта или ее геометрия;
+        :param resolution: Шаг сетки.
+        """
+        geometry = (
+            map_object
+            if isinstance(map_object, MapGeometry)
+            else MapGeometry.from_map(map_object)
+        )
+
+        left, bottom, right, top = geometry.bounds
+        margin = 2 * resolution
+        xs = np.arange(left - margin, right + margin + resolution, resolution)
+        ys = np.arange(bottom - margin, top + margin + resolution, resolution)
+        grid_x, grid_y = np.meshgrid(xs, ys, indexing="ij")
+        points = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+
+        shapes = max(len(geometry.segments) + len(geometry.circles), 1)
+        step = max(cls.chunk_size // shapes, 1)
+
+        values = np.concatenate(
+            [
+                signed_distance(points[i : i + step], geometry)
+                for i in range(0, len(points), step)
+            ]
+        )
+
+        return cls(values.reshape(grid_x.shape), (xs[0], ys[0]), resolution, **kwargs)
+
+    @classmethod
+    def for_map(cls, path: str, resolution: float = 5.0, **kwargs) -> "DistanceField":
+        """
+        Поле для карты из файла .yaml. Рассчитанное поле сохраняется рядом с картой
+        (`field.yaml` -> `field.sdf.npz`) и пересчитывается только при изменении
+        файла карты или шага сетки.
+
+        :param path: Путь к файлу с картой;
+        :param resolution: Шаг сетки.
+        """
+        with open(path, "rb") as f:
+            source_hash = hashlib.sha1(f.read()).hexdigest()
+
+        cache_path = os.path.splitext(path)[0] + SDF_SUFFIX
+
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                if (
+                    str(data["source_hash"]) == source_hash
+                    and float(data["resolution"]) == resolution
+                ):
+                    return cls(data["values"], data["origin"], resolution, **kwargs)
+
+        field = cls.compute(Map(path), resolution, **kwargs)
+        field.save(cache_path, source_hash)
+        return field
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "DistanceField":
+        with np.load(path) as data:
+            return cls(data["values"], data["origin"], data["resolution"], **kwargs)
+
+    def save(self, path: str, source_hash: str = ""):
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                values=self.values,
+                origin=self.origin,
+                resolution=self.resolution,
+                source_hash=source_hash,
+            )
+
+    def clearance(self, x, y) -> np.ndarray | float:
+        """
+        Знаковое расстояние до ближайшего препятствия (билинейная интерполяция).
+        Точки за пределами сетки считаются занятыми.
+
+        :param x: Абсцисса или массив абсцисс;
+        :param y: Ордината или массив ординат.
+        """
+        gx = (np.asarray(x, dtype=float) - self.origin[0]) / self.resolution
+        gy = (np.asarray(y, dtype=float) - self.origin[1]) / self.resolution
+
+        nx, ny = self.values.shape
+        inside = (gx >= 0) & (gx <= nx - 1) & (gy >= 0) & (gy <= ny - 1)
+
+        ix = np.clip(np.floor(gx).astype(np.int64), 0, nx - 2)
+        iy = np.clip(np.floor(gy).astype(np.int64), 0, ny - 2)
+        fx = np.clip(gx - ix, 0.0, 1.0)
+        fy = np.clip(gy - iy, 0.0, 1.0)
+
+        values = self.values
+        result = (
+            values[ix, iy] * (1 - fx) * (1 - fy)
+            + values[ix + 1, iy] * fx * (1 - fy)
+            + values[ix, iy + 1] * (1 - fx) * fy
+            + values[ix + 1, iy + 1] * fx * fy
+        )
+        result = np.where(inside, result, -self.resolution)
+
+        return result if result.ndim else float(result)
+
+    def is_free(self, x, y, radius: float = 0.0) -> np.ndarray | bool:
+        """
+        Свободна ли окрестность точки радиуса `radius`.
+        """
+        result = np.asarray(self.clearance(x, y)) > radius + self.tolerance
+        return result if result.ndim else bool(result)
+
+    def cast(
+        self, starts: np.ndarray, ends: np.ndarray, radius: float = 0.0
+    ) -> np.ndarray:
+        """
+        Sphere tracing: каждый луч сдвигается на свободное расстояние в текущей точке,
+        пока не подойдет к поверхности ближе `tolerance` или не дойдет до конца.
+        Лучи, не успевшие за `max_steps` шагов, считаются дошедшими до конца.
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+        directions = ends - starts
+        lengths = np.hypot(directions[:, 0], directions[:, 1])
+
+        t = np.zeros(len(starts))
+        result = np.full(len(starts), np.inf)
+        active = np.arange(len(starts))
+
+        for _ in range(self.max_steps):
+            if not len(active):
+                break
+
+            points = starts[active] + t[active, None] * directions[active]
+            distance = self.clearance(points[:, 0], points[:, 1]) - radius
+
+            hit = distance <= self.tolerance
+            result[active[hit]] = t[active[hit]]
+            active = active[~hit]
+
+            # круг радиуса distance вокруг точки свободен - по лучу можно сдвинуться на distance
+            with np.errstate(divide="ignore", invalid="ignore"):
+                advance = distance[~hit] / lengths[active]
+            t[active] = np.minimum(t[active] + np.nan_to_num(advance, nan=1.0), 1.0)
+
+            finished = active[t[active] >= 1.0]
+            end_distance = self.clearance(ends[finished, 0], ends[finished, 1])
+            result[finished[end_distance - radius <= self.tolerance]] = 1.0
+            active = active[t[active] < 1.0]
+
+        return result
+
+
+def signed_distance(points: np.ndarray, geometry: MapGeometry) -> np.ndarray:
+    """
+    Точное знаковое расстояние от точек (n, 2) до геометрии карты.
+    """
+    px, py = points[:, 0:1], points[:, 1:2]
+    distance = np.full(len(points), np.inf)
+
+    segments = geometry.segments
+    if len(segments):
+        qx, qy = segments[None, :, 0], segments[None, :, 1]
+        sx, sy = segments[None, :, 2] - qx, segments[None, :, 3] - qy
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = ((px - qx) * sx + (py - qy) * sy) / (sx**2 + sy**2)
+        u = np.clip(np.nan_to_num(u), 0.0, 1.0)
+
+        distance = np.hypot(qx + u * sx - px, qy + u * sy - py).min(axis=1)
+
+        # правило чет-нечет: внутри границы - свободно, внутри прямоугольников - занято
+        crossing = ((qy > py) != (qy + sy > py)) & (
+            px < qx + (py - qy) * sx / np.where(sy == 0, 1.0, sy)
+        )
+        in_border = crossing[:, : geometry.border_count].sum(axis=1) % 2 == 1
+        in_polygon = crossing[:, geometry.border_count :].sum(axis=1) % 2 == 1
+
+        occupied = in_polygon | (~in_border if geometry.border_count else False)
+    else:
+        occupied = np.zeros(len(points), dtype=bool)
+
+    circles = geometry.circles
+    if len(circles):
+        to_center = np.hypot(px - circles[None, :, 0], py - circles[None, :, 1])
+        circle_distance = to_center - circles[None, :, 2]
+
+        distance = np.minimum(distance, np.abs(circle_distance).min(axis=1))
+        occupied = occupied | (circle_distance < 0).any(axis=1)
+
+    return np.where(occupied, -distance, distance)
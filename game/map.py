@@ -3,7 +3,7 @@ import os
 
 import yaml
 
-from geometry.geometry import Point, Circle, Rectangle, Border
+from geometry.geometry import Point, Circle, Rectangle, Border, FigureIndex
 
 
 class Map:
@@ -24,6 +24,11 @@ class Map:
         self.__circles = []
         self.__rectangles = []
         self.__border = []
+
+        # известные окружности и вершины прямоугольников для поиска повторов
+        self.__known_circles = None
+        self.__known_vertices = None
+
         if self.__path:
             self.load()
 
@@ -132,6 +137,8 @@ class Map:
             self.__border = data["border"]
             self.__circles = data.get("circles", dict())
             self.__rectangles = data.get("rectangles", dict())
+            self.__known_circles = None
+            self.__known_vertices = None
 
     def save(
         self,
@@ -177,6 +184,23 @@ class Map:
                 indent=4,
             )
 
+    def __index_objects(self):
+        """
+        Индексы известных окружностей и вершин прямоугольников (см. `FigureIndex`).
+        """
+        self.__known_circles = FigureIndex(match=lambda known, new: new == known)
+        for current in (self.__circles or {}).values():
+            self.__known_circles.add(
+                Circle(Point(*current["center"]), current["radius"])
+            )
+
+        self.__known_vertices = FigureIndex(
+            match=lambda known, new: known.almost_eq(new)
+        )
+        for current in (self.__rectangles or {}).values():
+            for point in current["coordinates"]:
+                self.__known_vertices.add(Point(*point))
+
     def add_object(self, obj: Circle | Rectangle | Border) -> bool:
         """
         Добавление объектов в карту.
@@ -188,35 +212,41 @@ class Map:
         if obj.object_type not in ("border", "circle", "rectangle"):
             return False
 
+        # у пустой карты фигур еще нет
+        if obj.object_type == "circle" and not self.__circles:
+            self.__circles = dict()
+        if obj.object_type == "rectangle" and not self.__rectangles:
+            self.__rectangles = dict()
+
         if obj.object_type == "circle":
-            last_obj_name = list(self.__circles.keys())[-1]
+            names = list(self.__circles.keys())
         elif obj.object_type == "rectangle":
-            last_obj_name = list(self.__rectangles.keys())[-1]
+            names = list(self.__rectangles.keys())
         else:
-            last_obj_name = obj.object_type
+            names = []
 
         current_obj_name = (
             "border"
             if obj.object_type == "border"
-            else f"{obj.object_type}_{str(int(last_obj_name.split('_')[1]) + 1)}"
+            else f"{obj.object_type}_{int(names[-1].split('_')[1]) + 1 if names else 1}"
         )
 
         # Если тип рассматриваемого объекта является "границей"
         if obj.object_type == "border" and not self.__border:
-            self.__border = [
-                list(obj.border.rectangle[i].angle[1].point) for i in range(4)
-            ]
+            self.__border = {
+                "type": "border",
+                "coordinates": [list(vertex.point) for vertex in obj.vertices],
+            }
+
+        if self.__known_circles is None:
+            self.__index_objects()
 
         # Если тип рассматриваемого объекта является "окружностью"
         if obj.object_type == "circle":
-            for circle in self.__circles:
-                current = self.__circles[circle]
-
-                if obj == Circle(
-                    Point(current["center"][0], current["center"][1]), current["radius"]
-                ):
-                    return False
+            if obj in self.__known_circles:
+                return False
 
+            self.__known_circles.add(obj)
             self.__circles[current_obj_name] = {
                 "center": list(obj.center.point),
                 "radius": obj.radius,
@@ -224,16 +254,14 @@ class Map:
 
         # Если тип рассматриваемого объекта является "прямоугольником"
         if obj.object_type == "rectangle":
-            for rectangle in self.__rectangles:
-                current = self.rectangles[rectangle]["coordinates"]
-
-                for point in current:
-                    for angle in obj.rectangle:
-                        if Point(*point) == angle.angle[1]:
-                            return False
+            for vertex in obj.vertices:
+                if vertex in self.__known_vertices:
+                    return False
 
+            for vertex in obj.vertices:
+                self.__known_vertices.add(vertex)
             self.__rectangles[current_obj_name] = {
-                "coordinates": [list(obj.rectangle[i].angle[1].point) for i in range(4)]
+                "coordinates": [list(vertex.point) for vertex in obj.vertices]
             }
 
         return True
@@ -0,0 +1,185 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from game.cartographer import Cartographer, cell_keys
+from game.occupancy import OccupancyGrid
+
+
+class MapDelta:
+    """
+    Изменение карты по одному скану одного поезда в виде плотных массивов.
+
+    `cells`, `updates` - номера ячеек карты занятости и приращения их log-odds,
+    `points` - точки касания, округленные до целых, без повторов.
+    """
+
+    __slots__ = ("train", "cells", "updates", "points")
+
+    def __init__(
+        self, train: str, cells: np.ndarray, updates: np.ndarray, points: np.ndarray
+    ):
+        self.train = train
+        self.cells = cells
+        self.updates = updates
+        self.points = points
+
+    @property
+    def nbytes(self) -> int:
+        return self.cells.nbytes + self.updates.nbytes + self.points.nbytes
+
+
+class MappingService:
+    """
+    Общая карта нескольких поездов.
+
+    Поезда отправляют изменения карты (`MapDelta`) через свои `TrainMapper`,
+    изменения копятся до вызова `merge` и объединяются в одну карту: кластеры
+    общего картографа и, если задана, общую карту занятости.
+
+    Карта занятости разбита на полосы строк (`regions`), полосы не пересекаются
+    по памяти и обновляются параллельно.
+    """
+
+    def __init__(
+        self,
+        grid: OccupancyGrid | None = None,
+        cartographer: Cartographer | None = None,
+        regions: int = 4,
+        workers: int | None = None,
+    ):
+        """
+        :param grid: Общая карта занятости;
+        :param cartographer: Общий картограф, по умолчанию - новый `Cartographer`;
+        :param regions: Число полос карты занятости для параллельного объединения;
+        :param workers: Число потоков, по умолчанию - `regions`.
+        """
+        self.grid = grid
+        self.cartographer = cartographer or Cartographer()
+        self.regions = max(1, regions)
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._executor = None
+        self._workers = workers or self.regions
+
+        # статистика: число изменений и принятые байты по поездам, число объединений
+        self.deltas = {}
+        self.received = {}
+        self.merges = 0
+
+    def mapper(self, train: str) -> "TrainMapper":
+        return TrainMapper(self, train)
+
+    def submit(self, delta: MapDelta):
+        with self._lock:
+            self._pending.append(delta)
+            self.deltas[delta.train] = self.deltas.get(delta.train, 0) + 1
+            self.received[delta.train] = (
+                self.received.get(delta.train, 0) + delta.nbytes
+            )
+
+    def merge(self) -> int:
+        """
+        Объединение накопленных изменений с общей картой.
+
+        :return: Число объединенных изменений.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        if not pending:
+            return 0
+
+        if self.grid is not None:
+            self._merge_grid(pending)
+
+        points = np.concatenate([delta.points for delta in pending])
+        if len(points):
+            # одна и та же точка, увиденная несколькими поездами, добавляется один раз
+            _, first = np.unique(cell_keys(points), return_index=True)
+            self.cartographer.append(points[np.sort(first)].tolist())
+
+        self.merges += 1
+        return len(pending)
+
+    def _merge_grid(self, pending: list[MapDelta]):
+        cells, updates = OccupancyGrid._accumulate(
+            np.concatenate([delta.cells for delta in pending]),
+            np.concatenate([delta.updates for delta in pending]),
+        )
+        if not len(cells):
+            return
+
+        # номера ячеек упорядочены, полоса строк - непрерывный диапазон номеров
+        rows = -(-self.grid.shape[1] // self.regions)
+        bounds = np.searchsorted(
+            cells, np.arange(1, self.regions) * rows * self.grid.shape[0]
+        )
+        parts = [
+            (part_cells, part_updates)
+            for part_cells, part_updates in zip(
+                np.split(cells, bounds), np.split(updates, bounds)
+            )
+            if len(part_cells)
+        ]
+
+        if len(parts) == 1:
+            self.grid.apply(*parts[0])
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self._workers, thread_name_prefix="mapping"
+            )
+        list(self._executor.map(lambda part: self.grid.apply(*part), parts))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    @property
+    def clusters(self) -> list:
+        return self.cartographer.clusters
+
+    def report(self) -> dict:
+        return {
+            "trains": len(self.deltas),
+            "deltas": sum(self.deltas.values()),
+            "received": sum(self.received.values()),
+            "merges": self.merges,
+            "pending": len(self._pending),
+            **self.cartographer.report(),
+        }
+
+
+class TrainMapper:
+    """
+    Картограф поезда, передающий сканы в общую карту (см. `MappingService`).
+    Подключается к `TPlayer` как `mapper`.
+    """
+
+    def __init__(self, service: MappingService, train: str):
+        self.service = service
+        self.train = train
+
+    def integrate(self, starts: np.ndarray, points: np.ndarray, hits: np.ndarray):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        hits = np.asarray(hits, dtype=bool).reshape(-1)
+
+        if self.service.grid is not None:
+            cells, updates = self.service.grid.delta(starts, points, hits)
+        else:
+            cells, updates = np.empty(0, np.int32), np.empty(0, np.float32)
+
+        found = points[hits]
+        _, first = np.unique(cell_keys(found), return_index=True)
+        found = np.round(found[np.sort(first)]).astype(np.int32)
+
+        self.service.submit(MapDelta(self.train, cells, updates, found))
+
+    @property
+    def clusters(self) -> list:
+        return self.service.clusters
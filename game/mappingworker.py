@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from game.cartographer import Cartographer
+
+POLICIES = ("coalesce", "drop_oldest", "drop_newest", "block")
+
+
+class ClusterSnapshot:
+    """
+    Неизменяемый снимок кластера для отрисовки.
+    """
+
+    __slots__ = ("id", "points", "center", "radius", "version")
+
+    def __init__(self, cluster):
+        self.id = cluster.id
+        # `Cluster.points` собирается заново при каждом чтении, копия не нужна
+        self.points = cluster.points
+        self.points.flags.writeable = False
+        self.center = cluster.center
+        self.radius = cluster.radius
+        self.version = cluster.version
+
+    def __len__(self):
+        return len(self.points)
+
+    def __iter__(self):
+        return iter(map(tuple, self.points.tolist()))
+
+
+class CartographyWorker:
+    """
+    Картограф в фоновом потоке.
+
+    Сканы (`integrate`) не обрабатываются сразу, а кладутся в очередь ограниченной длины,
+    поток-обработчик забирает их и передает картографу, которым владеет единолично.
+    После каждой обработки публикуется согласованный снимок кластеров (`clusters`),
+    для неизменившихся кластеров снимки переиспользуются.
+
+    Если очередь заполнена, поступает согласно политике `policy`:
+     - "coalesce" - скан присоединяется к последнему скану в очереди,
+     - "drop_oldest" - выбрасывается самый старый скан очереди,
+     - "drop_newest" - выбрасывается поступивший скан,
+     - "block" - вызывающий ждет освобождения места (время такта перестает
+       быть независимым от картографии).
+
+    Загрузку очереди показывает `metrics`.
+    """
+
+    def __init__(
+        self,
+        cartographer: Cartographer | None = None,
+        max_queue: int = 8,
+        policy: str = "coalesce",
+        detect: bool = False,
+    ):
+        """
+        :param cartographer: Картограф, по умолчанию - новый `Cartographer`;
+        :param max_queue: Максимальное число сканов в очереди;
+        :param policy: Политика при заполненной очереди;
+        :param detect: Распознавать фигуры после каждой обработки.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r}, expected one of {POLICIES}")
+
+        self.cartographer = cartographer or Cartographer()
+        self.max_queue = max_queue
+        self.policy = policy
+        self.detect = detect
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._busy = False
+
+        self._snapshot = ()
+        self._objects = []
+        self._cache = {}
+
+        # статистика очереди
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.busy_time = 0.0
+        self.last_latency = 0.0
+
+    def start(self) -> "CartographyWorker":
+        with self._condition:
+            if self._thread is not None:
+                return self
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._run, name="cartography", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, flush: bool = True):
+        """
+        Остановка потока.
+
+        :param flush: Обработать сканы, оставшиеся в очереди.
+        """
+        if flush:
+            self.flush()
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+
+        if thread is not None:
+            thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Ожидание обработки всех сканов очереди.
+
+        :return: True, если очередь обработана, False - истек `timeout`.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._queue and not self._busy, timeout
+            )
+
+    def integrate(self, starts: np.ndarray, points: np.ndarray, hits: np.ndarray):
+        """
+        Постановка скана в очередь (см. `Cartographer.integrate`).
+        """
+        item = (
+            np.array(starts, dtype=float).reshape(-1, 2),
+            np.array(points, dtype=float).reshape(-1, 2),
+            np.array(hits, dtype=bool).reshape(-1),
+            time.perf_counter(),
+        )
+
+        with self._condition:
+            self.submitted += 1
+
+            if len(self._queue) >= self.max_queue:
+                if self.policy == "block":
+                    self._condition.wait_for(
+                        lambda: len(self._queue) < self.max_queue or not self._running
+                    )
+                elif self.policy == "drop_newest":
+                    self.dropped += 1
+                    return
+                elif self.policy == "drop_oldest":
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    starts, points, hits, stamp = self._queue.pop()
+                    item = (
+                        np.concatenate([starts, item[0]]),
+                        np.concatenate([points, item[1]]),
+                        np.concatenate([hits, item[2]]),
+                        stamp,
+                    )
+                    self.coalesced += 1
+
+            self._queue.append(item)
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or not self._running)
+                if not self._queue:
+                    return
+                starts, points, hits, stamp = self._queue.popleft()
+                self._busy = True
+                self._condition.notify_all()
+
+            begin = time.perf_counter()
+            try:
+                self.cartographer.integrate(starts, points, hits)
+                if self.detect:
+                    self.cartographer.detect()
+                self._publish()
+            finally:
+                end = time.perf_counter()
+                with self._condition:
+                    self._busy = False
+                    self.processed += 1
+                    self.busy_time += end - begin
+                    self.last_latency = end - stamp
+                    self._condition.notify_all()
+
+    def _publish(self):
+        """
+        Снимок кластеров: заново копируются только изменившиеся кластеры.
+        """
+        cache = {}
+        for cluster in self.cartographer.clusters:
+            snapshot = self._cache.get(cluster.id)
+            if snapshot is None or snapshot.version != cluster.version:
+                snapshot = ClusterSnapshot(cluster)
+            cache[cluster.id] = snapshot
+
+        self._cache = cache
+        # замена ссылок атомарна, читатели видят либо старый, либо новый снимок
+        self._snapshot = tuple(cache.values())
+        self._objects = list(self.cartographer.objects)
+
+    @property
+    def clusters(self) -> tuple[ClusterSnapshot, ...]:
+        return self._snapshot
+
+    @property
+    def objects(self) -> list:
+        return self._objects
+
+    def metrics(self) -> dict:
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue": self.max_queue,
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "busy_time": self.busy_time,
+                "last_latency": self.last_latency,
+            }
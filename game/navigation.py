@@ -1,16 +1,18 @@
 from math import sin, cos, radians, remainder, tau
 from typing import Callable
 
+import numpy as np
 import yaml
 
 from game.exceptions import ConfigError
 from game.mathfunction import sign, clamp
+from game.raycast import MeasurementMixin
 from game.trainsystem import TrainSystem
 
 EPS = 1e-5
 
 
-class NavigationMixin:
+class NavigationMixin(MeasurementMixin):
     _new_v: int | float
     v_max: int | float
     _new_alpha: int | float
@@ -21,9 +23,12 @@ class NavigationMixin:
     method: Callable
     method_kwargs: dict
 
-    def step_restriction(self) -> tuple[float, float, float, float, bool]:
+    def restriction_ray(self) -> tuple[np.ndarray, np.ndarray]:
         """
-        Проверка возможности перемещения на новою позицию
+        Расчет желаемого перемещения и луча, по которому проверяется возможность
+        перемещения на новую позицию (см. `apply_restriction`).
+
+        :return: Начало и конец луча, массивы формы (1, 2).
         """
 
         # ограничиваем v диапазоном [0, .. self.v_max]
@@ -59,10 +64,21 @@ class NavigationMixin:
         x1 = self.x + v * cos(alpha)
         y1 = self.y + v * sin(alpha)
 
-        result = self.method((x0, y0), (x1, y1), **self.method_kwargs)
-        if v > EPS and result:
-            x, y = result.point
+        self._restriction = (x1, y1, alpha, v)
+
+        return np.array([[x0, y0]]), np.array([[x1, y1]])
+
+    def apply_restriction(
+        self, collision: bool
+    ) -> tuple[float, float, float, float, bool]:
+        """
+        Новая позиция по результату замера луча из `restriction_ray`.
+
+        :param collision: Есть ли препятствие на луче.
+        """
+        x1, y1, alpha, v = self._restriction
 
+        if v > EPS and collision:
             # идея - если мы сталкиваемся с чем-то
             # сделав шаг - то мы не делаем этот шаг
             x = self.x
@@ -71,6 +87,13 @@ class NavigationMixin:
             return x, y, alpha, v, True
         return x1, y1, alpha, v, False
 
+    def step_restriction(self) -> tuple[float, float, float, float, bool]:
+        """
+        Проверка возможности перемещения на новою позицию
+        """
+        _, _, hits = self.measure(*self.restriction_ray())
+        return self.apply_restriction(bool(hits[0]))
+
     def set_measurement_method(self, method: Callable, **kwargs):
         """
         Ссылка на метод для поиска коллизий.
@@ -155,15 +178,29 @@ class NavigationSystem(NavigationMixin, TrainSystem):
         self._new_alpha = query.get("alpha", self.alpha)
         self._new_v = query.get("v", self.v)
 
+    def prepare(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Подготовка луча для проверки перемещения на текущем такте.
+        """
+        return self.restriction_ray()
+
+    def finish(self, points: np.ndarray, distances: np.ndarray, hits: np.ndarray):
+        """
+        Перемещение по результату замера луча из `prepare`.
+        """
+        self.x, self.y, self.alpha, self.v, self.collision = self.apply_restriction(
+            bool(hits[0])
+        )
+        self._new_v = 0.0
+        self._new_alpha = 0.0
+
     def step(self):
         """
         Каждый шаг ограничиваем скорость и угол диапазоном и проверяем,
         можем ли мы шагнуть в этом направлении
         :return:
         """
-        self.x, self.y, self.alpha, self.v, self.collision = self.step_restriction()
-        self._new_v = 0.0
-        self._new_alpha = 0.0
+        self.finish(*self.measure(*self.prepare()))
 
     def send(self) -> dict:
         """
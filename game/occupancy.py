@@ -0,0 +1,165 @@
+import numpy as np
+
+from game.map import Map
+from game.spatialindex import traverse_grid
+
+
+class OccupancyGrid:
+    """
+    Карта занятости в виде сетки логарифмов шансов (log-odds).
+
+    Каждый замер уточняет все пройденные лучом ячейки: ячейки до точки касания
+    становятся свободнее (`free_update`), ячейка с точкой касания - занятее (`hit_update`).
+    Луч без касания освобождает все пройденные ячейки. Значения ограничены
+    `[min_log_odds, max_log_odds]`, чтобы карта могла меняться со временем.
+
+    Стоимость обработки скана - лучи х ячейки на луч, от истории карты она не зависит.
+    """
+
+    def __init__(
+        self,
+        bounds: tuple[float, float, float, float],
+        resolution: float = 5.0,
+        hit_update: float = 0.85,
+        free_update: float = -0.4,
+        min_log_odds: float = -4.0,
+        max_log_odds: float = 4.0,
+    ):
+        """
+        :param bounds: Границы карты (left, bottom, right, top);
+        :param resolution: Размер ячейки;
+        :param hit_update: Приращение log-odds ячейки с точкой касания;
+        :param free_update: Приращение log-odds ячейки, пройденной лучом;
+        :param min_log_odds: Нижняя граница log-odds;
+        :param max_log_odds: Верхняя граница log-odds.
+        """
+        left, bottom, right, top = bounds
+
+        self.resolution = float(resolution)
+        self.origin = np.array([left, bottom], dtype=float)
+        self.shape = (
+            int(np.ceil((right - left) / self.resolution)),
+            int(np.ceil((top - bottom) / self.resolution)),
+        )
+
+        self.hit_update = hit_update
+        self.free_update = free_update
+        self.min_log_odds = min_log_odds
+        self.max_log_odds = max_log_odds
+
+        # log_odds[iy, ix] - ячейка (ix, iy), номер ячейки iy * shape[0] + ix
+        self.log_odds = np.zeros((self.shape[1], self.shape[0]), dtype=np.float32)
+
+        # число обработанных сканов и лучей
+        self.scans = 0
+        self.rays = 0
+
+    @classmethod
+    def from_map(cls, map_object: Map, resolution: float = 5.0, **kwargs):
+        """
+        Сетка по границе поля карты.
+        """
+        coordinates = np.array(map_object.border["coordinates"], dtype=float)
+        left, bottom = coordinates.min(axis=0)
+        right, top = coordinates.max(axis=0)
+        return cls((left, bottom, right, top), resolution, **kwargs)
+
+    @property
+    def probability(self) -> np.ndarray:
+        """
+        Вероятность занятости ячеек.
+        """
+        return 1.0 / (1.0 + np.exp(-self.log_odds))
+
+    def occupied(self, threshold: float = 0.0) -> np.ndarray:
+        return self.log_odds > threshold
+
+    def free(self, threshold: float = 0.0) -> np.ndarray:
+        return self.log_odds < threshold
+
+    def cell(self, points: np.ndarray) -> np.ndarray:
+        """
+        Номера ячеек (ix, iy) для точек (n, 2), без проверки выхода за сетку.
+        """
+        return np.floor(
+            (np.asarray(points, dtype=float) - self.origin) / self.resolution
+        ).astype(np.int64)
+
+    def cell_centers(self, cells: np.ndarray) -> np.ndarray:
+        return self.origin + (np.asarray(cells) + 0.5) * self.resolution
+
+    def delta(
+        self, starts: np.ndarray, points: np.ndarray, hits: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Изменение карты по скану без применения к ней.
+
+        :param starts: Начала лучей (n, 2);
+        :param points: Точки касания или концы лучей без касания (n, 2);
+        :param hits: Признаки касания (n,);
+        :return: Номера затронутых ячеек (int32) и приращения их log-odds (float32).
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        hits = np.asarray(hits, dtype=bool).reshape(-1)
+
+        if not len(starts):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        ray_ids, cells = traverse_grid(
+            starts, points, self.origin, self.resolution, self.shape
+        )
+
+        end = self.cell(points)
+        inside = (
+            (end[:, 0] >= 0)
+            & (end[:, 0] < self.shape[0])
+            & (end[:, 1] >= 0)
+            & (end[:, 1] < self.shape[1])
+        )
+        end_cells = end[:, 1] * self.shape[0] + end[:, 0]
+
+        # ячейка касания не считается свободной
+        free = ~(hits[ray_ids] & (cells == end_cells[ray_ids]))
+        occupied = end_cells[hits & inside]
+
+        return self._accumulate(
+            np.concatenate([cells[free], occupied]),
+            np.repeat([self.free_update, self.hit_update], [free.sum(), len(occupied)]),
+        )
+
+    @staticmethod
+    def _accumulate(
+        cells: np.ndarray, updates: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Сложение приращений одной ячейки.
+        """
+        touched, index = np.unique(cells, return_inverse=True)
+        update = np.bincount(index, weights=updates, minlength=len(touched))
+        return touched.astype(np.int32), update.astype(np.float32)
+
+    def apply(self, cells: np.ndarray, updates: np.ndarray):
+        """
+        Применение изменения карты (см. `delta`), номера ячеек не должны повторяться.
+        """
+        values = self.log_odds.reshape(-1)
+        values[cells] = np.clip(
+            values[cells] + updates, self.min_log_odds, self.max_log_odds
+        )
+
+    def integrate(self, starts: np.ndarray, points: np.ndarray, hits: np.ndarray):
+        """
+        Обработка скана, обновляются только затронутые сканом ячейки.
+
+        :param starts: Начала лучей (n, 2);
+        :param points: Точки касания или концы лучей без касания (n, 2);
+        :param hits: Признаки касания (n,).
+        """
+        if not len(starts):
+            return
+
+        self.apply(*self.delta(starts, points, hits))
+
+        self.scans += 1
+        self.rays += len(starts)
@@ -0,0 +1,254 @@
+from collections import OrderedDict
+from math import radians
+from typing import Callable
+
+import numpy as np
+import pymunk
+
+_MISSING = object()
+
+
+class MeasurementCache:
+    """
+    LRU-кэш замеров дальности по статической геометрии.
+
+    Ключ замера - квантованные начало луча, направление и длина. Значение - точка касания
+    или None, если касания нет. Кэш ограничен по размеру и сбрасывается при изменении
+    сцены (`game.scene.Scene.version`) или явным вызовом `invalidate`.
+
+    Подвижные тела пространства сцены (поезда) меняют результат замера без изменения
+    сцены, поэтому лучи, проходящие через их ограничивающие прямоугольники, замеряются
+    заново и в кэш не попадают.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4096,
+        position_tolerance: float = 0.5,
+        angle_tolerance: float = radians(0.1),
+        scene=None,
+    ):
+        """
+        :param max_size: Максимальное число хранимых замеров;
+        :param position_tolerance: Шаг квантования координат начала и длины луча;
+        :param angle_tolerance: Шаг квантования направления луча, радианы;
+        :param scene: Сцена, при изменении которой кэш сбрасывается;
+            лучи через подвижные тела ее пространства замеряются мимо кэша.
+        """
+        self.max_size = max_size
+        self.position_tolerance = position_tolerance
+        self.angle_tolerance = angle_tolerance
+        self.scene = scene
+
+        self._data = OrderedDict()
+        self._scene_version = self._current_scene_version()
+
+        self.hits = 0
+        self.misses = 0
+        # число лучей, замеренных мимо кэша из-за подвижных тел
+        self.bypassed = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _current_scene_version(self):
+        return getattr(self.scene, "version", None)
+
+    def _dynamic_boxes(self) -> np.ndarray:
+        """
+        Ограничивающие прямоугольники (left, bottom, right, top) фигур подвижных тел.
+        """
+        space = getattr(self.scene, "space", None)
+        if space is None:
+            return np.zeros((0, 4))
+
+        boxes = [
+            shape.cache_bb()
+            for shape in space.shapes
+            if shape.body is not None and shape.body.body_type != pymunk.Body.STATIC
+        ]
+        return np.array(
+            [(bb.left, bb.bottom, bb.right, bb.top) for bb in boxes], dtype=float
+        ).reshape(-1, 4)
+
+    def invalidate(self):
+        """
+        Сброс всех сохраненных замеров.
+        """
+        self._data.clear()
+        self._scene_version = self._current_scene_version()
+
+    def keys(self, starts: np.ndarray, ends: np.ndarray) -> list[tuple]:
+        """
+        Квантованные ключи лучей.
+        """
+        directions = ends - starts
+
+        position = np.round(starts / self.position_tolerance).astype(np.int64)
+        angle = np.round(
+            np.arctan2(directions[:, 1], directions[:, 0]) / self.angle_tolerance
+        ).astype(np.int64)
+        length = np.round(
+            np.hypot(directions[:, 0], directions[:, 1]) / self.position_tolerance
+        ).astype(np.int64)
+
+        return list(
+            zip(
+                position[:, 0].tolist(),
+                position[:, 1].tolist(),
+                angle.tolist(),
+                length.tolist(),
+            )
+        )
+
+    def lookup(self, starts: np.ndarray, ends: np.ndarray) -> "CacheLookup":
+        """
+        Поиск лучей в кэше. Лучи, которых нет в кэше (`CacheLookup.missed`),
+        замеряются снаружи и передаются в `complete`.
+        """
+        if self._scene_version != self._current_scene_version():
+            self.invalidate()
+
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+        points = ends.copy()
+        hits = np.zeros(len(starts), dtype=bool)
+
+        keys = self.keys(starts, ends)
+        missed = []
+
+        # лучи одного ключа отличаются не больше чем на шаг квантования
+        lengths = np.hypot(*(ends - starts).T)
+        padding = self.position_tolerance + lengths * self.angle_tolerance
+        live = segments_cross_boxes(starts, ends, self._dynamic_boxes(), padding)
+        self.bypassed += int(live.sum())
+
+        for i, key in enumerate(keys):
+            if live[i]:
+                missed.append(i)
+                continue
+
+            value = self._data.get(key, _MISSING)
+
+            if value is _MISSING:
+                missed.append(i)
+                continue
+
+            self._data.move_to_end(key)
+            if value is not None:
+                points[i] = value
+                hits[i] = True
+
+        self.hits += len(keys) - len(missed)
+        self.misses += len(missed)
+
+        return CacheLookup(
+            self, starts, ends, points, hits, keys, live, np.array(missed, dtype=int)
+        )
+
+    def complete(
+        self, lookup: "CacheLookup", result: tuple | None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Сохранение замеров лучей `lookup.missed` и сборка результата всех лучей.
+
+        :param lookup: Результат `lookup`;
+        :param result: Пакетный замер лучей `lookup.missed`.
+        """
+        starts, ends, missed = lookup.starts, lookup.ends, lookup.missed
+        points, hits = lookup.points, lookup.hits
+
+        if len(missed):
+            missed_points, _, missed_hits = result
+
+            points[missed] = np.where(missed_hits[:, None], missed_points, ends[missed])
+            hits[missed] = missed_hits
+
+            for i, point, hit in zip(
+                missed.tolist(), missed_points.tolist(), missed_hits.tolist()
+            ):
+                if not lookup.live[i]:
+                    self._data[lookup.keys[i]] = tuple(point) if hit else None
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+        distances = np.sqrt(
+            (starts[:, 0] - points[:, 0]) ** 2 + (starts[:, 1] - points[:, 1]) ** 2
+        )
+        return points, distances, hits
+
+    def measure(
+        self, method: Callable, starts: np.ndarray, ends: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Пакетный замер через кэш: найденные лучи берутся из кэша,
+        остальные одним вызовом передаются в пакетный метод `method`.
+        """
+        lookup = self.lookup(starts, ends)
+
+        result = None
+        if len(lookup.missed):
+            result = method(lookup.starts[lookup.missed], lookup.ends[lookup.missed])
+        return self.complete(lookup, result)
+
+
+class CacheLookup:
+    """
+    Результат поиска лучей в кэше (см. `MeasurementCache.lookup`).
+    """
+
+    __slots__ = ("cache", "starts", "ends", "points", "hits", "keys", "live", "missed")
+
+    def __init__(self, cache, starts, ends, points, hits, keys, live, missed):
+        self.cache = cache
+        self.starts = starts
+        self.ends = ends
+        self.points = points
+        self.hits = hits
+        self.keys = keys
+        self.live = live
+        self.missed = missed
+
+
+def segments_cross_boxes(
+    starts: np.ndarray, ends: np.ndarray, boxes: np.ndarray, padding=0.0
+) -> np.ndarray:
+    """
+    Пересекает ли каждый отрезок хотя бы один из прямоугольников.
+
+    :param starts: Начала отрезков (n, 2);
+    :param ends: Концы отрезков (n, 2);
+    :param boxes: Прямоугольники (left, bottom, right, top), форма (k, 4);
+    :param padding: Расширение прямоугольников, число или массив (n,).
+    :return: Массив (n,).
+    """
+    if not len(boxes) or not len(starts):
+        return np.zeros(len(starts), dtype=bool)
+
+    padding = np.broadcast_to(np.asarray(padding, dtype=float), (len(starts),))
+    low = boxes[None, :, :2] - padding[:, None, None]
+    high = boxes[None, :, 2:] + padding[:, None, None]
+
+    origin = starts[:, None]
+    direction = (ends - starts)[:, None]
+
+    # отсечение Лианга - Барски по каждой оси
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ta = (low - origin) / direction
+        tb = (high - origin) / direction
+
+    parallel = direction == 0
+    inside = (origin >= low) & (origin <= high)
+    enter = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(ta, tb))
+    leave = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(ta, tb))
+
+    t0 = np.maximum(enter.max(axis=-1), 0.0)
+    t1 = np.minimum(leave.min(axis=-1), 1.0)
+    return (t0 <= t1).any(axis=1)
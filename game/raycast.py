@@ -0,0 +1,556 @@
+from math import radians
+from typing import Callable
+
+import numpy as np
+import pymunk
+
+from game.raycache import MeasurementCache
+
+BatchResult = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def batch_from_single(
+    method: Callable, starts: np.ndarray, ends: np.ndarray, **kwargs
+) -> BatchResult:
+    """
+    Пакетный замер через поштучный метод (например, `pymunk.Space.segment_query_first`).
+
+    Контракт пакетного замера: на вход - массивы начал и концов лучей формы (n, 2),
+    на выход - точки касания (n, 2), дальности (n,) и признаки касания (n,).
+    Если касания нет, точкой считается конец луча, а дальностью - длина луча.
+
+    :param method: Метод замера одного луча, возвращает объект с атрибутом `point` или None;
+    :param starts: Начала лучей;
+    :param ends: Концы лучей;
+    :param kwargs: Аргументы метода.
+    """
+    starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+    points = ends.copy()
+    hits = np.zeros(len(starts), dtype=bool)
+
+    for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+        result = method(tuple(start), tuple(end), **kwargs)
+        if result:
+            points[i] = result.point
+            hits[i] = True
+
+    return points, ray_lengths(starts, points), hits
+
+
+def ray_lengths(starts: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Расстояния от начал лучей до точек.
+    """
+    return np.sqrt(
+        (starts[:, 0] - points[:, 0]) ** 2 + (starts[:, 1] - points[:, 1]) ** 2
+    )
+
+
+class MeasurementMixin:
+    """
+    Пакетный замер дальности для подсистем, у которых задан поштучный метод `method`.
+    """
+
+    method: Callable
+    method_kwargs: dict | None
+    batch_method: Callable | None = None
+    batch_method_kwargs: dict | None = None
+    cache: MeasurementCache | None = None
+
+    def set_batch_measurement_method(self, method: Callable, **kwargs):
+        """
+        Ссылка на пакетный метод замера дальности.
+
+        :param method: Метод, принимающий массивы начал и концов лучей формы (n, 2)
+            и возвращающий точки касания, дальности и признаки касания;
+        :param kwargs: Аргументы этого метода.
+        """
+        self.batch_method = method
+        self.batch_method_kwargs = kwargs
+
+    def enable_cache(
+        self,
+        max_size: int = 4096,
+        position_tolerance: float = 0.5,
+        angle_tolerance: float = radians(0.1),
+        scene=None,
+    ) -> MeasurementCache:
+        """
+        Включение кэша замеров (см. `MeasurementCache`).
+
+        :param max_size: Максимальное число хранимых замеров;
+        :param position_tolerance: Шаг квантования координат начала и длины луча;
+        :param angle_tolerance: Шаг квантования направления луча, радианы;
+        :param scene: Сцена, при изменении которой кэш сбрасывается;
+            лучи через подвижные тела ее пространства замеряются мимо кэша.
+        """
+        self.cache = MeasurementCache(
+            max_size, position_tolerance, angle_tolerance, scene
+        )
+        return self.cache
+
+    def disable_cache(self):
+        self.cache = None
+
+    def measure(self, starts: np.ndarray, ends: np.ndarray) -> BatchResult:
+        """
+        Замер дальности сразу по всем лучам. Если пакетный метод не задан,
+        лучи по одному передаются в `self.method`.
+
+        :param starts: Начала лучей, массив формы (n, 2);
+        :param ends: Концы лучей, массив формы (n, 2).
+        :return: Точки касания (n, 2), дальности (n,), признаки касания (n,).
+        """
+        if not len(starts):
+            return np.zeros((0, 2)), np.zeros(0), np.zeros(0, dtype=bool)
+        if self.cache is not None:
+            return self.cache.measure(self._measure, starts, ends)
+        return self._measure(starts, ends)
+
+    def _measure(self, starts: np.ndarray, ends: np.ndarray) -> BatchResult:
+        if self.batch_method is not None:
+            return self.batch_method(starts, ends, **self.batch_method_kwargs)
+        return batch_from_single(self.method, starts, ends, **self.method_kwargs)
+
+
+class PymunkBatchQuery:
+    """
+    Пакетный замер по пространству pymunk.
+
+    У pymunk нет пакетного запроса, поэтому сначала одним `bb_query` выбираются фигуры,
+    попадающие в общий прямоугольник всех лучей, затем векторно отсеиваются лучи,
+    чей прямоугольник не пересекается ни с одной фигурой. `segment_query_first`
+    вызывается только для оставшихся лучей.
+    """
+
+    def __init__(self, space, radius: float = 0.01, shape_filter=None):
+        self.space = space
+        self.radius = radius
+        self.shape_filter = shape_filter or pymunk.ShapeFilter()
+
+    def __call__(self, starts: np.ndarray, ends: np.ndarray, **kwargs) -> BatchResult:
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+        points = ends.copy()
+        hits = np.zeros(len(starts), dtype=bool)
+
+        if not len(starts):
+            return points, np.zeros(0), hits
+
+        radius = kwargs.get("radius", self.radius)
+        shape_filter = kwargs.get("shape_filter", self.shape_filter)
+
+        ray_bb = np.stack(
+            [
+                np.minimum(starts[:, 0], ends[:, 0]) - radius,
+                np.minimum(starts[:, 1], ends[:, 1]) - radius,
+                np.maximum(starts[:, 0], ends[:, 0]) + radius,
+                np.maximum(starts[:, 1], ends[:, 1]) + radius,
+            ],
+            axis=1,
+        )
+
+        total_bb = pymunk.BB(
+            ray_bb[:, 0].min(),
+            ray_bb[:, 1].min(),
+            ray_bb[:, 2].max(),
+            ray_bb[:, 3].max(),
+        )
+        shapes = self.space.bb_query(total_bb, shape_filter)
+
+        if shapes:
+            shape_bb = np.array(
+                [
+                    (shape.bb.left, shape.bb.bottom, shape.bb.right, shape.bb.top)
+                    for shape in shapes
+                ]
+            )
+
+            candidates = np.any(
+                (ray_bb[:, None, 0] <= shape_bb[None, :, 2])
+                & (ray_bb[:, None, 2] >= shape_bb[None, :, 0])
+                & (ray_bb[:, None, 1] <= shape_bb[None, :, 3])
+                & (ray_bb[:, None, 3] >= shape_bb[None, :, 1]),
+                axis=1,
+            )
+
+            for i in np.flatnonzero(candidates):
+                result = self.space.segment_query_first(
+                    tuple(starts[i]), tuple(ends[i]), radius, shape_filter
+                )
+                if result:
+                    points[i] = result.point
+                    hits[i] = True
+
+        return points, ray_lengths(starts, points), hits
+
+
+class RaycastHit:
+    """
+    Результат замера аналитическим методом. Повторяет нужную часть `pymunk.SegmentQueryInfo`.
+    """
+
+    __slots__ = ("point", "alpha", "distance")
+
+    def __init__(self, point: tuple[float, float], alpha: float, distance: float):
+        self.point = point
+        self.alpha = alpha
+        self.distance = distance
+
+    def __repr__(self):
+        return f"RaycastHit(point={self.point}, alpha={self.alpha}, distance={self.distance})"
+
+
+class MapGeometry:
+    """
+    Статическая геометрия карты в виде плоских массивов:
+
+     - `segments` - отрезки (x0, y0, x1, y1) границы поля и сторон прямоугольников, форма (m, 4),
+     - `circles` - окружности (x, y, r), форма (k, 3).
+
+    Первые `border_count` отрезков относятся к границе поля.
+    """
+
+    def __init__(
+        self, segments: np.ndarray, circles: np.ndarray, border_count: int = 0
+    ):
+        self.segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+        self.circles = np.asarray(circles, dtype=float).reshape(-1, 3)
+        self.border_count = border_count
+
+    @staticmethod
+    def _polygon_segments(coordinates: list) -> list[tuple[float, float, float, float]]:
+        count = len(coordinates)
+        return [(*coordinates[i], *coordinates[(i + 1) % count]) for i in range(count)]
+
+    @classmethod
+    def from_map(cls, map_object) -> "MapGeometry":
+        """
+        Сборка геометрии из объекта карты (`game.map.Map`).
+
+        :param map_object: Карта.
+        """
+        border = map_object.border
+        if isinstance(border, dict):
+            border = border.get("coordinates", [])
+
+        segments = cls._polygon_segments(border or [])
+        border_count = len(segments)
+
+        for rectangle in (map_object.rectangles or {}).values():
+            segments += cls._polygon_segments(rectangle["coordinates"])
+
+        circles = [
+            (*circle["center"], circle["radius"])
+            for circle in (map_object.circles or {}).values()
+        ]
+
+        return cls(segments, circles, border_count)
+
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        """
+        Ограничивающий прямоугольник всей геометрии (left, bottom, right, top).
+        """
+        xs = [
+            self.segments[:, 0],
+            self.segments[:, 2],
+            self.circles[:, 0] - self.circles[:, 2],
+            self.circles[:, 0] + self.circles[:, 2],
+        ]
+        ys = [
+            self.segments[:, 1],
+            self.segments[:, 3],
+            self.circles[:, 1] - self.circles[:, 2],
+            self.circles[:, 1] + self.circles[:, 2],
+        ]
+        xs = np.concatenate(xs)
+        ys = np.concatenate(ys)
+
+        if not len(xs):
+            return 0.0, 0.0, 0.0, 0.0
+        return float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())
+
+
+def _line_params(px, py, rx, ry, qx, qy, sx, sy) -> np.ndarray:
+    """
+    Параметр t пересечения лучей `p + t * r` с отрезками `q + u * s`, `inf` - пересечения нет.
+    """
+    denom = rx * sy - ry * sx
+    dx, dy = qx - px, qy - py
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ts = (dx * sy - dy * sx) / denom
+        us = (dx * ry - dy * rx) / denom
+
+    valid = (denom != 0) & (ts >= 0) & (ts <= 1) & (us >= 0) & (us <= 1)
+    return np.where(valid, ts, np.inf)
+
+
+def _entry_params(fx, fy, rx, ry, r) -> np.ndarray:
+    """
+    Параметр t входа лучей `p + t * r` в окружности радиуса `r`, `f = p - center`,
+    `inf` - луч не входит в окружность.
+    """
+    a = rx**2 + ry**2
+    b = fx * rx + fy * ry
+    c = fx**2 + fy**2 - r**2
+
+    discriminant = b**2 - a * c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tc = (-b - np.sqrt(np.maximum(discriminant, 0.0))) / a
+
+    valid = (discriminant >= 0) & (tc >= 0) & (tc <= 1)
+    return np.where(valid, tc, np.inf)
+
+
+def segment_params(
+    px, py, rx, ry, segments: np.ndarray, radius: float = 0.0
+) -> np.ndarray:
+    """
+    Параметр t первого касания лучей `p + t * r` с отрезками (..., 4), `inf` - касания нет.
+    Массивы лучей и отрезков должны быть согласованы по правилам broadcasting.
+
+    Как в pymunk, отрезок расширяется на толщину луча `radius` (до капсулы),
+    а луч, начинающийся внутри расширенного отрезка, касается его при t = 0.
+    """
+    qx, qy = segments[..., 0], segments[..., 1]
+    sx, sy = segments[..., 2] - qx, segments[..., 3] - qy
+
+    if radius <= 0:
+        return _line_params(px, py, rx, ry, qx, qy, sx, sy)
+
+    length = np.hypot(sx, sy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nx = np.where(length > 0, -sy / length, 0.0) * radius
+        ny = np.where(length > 0, sx / length, 0.0) * radius
+        u = np.clip(((px - qx) * sx + (py - qy) * sy) / length**2, 0.0, 1.0)
+    u = np.nan_to_num(u)
+
+    t = np.minimum.reduce(
+        [
+            _line_params(px, py, rx, ry, qx + nx, qy + ny, sx, sy),
+            _line_params(px, py, rx, ry, qx - nx, qy - ny, sx, sy),
+            _entry_params(px - qx, py - qy, rx, ry, radius),
+            _entry_params(px - qx - sx, py - qy - sy, rx, ry, radius),
+        ]
+    )
+
+    inside = (px - qx - u * sx) ** 2 + (py - qy - u * sy) ** 2 <= radius**2
+    return np.where(inside, 0.0, t)
+
+
+def circle_params(px, py, rx, ry, circles: np.ndarray, radius: float = 0.0):
+    """
+    Параметр t первого касания лучей `p + t * r` с окружностями (..., 3), `inf` - касания нет.
+    Окружности расширяются на толщину луча `radius`. Если луч начинается внутри
+    окружности, касание, как в pymunk, считается в его начале (t = 0).
+    """
+    cx, cy = circles[..., 0], circles[..., 1]
+    cr = circles[..., 2] + radius
+
+    fx, fy = px - cx, py - cy
+    inside = fx**2 + fy**2 <= cr**2
+    return np.where(inside, 0.0, _entry_params(fx, fy, rx, ry, cr))
+
+
+def first_hit(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    segments: np.ndarray,
+    circles: np.ndarray,
+    radius: float = 0.0,
+) -> np.ndarray:
+    """
+    Параметр первого касания для каждого луча `start + t * (end - start)`, t из [0, 1].
+
+    :param starts: Начала лучей (n, 2);
+    :param ends: Концы лучей (n, 2);
+    :param segments: Отрезки (m, 4);
+    :param circles: Окружности (k, 3);
+    :param radius: Толщина луча, на которую расширяются фигуры.
+    :return: Массив (n,) со значениями t, `inf` - касания нет.
+    """
+    px, py = starts[:, 0:1], starts[:, 1:2]
+    rx, ry = ends[:, 0:1] - px, ends[:, 1:2] - py
+
+    t = np.full(len(starts), np.inf)
+
+    if len(segments):
+        ts = segment_params(px, py, rx, ry, segments[None, :, :], radius)
+        t = np.minimum(t, ts.min(axis=1))
+
+    if len(circles):
+        tc = circle_params(px, py, rx, ry, circles[None, :, :], radius)
+        t = np.minimum(t, tc.min(axis=1))
+
+    return t
+
+
+def closest_points(points: np.ndarray, geometry: MapGeometry) -> np.ndarray:
+    """
+    Ближайшие к точкам (n, 2) точки отрезков и окружностей геометрии карты.
+    """
+    px, py = points[:, 0:1], points[:, 1:2]
+    candidates = []
+
+    segments = geometry.segments
+    if len(segments):
+        qx, qy = segments[None, :, 0], segments[None, :, 1]
+        sx, sy = segments[None, :, 2] - qx, segments[None, :, 3] - qy
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = ((px - qx) * sx + (py - qy) * sy) / (sx**2 + sy**2)
+        u = np.clip(np.nan_to_num(u), 0.0, 1.0)
+
+        candidates.append(np.stack([qx + u * sx, qy + u * sy], axis=-1))
+
+    circles = geometry.circles
+    if len(circles):
+        cx, cy, cr = circles[None, :, 0], circles[None, :, 1], circles[None, :, 2]
+        dx, dy = px - cx, py - cy
+        to_center = np.hypot(dx, dy)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.where(to_center > 0, cr / to_center, 0.0)
+        candidates.append(np.stack([cx + dx * scale, cy + dy * scale], axis=-1))
+
+    if not candidates:
+        return points
+
+    candidates = np.concatenate(candidates, axis=1)
+    distances = ((candidates - points[:, None]) ** 2).sum(axis=-1)
+    return candidates[np.arange(len(points)), distances.argmin(axis=1)]
+
+
+class Raycaster:
+    """
+    Базовый класс аналитических методов замера дальности.
+
+    Наследник определяет `cast` - параметр первого касания для каждого луча.
+    Поштучный метод `segment_query_first` совместим по сигнатуре с `pymunk.Space.segment_query_first`,
+    вызов объекта - пакетный метод (см. `batch_from_single`).
+
+    Как и в pymunk, фигуры расширяются на толщину луча, но точка касания лежит
+    на самой фигуре (см. `surface`). Луч, начинающийся внутри фигуры, касается ее
+    при t = 0, а точкой касания остается конец луча.
+    """
+
+    def cast(
+        self, starts: np.ndarray, ends: np.ndarray, radius: float = 0.0
+    ) -> np.ndarray:
+        """
+        Параметр t первого касания для каждого луча `start + t * (end - start)`.
+
+        :param starts: Начала лучей (n, 2);
+        :param ends: Концы лучей (n, 2);
+        :param radius: Толщина луча.
+        :return: Массив (n,) со значениями t из [0, 1], `inf` - касания нет.
+        """
+        raise NotImplementedError
+
+    def surface(self, points: np.ndarray) -> np.ndarray:
+        """
+        Ближайшие к точкам (n, 2) точки фигур. Точка касания толстого луча
+        отстоит от фигуры на его толщину, а pymunk возвращает точку на самой фигуре.
+        По умолчанию точки не меняются.
+        """
+        return points
+
+    def _hits(
+        self, starts: np.ndarray, ends: np.ndarray, radius: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Параметры, точки и признаки касания лучей.
+        """
+        t = self.cast(starts, ends, radius)
+        hits = np.isfinite(t)
+
+        # начало внутри фигуры: t = 0, точка - конец луча
+        outside = hits & (t > 0)
+        points = ends.copy()
+        points[outside] = starts[outside] + t[outside, None] * (
+            ends[outside] - starts[outside]
+        )
+        if radius > 0 and outside.any():
+            points[outside] = self.surface(points[outside])
+
+        return t, points, hits
+
+    def segment_query_first(
+        self, start, end, radius: float = 0.0, shape_filter=None
+    ) -> RaycastHit | None:
+        starts = np.array([start], dtype=float)
+        ends = np.array([end], dtype=float)
+        t, points, hits = self._hits(starts, ends, radius)
+
+        if not hits[0]:
+            return None
+
+        x, y = points[0].tolist()
+        return RaycastHit((x, y), float(t[0]), float(ray_lengths(starts, points)[0]))
+
+    def __call__(
+        self, starts: np.ndarray, ends: np.ndarray, radius: float = 0.0, **kwargs
+    ) -> BatchResult:
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+        _, points, hits = self._hits(starts, ends, radius)
+        return points, ray_lengths(starts, points), hits
+
+
+class MapRaycaster(Raycaster):
+    """
+    Аналитический замер дальности по статической геометрии карты без пространства pymunk.
+    """
+
+    # ограничение на размер промежуточных массивов (лучи х фигуры)
+    chunk_size = 1 << 20
+
+    def __init__(self, geometry):
+        self.geometry = (
+            geometry
+            if isinstance(geometry, MapGeometry)
+            else MapGeometry.from_map(geometry)
+        )
+
+    def cast(
+        self, starts: np.ndarray, ends: np.ndarray, radius: float = 0.0
+    ) -> np.ndarray:
+        """
+        Параметр первого касания для каждого луча (см. `first_hit`).
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+        shapes = max(len(self.geometry.segments) + len(self.geometry.circles), 1)
+        step = max(self.chunk_size // shapes, 1)
+
+        return np.concatenate(
+            [
+                first_hit(
+                    starts[i : i + step],
+                    ends[i : i + step],
+                    self.geometry.segments,
+                    self.geometry.circles,
+                    radius,
+                )
+                for i in range(0, len(starts), step)
+            ]
+            or [np.zeros(0)]
+        )
+
+    def surface(self, points: np.ndarray) -> np.ndarray:
+        shapes = max(len(self.geometry.segments) + len(self.geometry.circles), 1)
+        step = max(self.chunk_size // shapes, 1)
+
+        return np.concatenate(
+            [
+                closest_points(points[i : i + step], self.geometry)
+                for i in range(0, len(points), step)
+            ]
+        )
@@ -0,0 +1,190 @@
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+FIELDS = ("x", "y", "ssk_x", "ssk_y", "value", "measurement")
+
+
+class ScanBuffer(Sequence):
+    """
+    Результаты замеров визирной подсистемы по столбцам.
+
+    Массивы выделяются один раз и переписываются на каждом такте, наружу отдаются
+    только представления без права записи (`x`, `y`, `ssk_x`, `ssk_y`, `value`, `measurement`).
+    Для старого кода буфер ведет себя как список словарей: `scan[i]["x"]`.
+    Элементы такого списка ссылаются на буфер и меняются вместе с ним на следующем такте.
+
+    Запросы подсистем копируются через `deepcopy`, но буфер при этом передается
+    по ссылке: писать в него снаружи нельзя, а копирование столбцов на каждом такте
+    вернуло бы выделение памяти, которого буфер избегает. Независимая копия - `copy`.
+
+    Для каждого луча хранится номер такта, на котором он был замерен (`stamps`, -1 - еще
+    не замерялся), и начало луча на этом такте (`origins`), номер такта последней
+    записи - `stamp`.
+    """
+
+    def __init__(self, size: int):
+        self._columns = {
+            name: np.zeros(size, dtype=bool if name == "measurement" else float)
+            for name in FIELDS
+        }
+        self._views = {}
+        for name, column in self._columns.items():
+            view = column.view()
+            view.flags.writeable = False
+            self._views[name] = view
+
+        self._stamps = np.full(size, -1, dtype=np.int64)
+        self._stamps_view = self._stamps.view()
+        self._stamps_view.flags.writeable = False
+        self.stamp = -1
+
+        self._origins = np.full((size, 2), np.nan)
+        self._origins_view = self._origins.view()
+        self._origins_view.flags.writeable = False
+
+    def write(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        ssk_x: np.ndarray,
+        ssk_y: np.ndarray,
+        value: np.ndarray,
+        measurement: np.ndarray,
+        stamp: int | None = None,
+        index: np.ndarray | None = None,
+        origin: tuple[float, float] | None = None,
+    ):
+        """
+        Запись замеров текущего такта в буфер без выделения новой памяти.
+
+        :param stamp: Номер такта замера;
+        :param index: Номера записываемых лучей, по умолчанию - все лучи;
+        :param origin: Начало лучей при замере.
+        """
+        data = (x, y, ssk_x, ssk_y, value, measurement)
+
+        if index is None:
+            for name, column in zip(FIELDS, data):
+                np.copyto(self._columns[name], column)
+        else:
+            for name, column in zip(FIELDS, data):
+                self._columns[name][index] = column
+
+        rows = slice(None) if index is None else index
+        if stamp is not None:
+            self._stamps[rows] = stamp
+            self.stamp = stamp
+        if origin is not None:
+            self._origins[rows] = origin
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._views["x"]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._views["y"]
+
+    @property
+    def ssk_x(self) -> np.ndarray:
+        return self._views["ssk_x"]
+
+    @property
+    def ssk_y(self) -> np.ndarray:
+        return self._views["ssk_y"]
+
+    @property
+    def value(self) -> np.ndarray:
+        return self._views["value"]
+
+    @property
+    def measurement(self) -> np.ndarray:
+        return self._views["measurement"]
+
+    @property
+    def stamps(self) -> np.ndarray:
+        return self._stamps_view
+
+    @property
+    def origins(self) -> np.ndarray:
+        return self._origins_view
+
+    def fresh(self, stamp: int) -> np.ndarray:
+        """
+        Номера лучей, замеренных на такте `stamp`.
+        """
+        return np.flatnonzero(self._stamps == stamp)
+
+    @property
+    def complete(self) -> bool:
+        """
+        Все ли лучи замерены хотя бы один раз.
+        """
+        return bool((self._stamps >= 0).all())
+
+    def column(self, name: str) -> np.ndarray:
+        return self._views[name]
+
+    def __len__(self):
+        return len(self._columns["x"])
+
+    def __getitem__(self, index: int) -> "RayView":
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ScanBuffer index out of range")
+
+        return RayView(self._columns, index)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def copy(self) -> "ScanBuffer":
+        other = ScanBuffer(len(self))
+        other.write(*(self._columns[name] for name in FIELDS))
+        np.copyto(other._stamps, self._stamps)
+        np.copyto(other._origins, self._origins)
+        other.stamp = self.stamp
+        return other
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def to_list(self) -> list[dict]:
+        """
+        Независимая копия в виде списка словарей.
+        """
+        return [dict(ray) for ray in self]
+
+    def __repr__(self):
+        return f"ScanBuffer({self.to_list()})"
+
+
+class RayView(Mapping):
+    """
+    Замер одного луча в виде словаря только для чтения.
+    """
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: dict[str, np.ndarray], index: int):
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, key: str):
+        return self._columns[key][self._index].item()
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return repr(dict(self))
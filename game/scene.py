@@ -15,6 +15,9 @@ class Scene:
 
         self.map = Map(path) if path else map_object
 
+        # номер версии сцены, увеличивается при каждом изменении
+        self.version = 0
+
     def set_scene(self):
         """
         Установка карты.
@@ -52,3 +55,5 @@ class Scene:
             )
             box_shape.body = box_body
             self.space.add(box_shape, box_body)
+
+        self.version += 1
@@ -0,0 +1,107 @@
+from typing import Callable, Iterable
+
+import numpy as np
+
+from game.raycast import BatchResult
+
+
+class RayScheduler:
+    """
+    Сборщик лучей на такт.
+
+    Подсистемы регистрируют свои лучи (`submit`), все лучи такта замеряются одним
+    пакетным запросом (`resolve`), после чего каждая подсистема получает свою часть
+    результатов (`result`).
+
+    Подсистема, участвующая в таком такте, должна уметь:
+     - подготовить лучи текущего такта (`prepare`) - начала и концы, массивы формы (n, 2),
+     - обработать замеры по ним (`finish`) - точки касания, дальности и признаки касания.
+
+    Если у подсистемы включен кэш замеров (`cache`, см. `game.raycache.MeasurementCache`),
+    в общий запрос попадают только лучи, которых нет в кэше.
+    """
+
+    def __init__(self, method: Callable, **kwargs):
+        """
+        :param method: Пакетный метод замера дальности (см. `game.raycast`);
+        :param kwargs: Аргументы этого метода.
+        """
+        self.method = method
+        self.method_kwargs = kwargs
+
+        self._starts = []
+        self._ends = []
+        self._count = 0
+        self._result = None
+
+        # статистика: число пакетных запросов и замеренных лучей
+        self.queries = 0
+        self.rays = 0
+
+    def submit(self, starts: np.ndarray, ends: np.ndarray) -> slice:
+        """
+        Регистрация лучей.
+
+        :return: Номер заявки для получения результатов.
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+        ticket = slice(self._count, self._count + len(starts))
+        self._starts.append(starts)
+        self._ends.append(ends)
+        self._count += len(starts)
+        return ticket
+
+    def resolve(self):
+        """
+        Замер всех зарегистрированных лучей одним запросом.
+        """
+        if self._count:
+            self._result = self.method(
+                np.concatenate(self._starts),
+                np.concatenate(self._ends),
+                **self.method_kwargs,
+            )
+            self.queries += 1
+            self.rays += self._count
+        else:
+            self._result = np.zeros((0, 2)), np.zeros(0), np.zeros(0, dtype=bool)
+
+        self._starts = []
+        self._ends = []
+        self._count = 0
+
+    def result(self, ticket: slice) -> BatchResult:
+        points, distances, hits = self._result
+        return points[ticket], distances[ticket], hits[ticket]
+
+    def run(self, systems: Iterable):
+        """
+        Один этап такта: лучи всех подсистем замеряются одним запросом,
+        и каждая подсистема завершает свой шаг.
+
+        :param systems: Подсистемы с методами `prepare` и `finish`.
+        """
+        prepared = []
+        for system in systems:
+            starts, ends = system.prepare()
+
+            cache = getattr(system, "cache", None)
+            if cache is None:
+                prepared.append((system, None, self.submit(starts, ends)))
+                continue
+
+            lookup = cache.lookup(starts, ends)
+            ticket = self.submit(
+                lookup.starts[lookup.missed], lookup.ends[lookup.missed]
+            )
+            prepared.append((system, lookup, ticket))
+
+        self.resolve()
+
+        for system, lookup, ticket in prepared:
+            result = self.result(ticket)
+            if lookup is not None:
+                result = lookup.cache.complete(lookup, result)
+            system.finish(*result)
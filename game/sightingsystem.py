@@ -2,19 +2,23 @@ from copy import deepcopy
 from math import radians, cos, sin, sqrt, remainder, tau
 from typing import Callable
 
+import numpy as np
 import yaml
 
 from game.exceptions import ConfigError
+from game.raycast import MeasurementMixin
+from game.scanbuffer import ScanBuffer
 from game.trainsystem import TrainSystem
 
 
-class SightingSystem(TrainSystem):
+class SightingSystem(MeasurementMixin, TrainSystem):
     """
     Базовый класс для всех визирных подcистем:
     Каждая подсистема должна:
      - получать информацию о местоположении и ориентации борта (`update_navigation`),
      - получать данные (`receive`),
      - производить обработку данных на текущем такте (`step`),
+       такт можно разбить на подготовку лучей (`prepare`) и обработку замеров (`finish`),
      - посылать данные (`send`).
      - загружать свою конфигурацию из словаря (`_unpack_config`) или файла (`_load_config`)
     """
@@ -47,6 +51,9 @@ class SightingSystem(TrainSystem):
         self.query_data = {}
         self.query = {}
 
+        # номер текущего такта
+        self.tick = -1
+
         if isinstance(config, dict):
             self._unpack_config(config)
         else:
@@ -74,6 +81,73 @@ class SightingSystem(TrainSystem):
         self.ship_y = y
         self.ship_alpha = alpha
 
+    def update_pose(self):
+        """
+        Начало такта: обновление собственных координат и угла в нск, отработка команды на поворот.
+        """
+        self.tick += 1
+
+        # обновляем собственные координаты в нск
+        self.x = (
+            self.ship_x
+            + self.shift_x * cos(self.ship_alpha)
+            - self.shift_y * sin(self.ship_alpha)
+        )
+        self.y = (
+            self.ship_y
+            + self.shift_x * sin(self.ship_alpha)
+            + self.shift_y * cos(self.ship_alpha)
+        )
+
+        # обновляем собственный угол в нск:
+        # угол поврота борта + установочный угол + угол поворота относительно собственной оси
+        self.alpha = self.ssk_alpha + self.shift_alpha + self.ship_alpha
+
+        # команда не поворот лазера относительно строительной оси - приходит угол в абсолютной системе координат
+        # нам дали команду поменять курс на новый, угол курса - self.query['turn]:
+        if "turn" in self.query:
+            restriction = None
+
+            self.ssk_alpha = remainder(
+                self.query["turn"] - self.shift_alpha - self.ship_alpha, tau
+            )
+
+            if self.ssk_alpha > self.cone_opening_angle_left:
+                self.ssk_alpha = self.cone_opening_angle_left
+                restriction = 1
+            elif self.ssk_alpha < self.cone_opening_angle_right:
+                self.ssk_alpha = self.cone_opening_angle_right
+                restriction = -1
+
+            self.alpha = remainder(
+                self.ship_alpha + self.shift_alpha + self.ssk_alpha, tau
+            )
+
+            self.query_data["alpha"] = {}
+            self.query_data["alpha"]["value"] = self.alpha
+            self.query_data["alpha"]["restriction"] = restriction
+
+    def prepare(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Обновление собственного положения и подготовка лучей текущего такта.
+
+        :return: Начала и концы лучей, массивы формы (n, 2).
+        """
+        raise NotImplementedError
+
+    def finish(self, points: np.ndarray, distances: np.ndarray, hits: np.ndarray):
+        """
+        Обработка замеров по лучам, подготовленным в `prepare`.
+
+        :param points: Точки касания (n, 2);
+        :param distances: Дальности (n,);
+        :param hits: Признаки касания (n,).
+        """
+        raise NotImplementedError
+
+    def step(self):
+        self.finish(*self.measure(*self.prepare()))
+
     def send(self):
         return self.query_data
 
@@ -121,6 +195,9 @@ class Laser(SightingSystem):
         # есть точка или нет
         self.measurement = False
 
+        # замеры по столбцам, переписываются на каждом такте
+        self.scan = ScanBuffer(1)
+
     def _unpack_config(self, data: dict):
         self.config = data.copy()
 
@@ -150,83 +227,50 @@ class Laser(SightingSystem):
         self.cone_opening_angle_right = -radians(self.config["cone_opening_angle"])
         self.shift_alpha = radians(self.config["zero"])
 
-    def step(self):
-        # обновляем собственные координаты в нск
-        self.x = (
-            self.ship_x
-            + self.shift_x * cos(self.ship_alpha)
-            - self.shift_y * sin(self.ship_alpha)
-        )
-        self.y = (
-            self.ship_y
-            + self.shift_x * sin(self.ship_alpha)
-            + self.shift_y * cos(self.ship_alpha)
-        )
+    def prepare(self) -> tuple[np.ndarray, np.ndarray]:
+        self.update_pose()
 
-        # обновляем собственный угол в нск:
-        # угол поврота борта + установочный угол + угол поворота относительно собственной оси
-        self.alpha = self.ssk_alpha + self.shift_alpha + self.ship_alpha
-
-        # команда не поворот лазера относительно строительной оси - приходит угол в абсолютной системе координат
-        # нам дали команду поменять курс на новый, угол курса - self.query['turn]:
-        if "turn" in self.query:
-            restriction = None
-
-            self.ssk_alpha = remainder(
-                self.query["turn"] - self.shift_alpha - self.ship_alpha, tau
-            )
-
-            if self.ssk_alpha > self.cone_opening_angle_left:
-                self.ssk_alpha = self.cone_opening_angle_left
-                restriction = 1
-            elif self.ssk_alpha < self.cone_opening_angle_right:
-                self.ssk_alpha = self.cone_opening_angle_right
-                restriction = -1
+        if not self.query.get("distance", False):
+            return np.zeros((0, 2)), np.zeros((0, 2))
 
-            self.alpha = remainder(
-                self.ship_alpha + self.shift_alpha + self.ssk_alpha, tau
-            )
+        self.point_x = self.x + self.max_range * cos(self.alpha)
+        self.point_y = self.y + self.max_range * sin(self.alpha)
 
-            self.query_data["alpha"] = {}
-            self.query_data["alpha"]["value"] = self.alpha
-            self.query_data["alpha"]["restriction"] = restriction
+        return np.array([[self.x, self.y]]), np.array([[self.point_x, self.point_y]])
 
-        if self.query.get("distance", False):
-            self.point_x = self.x + self.max_range * cos(self.alpha)
-            self.point_y = self.y + self.max_range * sin(self.alpha)
+    def finish(self, points: np.ndarray, distances: np.ndarray, hits: np.ndarray):
+        if not self.query.get("distance", False):
+            return
 
-            result = self.method(
-                (self.x, self.y), (self.point_x, self.point_y), **self.method_kwargs
-            )
+        if hits[0]:
+            self.point_x, self.point_y = points[0].tolist()
+            distance = float(distances[0])
+            self.measurement = True
+        else:
+            distance = self.max_range
+            self.measurement = False
+
+        self.point_x_ssk = distance * cos(self.ssk_alpha)
+        self.point_y_ssk = distance * sin(self.ssk_alpha)
+
+        self.scan.write(
+            self.point_x,
+            self.point_y,
+            self.point_x_ssk,
+            self.point_y_ssk,
+            distance,
+            self.measurement,
+            stamp=self.tick,
+            origin=(self.x, self.y),
+        )
 
-            if result:
-                self.point_x, self.point_y = result.point
-                distance = sqrt(
-                    (self.x - self.point_x) ** 2 + (self.y - self.point_y) ** 2
-                )
-                self.measurement = True
-            else:
-                distance = self.max_range
-                self.measurement = False
-
-            self.point_x_ssk = distance * cos(self.ssk_alpha)
-            self.point_y_ssk = distance * sin(self.ssk_alpha)
-
-            query_data = {
-                "x": self.point_x,
-                "y": self.point_y,
-                "measurement": self.measurement,
-                "ssk_x": self.point_x_ssk,
-                "ssk_y": self.point_y_ssk,
-                "value": distance,
-            }
-
-            self.query_data["distance"] = [
-                query_data,
-            ]
+        self.query_data["distance"] = self.scan
 
 
 class Locator(SightingSystem):
+    # раздел файла конфигурации с настройками подсистемы
+    config_section = "locator"
+
     def __init__(self, name: str, config: str | dict):
         self.required_fields = {
             "min_range",
@@ -249,16 +293,61 @@ class Locator(SightingSystem):
 
         self.ssk_alpha = 0.0
 
+        # замеры по столбцам, переписываются на каждом такте
+        self.scan = ScanBuffer(self.ray_count)
+
         # точка замера лазером в нск
-        self.point_x = [None] * self.ray_count
-        self.point_y = [None] * self.ray_count
+        self.point_x = self.scan.x
+        self.point_y = self.scan.y
 
         # точка замера лазером в сск
-        self.point_x_ssk = [None] * self.ray_count
-        self.point_y_ssk = [None] * self.ray_count
+        self.point_x_ssk = self.scan.ssk_x
+        self.point_y_ssk = self.scan.ssk_y
 
         # есть точка или нет
-        self.measurement = [False] * self.ray_count
+        self.measurement = self.scan.measurement
+
+        # память замеров для поворотного сканирования (`enable_sweep`)
+        self.sweep = None
+
+        # расписание замера лучей по тактам (`set_schedule`)
+        self.schedule = None
+
+        # число лучей, реально замеренных на последнем такте
+        self.rays_cast = 0
+
+        # номера лучей, замеряемых на текущем такте
+        self._index = None
+
+    def set_schedule(self, schedule: "ScanSchedule | None"):
+        """
+        Расписание замера: на каждом такте замеряется только часть лучей, остальные
+        лучи буфера `scan` хранят замеры прошлых тактов (см. `ScanBuffer.stamps`).
+
+        :param schedule: Расписание или None - все лучи на каждом такте.
+        """
+        if schedule is not None and schedule.ray_count != self.ray_count:
+            raise ValueError(
+                f"schedule for {schedule.ray_count} rays, locator has {self.ray_count}"
+            )
+        self.schedule = schedule
+
+    def enable_sweep(
+        self, position_tolerance: float = 0.5, angle_tolerance: float = radians(0.1)
+    ) -> "SweepMemory":
+        """
+        Включение поворотного сканирования: лучи, чьи начало и направление в нск
+        не изменились с точностью до допусков, берутся из прошлых тактов,
+        замеряются только новые направления.
+
+        :param position_tolerance: Допуск на смещение начала лучей;
+        :param angle_tolerance: Допуск на направление луча, радианы.
+        """
+        self.sweep = SweepMemory(position_tolerance, angle_tolerance)
+        return self.sweep
+
+    def disable_sweep(self):
+        self.sweep = None
 
     def _unpack_config(self, data: dict):
         self.config = data.copy()
@@ -276,7 +365,7 @@ class Locator(SightingSystem):
 
     def _load_config(self, filename: str):
         with open(filename, "r") as f:
-            self.config = yaml.safe_load(f)["locator"]
+            self.config = yaml.safe_load(f)[self.config_section]
 
         if self.required_fields - self.config.keys():
             raise KeyError(
@@ -289,86 +378,331 @@ class Locator(SightingSystem):
         self.shift_alpha = radians(self.config["zero"])
         self.ray_step = radians(self.config["ray_step"])
 
-    def step(self):
-        # обновляем собственные координаты в нск
-        self.x = (
-            self.ship_x
-            + self.shift_x * cos(self.ship_alpha)
-            - self.shift_y * sin(self.ship_alpha)
+    def rays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Все лучи текущего такта.
+
+        :return: Направления лучей в нск, начала и концы лучей.
+        """
+        begin_angle = self.ssk_alpha - (self.ray_count - 1) * self.ray_step / 2
+
+        angles = (
+            self.ship_alpha
+            + self.shift_alpha
+            + begin_angle
+            + np.arange(self.ray_count) * self.ray_step
         )
-        self.y = (
-            self.ship_y
-            + self.shift_x * sin(self.ship_alpha)
-            + self.shift_y * cos(self.ship_alpha)
+
+        starts = np.empty((self.ray_count, 2))
+        starts[:, 0] = self.x
+        starts[:, 1] = self.y
+
+        ends = np.stack(
+            [
+                self.x + self.max_range * np.cos(angles),
+                self.y + self.max_range * np.sin(angles),
+            ],
+            axis=1,
         )
 
-        # обновляем собственный угол в нск:
-        # угол поврота борта + установочный угол + угол поворота относительно собственной оси
-        self.alpha = self.ssk_alpha + self.shift_alpha + self.ship_alpha
+        return angles, starts, ends
 
-        # команда не поворот лазера относительно строительной оси - приходит угол в абсолютной системе координат
-        # нам дали команду поменять курс на новый, угол курса - self.query['turn]:
-        if "turn" in self.query:
-            restriction = None
+    def ssk_points(
+        self, distances: np.ndarray, index: np.ndarray | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Координаты точек замера в сск.
 
-            self.ssk_alpha = remainder(
-                self.query["turn"] - self.shift_alpha - self.ship_alpha, tau
-            )
+        :param distances: Дальности по замеренным лучам;
+        :param index: Номера замеренных лучей или None - все лучи.
+        """
+        return distances * cos(self.ssk_alpha), distances * sin(self.ssk_alpha)
 
-            if self.ssk_alpha > self.cone_opening_angle_left:
-                self.ssk_alpha = self.cone_opening_angle_left
-                restriction = 1
-            elif self.ssk_alpha < self.cone_opening_angle_right:
-                self.ssk_alpha = self.cone_opening_angle_right
-                restriction = -1
+    def prepare(self) -> tuple[np.ndarray, np.ndarray]:
+        self.update_pose()
 
-            self.alpha = remainder(
-                self.ship_alpha + self.shift_alpha + self.ssk_alpha, tau
+        if not self.query.get("distance", False):
+            return np.zeros((0, 2)), np.zeros((0, 2))
+
+        angles, starts, ends = self.rays()
+
+        self._index = None
+        if self.schedule is not None:
+            self._index = self.schedule.next()
+            angles, starts, ends = (
+                angles[self._index],
+                starts[self._index],
+                ends[self._index],
             )
 
-            self.query_data["alpha"] = {}
-            self.query_data["alpha"]["value"] = self.alpha
-            self.query_data["alpha"]["restriction"] = restriction
+        if self.sweep is not None:
+            return self.sweep.plan(self.x, self.y, angles, starts, ends)
+
+        return starts, ends
+
+    def finish(self, points: np.ndarray, distances: np.ndarray, hits: np.ndarray):
+        self.rays_cast = len(points)
+
+        if not self.query.get("distance", False):
+            return
+
+        if self.sweep is not None:
+            points, distances, hits = self.sweep.merge(points, hits)
+
+        distances = np.where(hits, distances, self.max_range)
+        ssk_x, ssk_y = self.ssk_points(distances, self._index)
+
+        self.scan.write(
+            points[:, 0],
+            points[:, 1],
+            ssk_x,
+            ssk_y,
+            distances,
+            hits,
+            stamp=self.tick,
+            index=self._index,
+            origin=(self.x, self.y),
+        )
 
-        if self.query.get("distance", False):
-            self.query_data["distance"] = []
-
-            begin_angle = self.ssk_alpha - (self.ray_count - 1) * self.ray_step / 2
-
-            for ray_num in range(self.ray_count):
-                angle = (
-                    self.ship_alpha
-                    + self.shift_alpha
-                    + begin_angle
-                    + ray_num * self.ray_step
-                )
-                distance = self.max_range
-
-                point_x = self.x + distance * cos(angle)
-                point_y = self.y + distance * sin(angle)
-
-                result = self.method(
-                    (self.x, self.y), (point_x, point_y), **self.method_kwargs
-                )
-
-                if result:
-                    point_x, point_y = result.point
-                    distance = sqrt((self.x - point_x) ** 2 + (self.y - point_y) ** 2)
-                    self.measurement[ray_num] = True
-                else:
-                    distance = self.max_range
-                    self.measurement[ray_num] = False
-
-                self.point_x_ssk[ray_num] = distance * cos(self.ssk_alpha)
-                self.point_y_ssk[ray_num] = distance * sin(self.ssk_alpha)
-
-                query_data = {
-                    "x": point_x,
-                    "y": point_y,
-                    "measurement": self.measurement[ray_num],
-                    "ssk_x": self.point_x_ssk[ray_num],
-                    "ssk_y": self.point_y_ssk[ray_num],
-                    "value": distance,
-                }
-
-                self.query_data["distance"].append(query_data)
+        self.query_data["distance"] = self.scan
+
+
+class Lidar(Locator):
+    """
+    Подсистема 'Лидар' - локатор высокого разрешения на тысячи лучей.
+
+    Таблица направлений лучей относительно оси лидара рассчитывается один раз
+    при создании, на каждом такте она поворачивается на текущий угол одним
+    матричным умножением в заранее выделенные массивы, замеры выполняются пакетом.
+    В отличие от локатора, координаты точек в сск считаются по направлению каждого луча.
+    """
+
+    config_section = "lidar"
+
+    def __init__(self, name: str, config: str | dict):
+        super().__init__(name, config)
+
+        # смещения лучей относительно оси лидара
+        self.offsets = (
+            np.arange(self.ray_count) - (self.ray_count - 1) / 2
+        ) * self.ray_step
+
+        # единичные направления лучей и они же, растянутые на дальность
+        self._unit = np.column_stack([np.cos(self.offsets), np.sin(self.offsets)])
+        self._table = self._unit * self.max_range
+
+        self._rotation = np.empty((2, 2))
+        self._starts = np.empty((self.ray_count, 2))
+        self._ends = np.empty((self.ray_count, 2))
+        self._ssk = np.empty((self.ray_count, 2))
+
+    @staticmethod
+    def _rotate(table: np.ndarray, angle: float, rotation: np.ndarray, out: np.ndarray):
+        """
+        Поворот таблицы направлений (n, 2) на угол `angle` с записью в `out`.
+        """
+        c, s = cos(angle), sin(angle)
+        rotation[0, 0], rotation[0, 1] = c, s
+        rotation[1, 0], rotation[1, 1] = -s, c
+        return np.matmul(table, rotation, out=out)
+
+    def rays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        self._starts[:, 0] = self.x
+        self._starts[:, 1] = self.y
+
+        self._rotate(self._table, self.alpha, self._rotation, self._ends)
+        self._ends += self._starts
+
+        return self.alpha + self.offsets, self._starts, self._ends
+
+    def ssk_points(
+        self, distances: np.ndarray, index: np.ndarray | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        ssk = self._rotate(self._unit, self.ssk_alpha, self._rotation, self._ssk)
+        if index is not None:
+            ssk = ssk[index]
+        return distances * ssk[:, 0], distances * ssk[:, 1]
+
+
+class ScanSchedule:
+    """
+    Расписание замера лучей локатора по тактам.
+
+    Расписание - набор фаз, каждая фаза - номера лучей, замеряемых за один такт.
+    Фазы проходятся по кругу, полный скан собирается за `period` тактов. Так стоимость
+    замера распределяется по тактам равномерно, без всплесков.
+    """
+
+    def __init__(self, phases: list[np.ndarray], max_rays_per_tick: int | None = None):
+        """
+        :param phases: Номера лучей по тактам, вместе фазы должны покрывать все лучи;
+        :param max_rays_per_tick: Ограничение на число лучей за такт,
+            фазы большего размера делятся на несколько тактов.
+        """
+        phases = [np.asarray(phase, dtype=np.int64) for phase in phases]
+
+        if max_rays_per_tick is not None:
+            max_rays_per_tick = max(1, int(max_rays_per_tick))
+            phases = [
+                phase[i : i + max_rays_per_tick]
+                for phase in phases
+                for i in range(0, len(phase), max_rays_per_tick)
+            ]
+
+        self.phases = [phase for phase in phases if len(phase)]
+        self.ray_count = len(np.unique(np.concatenate(self.phases)))
+        self.max_rays_per_tick = max(len(phase) for phase in self.phases)
+
+        self._position = 0
+
+    @property
+    def period(self) -> int:
+        """
+        Число тактов на полный скан.
+        """
+        return len(self.phases)
+
+    @classmethod
+    def budget(cls, ray_count: int, max_rays_per_tick: int) -> "ScanSchedule":
+        """
+        Лучи по порядку, не более `max_rays_per_tick` за такт.
+        """
+        return cls([np.arange(ray_count)], max_rays_per_tick)
+
+    @classmethod
+    def interleaved(
+        cls, ray_count: int, k: int, max_rays_per_tick: int | None = None
+    ) -> "ScanSchedule":
+        """
+        Чередование: на такте замеряется каждый k-й луч со сдвигом на один луч от такта к такту.
+        """
+        phases = [np.arange(shift, ray_count, k) for shift in range(k)]
+        return cls(phases, max_rays_per_tick)
+
+    @classmethod
+    def progressive(cls, ray_count: int, max_rays_per_tick: int) -> "ScanSchedule":
+        """
+        От грубого к точному: сначала крайние лучи и лучи с крупным шагом,
+        затем промежуточные, шаг уменьшается вдвое на каждом уровне.
+        """
+        stride = 1
+        while stride * 2 < ray_count:
+            stride *= 2
+
+        order = [0, ray_count - 1] if ray_count > 1 else [0]
+        seen = np.zeros(ray_count, dtype=bool)
+        seen[order] = True
+
+        while stride >= 1:
+            level = np.arange(0, ray_count, stride)
+            level = level[~seen[level]]
+            seen[level] = True
+            order.extend(level.tolist())
+            stride //= 2
+
+        return cls([np.array(order)], max_rays_per_tick)
+
+    def reset(self):
+        self._position = 0
+
+    def next(self) -> np.ndarray:
+        """
+        Номера лучей для замера на очередном такте.
+        """
+        phase = self.phases[self._position]
+        self._position = (self._position + 1) % len(self.phases)
+        return phase
+
+
+class SweepMemory:
+    """
+    Память замеров локатора по направлениям в нск.
+
+    Замеры хранятся, пока начало лучей не сместится дальше `position_tolerance`
+    от точки, в которой память была заведена.
+    """
+
+    def __init__(
+        self, position_tolerance: float = 0.5, angle_tolerance: float = radians(0.1)
+    ):
+        self.position_tolerance = position_tolerance
+        self.angle_tolerance = angle_tolerance
+
+        self.origin = None
+        self.memory = {}
+
+        self.rays_cast = 0
+        self.rays_reused = 0
+
+        self._plan = None
+
+    def plan(
+        self,
+        x: float,
+        y: float,
+        angles: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Отбор лучей, которые нужно замерить на этом такте.
+
+        :param x: Абсцисса начала лучей;
+        :param y: Ордината начала лучей;
+        :param angles: Направления лучей в нск;
+        :return: Начала и концы лучей для замера.
+        """
+        if (
+            self.origin is None
+            or sqrt((x - self.origin[0]) ** 2 + (y - self.origin[1]) ** 2)
+            > self.position_tolerance
+        ):
+            self.origin = (x, y)
+            self.memory.clear()
+
+        sectors = round(tau / self.angle_tolerance)
+        keys = (
+            np.round(np.mod(angles, tau) / self.angle_tolerance).astype(np.int64)
+            % sectors
+        ).tolist()
+        reuse = np.array([key in self.memory for key in keys], dtype=bool)
+
+        self._plan = starts, ends, keys, reuse
+        return starts[~reuse], ends[~reuse]
+
+    def merge(
+        self, points: np.ndarray, hits: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Сборка полного набора замеров из замеренных лучей и памяти.
+
+        :param points: Точки касания замеренных лучей;
+        :param hits: Признаки касания замеренных лучей.
+        :return: Точки касания, дальности и признаки касания по всем лучам.
+        """
+        starts, ends, keys, reuse = self._plan
+
+        all_points = ends.copy()
+        all_hits = np.zeros(len(ends), dtype=bool)
+
+        cast = np.flatnonzero(~reuse)
+        all_points[cast] = np.where(hits[:, None], points, ends[cast])
+        all_hits[cast] = hits
+
+        for i, point, hit in zip(cast.tolist(), points.tolist(), hits.tolist()):
+            self.memory[keys[i]] = tuple(point) if hit else None
+
+        for i in np.flatnonzero(reuse).tolist():
+            point = self.memory[keys[i]]
+            if point is not None:
+                all_points[i] = point
+                all_hits[i] = True
+
+        self.rays_cast = len(cast)
+        self.rays_reused = len(keys) - len(cast)
+
+        distances = np.sqrt(
+            (starts[:, 0] - all_points[:, 0]) ** 2
+            + (starts[:, 1] - all_points[:, 1]) ** 2
+        )
+        return all_points, distances, all_hits
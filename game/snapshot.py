@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+
+MAGIC = b"TRAINMAP"
+VERSION = 1
+ALIGNMENT = 64
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_arrays(path: str, arrays: dict[str, np.ndarray], meta: dict | None = None):
+    """
+    Запись массивов в один файл, который можно отобразить в память.
+
+    Формат: MAGIC, версия формата и длина заголовка (uint32 little-endian),
+    заголовок JSON (`meta` и для каждого массива - тип, форма и смещение),
+    затем массивы подряд без сжатия, каждый с выравниванием на ALIGNMENT байт.
+
+    :param path: Путь к файлу;
+    :param arrays: Массивы по именам;
+    :param meta: Дополнительные сведения, должны сериализоваться в JSON.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        table[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps(
+        {"meta": meta or {}, "arrays": table}, separators=(",", ":")
+    ).encode()
+    start = _aligned(len(MAGIC) + 8 + len(header))
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(np.array([VERSION, len(header)], dtype="<u4").tobytes())
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(start + table[name]["offset"])
+            file.write(array.tobytes())
+        file.truncate(start + offset)
+
+
+def load_arrays(path: str, mmap: bool = True) -> tuple[dict, dict[str, np.ndarray]]:
+    """
+    Чтение файла, записанного `save_arrays`.
+
+    :param path: Путь к файлу;
+    :param mmap: Отобразить массивы в память (только чтение) вместо чтения в память;
+    :return: Дополнительные сведения и массивы по именам.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a map snapshot")
+
+        version, length = np.frombuffer(file.read(8), dtype="<u4").tolist()
+        if version != VERSION:
+            raise ValueError(
+                f"unsupported snapshot version {version}, expected {VERSION}"
+            )
+
+        header = json.loads(file.read(length))
+        start = _aligned(len(MAGIC) + 8 + length)
+
+        arrays = {}
+        for name, item in header["arrays"].items():
+            dtype, shape = np.dtype(item["dtype"]), tuple(item["shape"])
+            offset = start + item["offset"]
+
+            if mmap and np.prod(shape, dtype=int):
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode="r", offset=offset, shape=shape
+                )
+            else:
+                file.seek(offset)
+                count = int(np.prod(shape, dtype=int))
+                arrays[name] = np.fromfile(file, dtype=dtype, count=count).reshape(
+                    shape
+                )
+
+    return header["meta"], arrays
@@ -0,0 +1,289 @@
+import numpy as np
+
+from game.raycast import MapRaycaster, circle_params, segment_params
+
+
+class UniformGrid(MapRaycaster):
+    """
+    Равномерная сетка над статической геометрией карты.
+
+    Каждая ячейка хранит номера фигур, которые ее касаются (отрезки - `0 .. m-1`,
+    окружности - `m .. m+k-1`), в сжатом виде: `cell_items[cell_start[c]:cell_start[c + 1]]`.
+    Лучи проходят сетку DDA-обходом, и пересечения проверяются только с фигурами
+    из пройденных ячеек - стоимость запроса зависит от препятствий рядом с лучом,
+    а не от размера карты.
+    """
+
+    def __init__(self, geometry, cell_size: float = 50.0, padding: float = 1.0):
+        """
+        :param geometry: Карта (`game.map.Map`) или ее геометрия (`MapGeometry`);
+        :param cell_size: Размер ячейки;
+        :param padding: Запас, на который расширяются окружности при раскладке по ячейкам,
+            должен быть не меньше толщины луча в запросах.
+        """
+        super().__init__(geometry)
+
+        self.cell_size = float(cell_size)
+        self.padding = float(padding)
+
+        segments = self.geometry.segments
+        circles = self.geometry.circles
+        self.segment_count = len(segments)
+
+        left, bottom, right, top = self.geometry.bounds
+        self.origin = np.array([left - self.padding, bottom - self.padding])
+        self.shape = (
+            int((right - left + 2 * self.padding) // self.cell_size) + 1,
+            int((top - bottom + 2 * self.padding) // self.cell_size) + 1,
+        )
+
+        # ограничивающие прямоугольники фигур (left, bottom, right, top)
+        self.item_bb = np.concatenate(
+            [
+                np.stack(
+                    [
+                        np.minimum(segments[:, 0], segments[:, 2]),
+                        np.minimum(segments[:, 1], segments[:, 3]),
+                        np.maximum(segments[:, 0], segments[:, 2]),
+                        np.maximum(segments[:, 1], segments[:, 3]),
+                    ],
+                    axis=1,
+                ),
+                np.stack(
+                    [
+                        circles[:, 0] - circles[:, 2],
+                        circles[:, 1] - circles[:, 2],
+                        circles[:, 0] + circles[:, 2],
+                        circles[:, 1] + circles[:, 2],
+                    ],
+                    axis=1,
+                ),
+            ]
+        )
+
+        segment_ids, segment_cells = self.traverse(segments[:, :2], segments[:, 2:])
+
+        circle_ids, circle_cells = self._cells_in_boxes(
+            self.item_bb[self.segment_count :] + [-padding, -padding, padding, padding]
+        )
+
+        items = np.concatenate([segment_ids, circle_ids + self.segment_count])
+        cells = np.concatenate([segment_cells, circle_cells])
+
+        order = np.argsort(cells, kind="stable")
+        self.cell_items = items[order]
+        self.cell_start = np.zeros(self.shape[0] * self.shape[1] + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(cells, minlength=self.shape[0] * self.shape[1]),
+            out=self.cell_start[1:],
+        )
+
+    def _cell_coordinates(self, points: np.ndarray) -> np.ndarray:
+        return (points - self.origin) / self.cell_size
+
+    def _cells_in_boxes(self, boxes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Все ячейки, которых касаются прямоугольники (left, bottom, right, top).
+
+        :return: Номера прямоугольников и номера ячеек.
+        """
+        low = np.floor(self._cell_coordinates(boxes[:, :2])).astype(np.int64)
+        high = np.floor(self._cell_coordinates(boxes[:, 2:])).astype(np.int64)
+        low = np.clip(low, 0, np.array(self.shape) - 1)
+        high = np.clip(high, 0, np.array(self.shape) - 1)
+
+        width = high[:, 0] - low[:, 0] + 1
+        height = high[:, 1] - low[:, 1] + 1
+        counts = width * height
+
+        box_ids = np.repeat(np.arange(len(boxes)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        ix = low[box_ids, 0] + local % width[box_ids]
+        iy = low[box_ids, 1] + local // width[box_ids]
+
+        return box_ids, iy * self.shape[0] + ix
+
+    def traverse(
+        self, starts: np.ndarray, ends: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Векторный DDA-обход сетки сразу для всех отрезков (см. `traverse_grid`).
+        """
+        return traverse_grid(starts, ends, self.origin, self.cell_size, self.shape)
+
+    def _items(self, owners: np.ndarray, cells: np.ndarray):
+        """
+        Уникальные пары (владелец, фигура) для ячеек.
+        """
+        counts = self.cell_start[cells + 1] - self.cell_start[cells]
+        owner_ids = np.repeat(owners, counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        items = self.cell_items[np.repeat(self.cell_start[cells], counts) + local]
+
+        total = len(self.item_bb)
+        keys = np.unique(owner_ids * total + items)
+        return keys // total, keys % total
+
+    def cast(
+        self, starts: np.ndarray, ends: np.ndarray, radius: float = 0.0
+    ) -> np.ndarray:
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+        t = np.full(len(starts), np.inf)
+        ray_ids, items = self._items(*self.traverse(starts, ends))
+
+        is_segment = items < self.segment_count
+        px, py = starts[ray_ids, 0], starts[ray_ids, 1]
+        rx, ry = ends[ray_ids, 0] - px, ends[ray_ids, 1] - py
+
+        np.minimum.at(
+            t,
+            ray_ids[is_segment],
+            segment_params(
+                px[is_segment],
+                py[is_segment],
+                rx[is_segment],
+                ry[is_segment],
+                self.geometry.segments[items[is_segment]],
+                radius,
+            ),
+        )
+
+        is_circle = ~is_segment
+        np.minimum.at(
+            t,
+            ray_ids[is_circle],
+            circle_params(
+                px[is_circle],
+                py[is_circle],
+                rx[is_circle],
+                ry[is_circle],
+                self.geometry.circles[items[is_circle] - self.segment_count],
+                radius,
+            ),
+        )
+
+        return t
+
+    def _split(self, items: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        is_segment = items < self.segment_count
+        return items[is_segment], items[~is_segment] - self.segment_count
+
+    def query_aabb(
+        self, left: float, bottom: float, right: float, top: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Фигуры, чьи ограничивающие прямоугольники пересекаются с заданным.
+
+        :return: Номера отрезков и номера окружностей в `MapGeometry`.
+        """
+        box = np.array([[left, bottom, right, top]], dtype=float)
+        _, items = self._items(*self._cells_in_boxes(box))
+
+        bb = self.item_bb[items]
+        overlap = (
+            (bb[:, 0] <= right)
+            & (bb[:, 2] >= left)
+            & (bb[:, 1] <= top)
+            & (bb[:, 3] >= bottom)
+        )
+        return self._split(items[overlap])
+
+    def query_radius(
+        self, x: float, y: float, radius: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Фигуры, расстояние до которых от точки (x, y) не больше `radius`.
+
+        :return: Номера отрезков и номера окружностей в `MapGeometry`.
+        """
+        segment_ids, circle_ids = self.query_aabb(
+            x - radius, y - radius, x + radius, y + radius
+        )
+
+        segments = self.geometry.segments[segment_ids]
+        qx, qy = segments[:, 0], segments[:, 1]
+        sx, sy = segments[:, 2] - qx, segments[:, 3] - qy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = np.clip(((x - qx) * sx + (y - qy) * sy) / (sx**2 + sy**2), 0.0, 1.0)
+        u = np.nan_to_num(u)
+        segment_distance = np.hypot(qx + u * sx - x, qy + u * sy - y)
+
+        circles = self.geometry.circles[circle_ids]
+        circle_distance = np.hypot(circles[:, 0] - x, circles[:, 1] - y) - circles[:, 2]
+
+        return (
+            segment_ids[segment_distance <= radius],
+            circle_ids[circle_distance <= radius],
+        )
+
+
+def traverse_grid(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    origin: np.ndarray,
+    cell_size: float,
+    shape: tuple[int, int],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Векторный DDA-обход равномерной сетки сразу для всех отрезков.
+    Ячейка (ix, iy) имеет номер `iy * shape[0] + ix`.
+
+    :param starts: Начала отрезков (n, 2);
+    :param ends: Концы отрезков (n, 2);
+    :param origin: Левый нижний угол сетки;
+    :param cell_size: Размер ячейки;
+    :param shape: Число ячеек по x и по y.
+    :return: Номера отрезков и номера пройденных ими ячеек внутри сетки,
+        для каждого отрезка - в порядке обхода от начала к концу.
+    """
+    g0 = (np.asarray(starts, dtype=float).reshape(-1, 2) - origin) / cell_size
+    g1 = (np.asarray(ends, dtype=float).reshape(-1, 2) - origin) / cell_size
+    i0 = np.floor(g0).astype(np.int64)
+    i1 = np.floor(g1).astype(np.int64)
+
+    ray_ids = [np.arange(len(g0))]
+    ts = [np.zeros(len(g0))]
+    steps = [np.zeros((len(g0), 2), dtype=np.int64)]
+
+    # пересечения границ ячеек по каждой оси
+    for axis in range(2):
+        direction = np.sign(i1[:, axis] - i0[:, axis])
+        counts = np.abs(i1[:, axis] - i0[:, axis])
+
+        ids = np.repeat(np.arange(len(g0)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        boundary = np.where(
+            direction[ids] > 0, i0[ids, axis] + 1 + k, i0[ids, axis] - k
+        )
+
+        step = np.zeros((len(ids), 2), dtype=np.int64)
+        step[:, axis] = direction[ids]
+
+        ray_ids.append(ids)
+        ts.append((boundary - g0[ids, axis]) / (g1[ids, axis] - g0[ids, axis]))
+        steps.append(step)
+
+    ray_ids = np.concatenate(ray_ids)
+    ts = np.concatenate(ts)
+    steps = np.concatenate(steps)
+
+    order = np.lexsort((ts, ray_ids))
+    ray_ids = ray_ids[order]
+    steps = steps[order]
+
+    # накопленный сдвиг внутри каждого отрезка
+    cumulative = np.cumsum(steps, axis=0)
+    first = np.searchsorted(ray_ids, ray_ids)
+    cells = i0[ray_ids] + cumulative - cumulative[first] + steps[first]
+
+    inside = (
+        (cells[:, 0] >= 0)
+        & (cells[:, 0] < shape[0])
+        & (cells[:, 1] >= 0)
+        & (cells[:, 1] < shape[1])
+    )
+
+    return ray_ids[inside], cells[inside, 1] * shape[0] + cells[inside, 0]
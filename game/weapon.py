@@ -1,6 +1,8 @@
 from math import atan2, radians
 from typing import Callable
 
+import numpy as np
+
 from game.mathfunction import distanse2D
 from game.navigation import NavigationMixin
 from game.trainsystem import TrainSystem
@@ -41,13 +43,19 @@ class Cannon(BaseWeapon):
     def receive(self, query: dict):
         pass
 
-    def step(self):
+    def prepare(self) -> tuple[np.ndarray, np.ndarray]:
         self.lifetime += 1
-        self.x, self.y, self.alpha, self.v, self.collision = self.step_restriction()
+        return self.restriction_ray()
+
+    def finish(self, points: np.ndarray, distances: np.ndarray, hits: np.ndarray):
+        self.x, self.y, self.alpha, self.v, self.collision = self.apply_restriction(bool(hits[0]))
 
         if self.collision or self.lifetime > self.max_lifetime or not self.alive:
             self.alive = False
 
+    def step(self):
+        self.finish(*self.measure(*self.prepare()))
+
     def send(self) -> dict:
         """
         Посылка данных
@@ -76,12 +84,15 @@ class Rocket(BaseWeapon):
             self.target_x = query['target']['x']
             self.target_y = query['target']['y']
 
-    def step(self):
+    def prepare(self) -> tuple[np.ndarray, np.ndarray]:
         self.lifetime += 1
 
         self._new_alpha = atan2(self.target_y - self.y, self.target_x - self.x)
 
-        self.x, self.y, self.alpha, self.v, self.collision = self.step_restriction()
+        return self.restriction_ray()
+
+    def finish(self, points: np.ndarray, distances: np.ndarray, hits: np.ndarray):
+        self.x, self.y, self.alpha, self.v, self.collision = self.apply_restriction(bool(hits[0]))
 
         if (
                 self.collision or
@@ -91,6 +102,9 @@ class Rocket(BaseWeapon):
         ):
             self.alive = False
 
+    def step(self):
+        self.finish(*self.measure(*self.prepare()))
+
     def send(self) -> dict:
         """
         Посылка данных
@@ -0,0 +1,269 @@
+"""
+Наборы точек и отрезков в массивах NumPy и пакетные версии проверок фигур.
+
+Методы повторяют `geometry.primitives` (с теми же допусками), но принимают
+и возвращают массивы. Два набора сравниваются поэлементно (с обычным
+для NumPy расширением формы) или попарно при `pairwise=True` - тогда
+результат имеет форму (len(self), len(other)).
+"""
+
+import math
+
+import numpy as np
+
+from geometry import primitives
+from geometry.geometry import ANGLE_TOLERANCE, TOLERANCE
+
+
+def angle_between(alpha: np.ndarray, beta: np.ndarray) -> np.ndarray:
+    """
+    Углы между прямыми с направлениями alpha и beta (см. `primitives.angle_between`).
+    """
+    result = np.abs(alpha - beta)
+    return np.where(result - math.pi > ANGLE_TOLERANCE, result - math.pi, result)
+
+
+class PointArray:
+    """
+    Набор точек (n, 2).
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=float).reshape(-1, 2)
+
+    @classmethod
+    def from_points(cls, points) -> "PointArray":
+        return cls([(point.x, point.y) for point in points])
+
+    def to_points(self) -> list[primitives.Point]:
+        return [primitives.Point(x, y) for x, y in self.data.tolist()]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return primitives.Point(*self.data[index].tolist())
+        return PointArray(self.data[index])
+
+    def __repr__(self):
+        return f"PointArray({self.data.tolist()})"
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    def distance(self, other, pairwise: bool = False) -> np.ndarray:
+        """
+        Расстояния до точек `other` (PointArray, массив (m, 2) или точка).
+        """
+        other = as_points(other)
+        a, b = (self.data[:, None], other[None]) if pairwise else (self.data, other)
+        return np.hypot(b[..., 0] - a[..., 0], b[..., 1] - a[..., 1])
+
+    def in_circle(self, circle) -> np.ndarray:
+        """
+        Пакетная версия `Circle.__contains__`: точки в окружности или ближе
+        TOLERANCE к ней.
+        """
+        x, y = circle.center.x, circle.center.y
+        return np.hypot(self.x - x, self.y - y) < circle.radius + TOLERANCE
+
+    def in_circles(self, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """
+        Принадлежность точек окружностям (n, k).
+
+        :param centers: Центры окружностей (k, 2);
+        :param radii: Радиусы окружностей (k,).
+        """
+        centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+        distances = np.hypot(
+            self.x[:, None] - centers[None, :, 0], self.y[:, None] - centers[None, :, 1]
+        )
+        return distances < np.asarray(radii, dtype=float)[None] + TOLERANCE
+
+    def in_rectangle(self, rectangle) -> np.ndarray:
+        """
+        Пакетная версия `primitives.Rectangle.__contains__`: точки в прямоугольнике,
+        расширенном на TOLERANCE.
+        """
+        if not isinstance(rectangle, primitives.Rectangle):
+            rectangle = primitives.Rectangle.from_geometry(rectangle)
+
+        normals = np.array(rectangle._normals)
+        signed = self.data @ normals[:, :2].T - normals[:, 2]
+        return (signed >= -TOLERANCE).all(axis=1)
+
+
+class SegmentArray:
+    """
+    Набор отрезков: начала `starts` и концы `ends` (n, 2).
+
+    Как и у `primitives.Line`, производные величины (`dx`, `dy`, `length`, `angle`,
+    `offset`) вычисляются один раз при создании.
+    """
+
+    __slots__ = ("starts", "ends", "dx", "dy", "length", "angle", "offset")
+
+    def __init__(self, starts, ends):
+        self.starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        self.ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+        self.dx = self.ends[:, 0] - self.starts[:, 0]
+        self.dy = self.ends[:, 1] - self.starts[:, 1]
+        self.length = np.hypot(self.dx, self.dy)
+        self.angle = np.arctan2(self.dy, self.dx) % (2 * math.pi)
+        self.offset = (
+            self.starts[:, 0] * self.ends[:, 1] - self.ends[:, 0] * self.starts[:, 1]
+        )
+
+    @classmethod
+    def from_lines(cls, lines) -> "SegmentArray":
+        lines = list(lines)
+        return cls(
+            [(line.point0.x, line.point0.y) for line in lines],
+            [(line.point1.x, line.point1.y) for line in lines],
+        )
+
+    def to_lines(self) -> list[primitives.Line]:
+        return [
+            primitives.Line(primitives.Point(x0, y0), primitives.Point(x1, y1))
+            for (x0, y0), (x1, y1) in zip(self.starts.tolist(), self.ends.tolist())
+        ]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return primitives.Line(
+                primitives.Point(*self.starts[index].tolist()),
+                primitives.Point(*self.ends[index].tolist()),
+            )
+        return SegmentArray(self.starts[index], self.ends[index])
+
+    def __repr__(self):
+        return f"SegmentArray({self.starts.tolist()}, {self.ends.tolist()})"
+
+    def _pair(self, other: "SegmentArray", pairwise: bool, name: str):
+        first, second = getattr(self, name), getattr(other, name)
+        if pairwise:
+            return first[:, None], second[None]
+        return first, second
+
+    def angle_between_lines(self, other, pairwise: bool = False) -> np.ndarray:
+        alpha, beta = self._pair(as_segments(other), pairwise, "angle")
+        return angle_between(alpha, beta)
+
+    def parallel(self, other, pairwise: bool = False) -> np.ndarray:
+        angle = self.angle_between_lines(other, pairwise)
+        return (np.abs(angle - math.pi) <= ANGLE_TOLERANCE) | (angle <= ANGLE_TOLERANCE)
+
+    def perpendicular(self, other, pairwise: bool = False) -> np.ndarray:
+        angle = self.angle_between_lines(other, pairwise)
+        return np.abs(angle - math.pi / 2) <= ANGLE_TOLERANCE
+
+    def intersection(self, other, pairwise: bool = False) -> np.ndarray:
+        """
+        Точки пересечения прямых, для параллельных прямых - nan.
+        """
+        other = as_segments(other)
+        dx, other_dx = self._pair(other, pairwise, "dx")
+        dy, other_dy = self._pair(other, pairwise, "dy")
+        offset, other_offset = self._pair(other, pairwise, "offset")
+
+        div = dx * other_dy - other_dx * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = (other_offset * dx - offset * other_dx) / div
+            y = (other_offset * dy - offset * other_dy) / div
+
+        result = np.stack([x, y], axis=-1)
+        result[div == 0] = np.nan
+        return result
+
+    def point_distance(self, points, pairwise: bool = False) -> np.ndarray:
+        """
+        Расстояния от прямых до точек.
+        """
+        points = as_points(points)
+        dx, dy, offset, length = self.dx, self.dy, self.offset, self.length
+        if pairwise:
+            dx, dy, offset, length = (
+                dx[:, None],
+                dy[:, None],
+                offset[:, None],
+                length[:, None],
+            )
+            points = points[None]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.abs(
+                (-dy * points[..., 0] + dx * points[..., 1] + offset) / length
+            )
+
+    def distance(self, other, pairwise: bool = False) -> np.ndarray:
+        """
+        Пакетная версия `Line.distance`: расстояние до точек или до прямых
+        (ноль для пересекающихся прямых).
+        """
+        if not is_segments(other):
+            return self.point_distance(other, pairwise)
+
+        other = as_segments(other)
+        distance = self.point_distance(other.starts, pairwise)
+        crossing = ~np.isnan(self.intersection(other, pairwise)[..., 0])
+        return np.where(crossing, 0.0, distance)
+
+    def is_point_on_it(self, points, pairwise: bool = False) -> np.ndarray:
+        """
+        Пакетная версия `Line.is_point_on_it`.
+        """
+        points = as_points(points)
+        starts, dx, dy = self.starts, self.dx, self.dy
+        if pairwise:
+            starts, dx, dy = starts[:, None], dx[:, None], dy[:, None]
+            points = points[None]
+
+        cross = (points[..., 0] - starts[..., 0]) * dy - (
+            points[..., 1] - starts[..., 1]
+        ) * dx
+        return np.abs(cross) < TOLERANCE
+
+
+def as_points(points) -> np.ndarray:
+    """
+    Массив (n, 2) из PointArray, точки или массива.
+    """
+    if isinstance(points, PointArray):
+        return points.data
+    if hasattr(points, "x") and hasattr(points, "y"):
+        return np.array([[points.x, points.y]], dtype=float)
+    return np.asarray(points, dtype=float).reshape(-1, 2)
+
+
+def is_segments(value) -> bool:
+    """
+    Является ли значение отрезком или набором отрезков.
+    """
+    if isinstance(value, SegmentArray) or hasattr(value, "point0"):
+        return True
+    return (
+        isinstance(value, (list, tuple)) and bool(value) and hasattr(value[0], "point0")
+    )
+
+
+def as_segments(segments) -> SegmentArray:
+    """
+    SegmentArray из набора отрезков, одной прямой или списка прямых.
+    """
+    if isinstance(segments, SegmentArray):
+        return segments
+    if hasattr(segments, "point0"):
+        return SegmentArray.from_lines([segments])
+    return SegmentArray.from_lines(segments)
@@ -1,4 +1,7 @@
 import math
+import operator
+from typing import Callable
+
 import numpy as np
 
 TOLERANCE = 3
@@ -6,6 +9,13 @@ ANGLE_TOLERANCE = 0.2
 EPS = 1e-6
 
 
+def quantize(value: float, step: float = TOLERANCE) -> int:
+    """
+    Номер корзины значения при разбиении числовой оси на отрезки длины step.
+    """
+    return math.floor(value / step)
+
+
 class Geometry:
     def __init__(
         self,
@@ -62,7 +72,22 @@ class Point(Geometry):
         return self.distance(other) < EPS
 
     def __hash__(self):
-        return hash((self.__x, self.__y))
+        return hash(self.key())
+
+    def key(self, step: float = EPS) -> tuple[int, int]:
+        """
+        Канонический ключ точки: номера корзин координат с шагом step.
+        Равные точки почти всегда имеют одинаковый ключ, для точного поиска
+        с допуском нужен `FigureIndex`.
+        """
+        return quantize(self.__x, step), quantize(self.__y, step)
+
+    @property
+    def anchor(self) -> "Point":
+        """
+        Опорная точка фигуры для поиска в `FigureIndex`.
+        """
+        return self
 
     def __add__(self, other: "Point") -> "Line":
         """
@@ -87,6 +112,13 @@ class Point(Geometry):
         :return: True, если точка есть в списке points, иначе - False.
         """
 
+        if isinstance(points, FigureIndex):
+            return self in points
+
+        # индекс точек с поиском в радиусе, например `geometry.kdtree.PointTree`
+        if hasattr(points, "within"):
+            return len(points.within(self, EPS)) > 0
+
         for other in points:
             if self == other:
                 return True
@@ -160,6 +192,16 @@ class Line(Geometry):
     def __eq__(self, other: "Line"):
         return self.line == other.line
 
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self, step: float = EPS) -> tuple[int, ...]:
+        return self.__point0.key(step) + self.__point1.key(step)
+
+    @property
+    def anchor(self) -> Point:
+        return self.median_point
+
     def __str__(self):
         return f"Прямая, состоящая из точек ({self.point0.point}, {self.point1.point})"
 
@@ -396,7 +438,16 @@ class StraightAngle(Geometry):
         self.set_color(color)
 
     def __hash__(self):
-        return hash(self)
+        return hash(self.key())
+
+    def key(self, step: float = EPS) -> tuple[int, ...]:
+        return (
+            self.__point0.key(step) + self.__vertex.key(step) + self.__point1.key(step)
+        )
+
+    @property
+    def anchor(self) -> Point:
+        return self.__vertex
 
     def __eq__(self, other: "StraightAngle"):
         return (
@@ -508,7 +559,17 @@ class Circle(Geometry):
         return self.__center.distance(point) < self.__radius + TOLERANCE
 
     def __hash__(self):
-        return hash(self)
+        return hash(self.key())
+
+    def key(self, step: float = TOLERANCE) -> tuple[int, int, int]:
+        """
+        Канонический ключ окружности: корзины центра и радиуса с шагом step.
+        """
+        return self.__center.key(step) + (quantize(self.__radius, step),)
+
+    @property
+    def anchor(self) -> Point:
+        return self.__center
 
     def __eq__(self, other: "Circle"):
         """
@@ -520,7 +581,7 @@ class Circle(Geometry):
 
         return (
             self.__center.distance(other.center) < TOLERANCE
-            and math.fabs(self.__radius - other.__radius) < TOLERANCE
+            and math.fabs(self.__radius - other.radius) < TOLERANCE
         )
 
     def set_color(self, value: tuple[int, int, int]):
@@ -631,7 +692,27 @@ class Rectangle(Geometry):
         return True
 
     def __eq__(self, other: "Rectangle"):
-        return self == other
+        """
+        Прямоугольники равны, если у каждой вершины есть вершина другого
+        прямоугольника ближе TOLERANCE.
+        """
+        return all(
+            any(vertex.almost_eq(other_vertex) for other_vertex in other.vertices)
+            for vertex in self.__vertices
+        )
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self, step: float = TOLERANCE) -> tuple[tuple[int, int], ...]:
+        """
+        Канонический ключ прямоугольника: упорядоченные корзины вершин с шагом step.
+        """
+        return tuple(sorted(vertex.key(step) for vertex in self.__vertices))
+
+    @property
+    def anchor(self) -> Point:
+        return self.center
 
     @property
     def larger_rectangle(self):
@@ -743,19 +824,19 @@ class Border(Rectangle):
     def __str__(self):
         return (
             f"Граница поля с вершинами "
-            f"A{self.__vertices[0].point}, "
-            f"B{self.__vertices[1].point}, "
-            f"C{self.__vertices[2].point}, "
-            f"D{self.__vertices[3].point}"
+            f"A{self.vertices[0].point}, "
+            f"B{self.vertices[1].point}, "
+            f"C{self.vertices[2].point}, "
+            f"D{self.vertices[3].point}"
         )
 
     def __repr__(self):
         return (
             f"Border(["
-            f"Point{self.__vertices[0].point}, "
-            f"Point{self.__vertices[1].point}, "
-            f"Point{self.__vertices[2].point}, "
-            f"Point{self.__vertices[3].point}])"
+            f"Point{self.vertices[0].point}, "
+            f"Point{self.vertices[1].point}, "
+            f"Point{self.vertices[2].point}, "
+            f"Point{self.vertices[3].point}])"
         )
 
     def __contains__(self, point):
@@ -768,6 +849,201 @@ class Border(Rectangle):
         return False
 
 
+class FigureIndex:
+    """
+    Набор фигур с проверкой "уже известна?" за O(1).
+
+    Фигуры раскладываются по ячейкам со стороной `step` по опорной точке (`anchor`).
+    У фигур, равных с допуском не больше `step`, опорные точки лежат в одной
+    или соседних ячейках, поэтому при поиске проверяются только девять ячеек.
+    """
+
+    def __init__(self, step: float = TOLERANCE, match: Callable | None = None):
+        """
+        :param step: Сторона ячейки, не меньше допуска сравнения фигур;
+        :param match: Сравнение известной и искомой фигур, по умолчанию - `==`.
+        """
+        self.step = step
+        self.match = match or operator.eq
+
+        self.__cells: dict[tuple[int, int], list] = {}
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    def __iter__(self):
+        for figures in self.__cells.values():
+            yield from figures
+
+    def __cell(self, figure) -> tuple[int, int]:
+        anchor = figure.anchor
+        return quantize(anchor.x, self.step), quantize(anchor.y, self.step)
+
+    def find(self, figure):
+        """
+        Известная фигура, равная данной, или None.
+        """
+        cx, cy = self.__cell(figure)
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for known in self.__cells.get((i, j), ()):
+                    if self.match(known, figure):
+                        return known
+        return None
+
+    def __contains__(self, figure) -> bool:
+        return self.find(figure) is not None
+
+    def add(self, figure) -> bool:
+        """
+        Добавление фигуры, если равной ей еще нет.
+
+        :return: True, если фигура добавлена, иначе - False.
+        """
+        if figure in self:
+            return False
+
+        self.__cells.setdefault(self.__cell(figure), []).append(figure)
+        self.__count += 1
+        return True
+
+    def remove(self, figure):
+        cell = self.__cell(figure)
+        figures = self.__cells[cell]
+        figures.pop(next(i for i, known in enumerate(figures) if known is figure))
+        if not figures:
+            del self.__cells[cell]
+        self.__count -= 1
+
+
+class LineIndex:
+    """
+    Индекс отрезков для объединения (см. `Line.combine_lines`).
+
+    Отрезки хранятся в корзинах по направлению (угол по модулю pi с шагом не меньше
+    ANGLE_TOLERANCE) и ячейкам сетки, которые покрывает описанный прямоугольник отрезка,
+    расширенный на допуск `padding`. Объединяемые отрезки параллельны, и конец одного
+    лежит на другом с точностью до допусков `combine_lines`, поэтому их направления
+    попадают в соседние корзины, а конец одного отрезка - в расширенный прямоугольник
+    другого: кандидаты на объединение ищутся только в трех корзинах направления
+    и ячейках расширенного прямоугольника отрезка.
+    """
+
+    def __init__(self, cell_size: float = 100.0):
+        self.cell_size = cell_size
+        self.angle_buckets = int(math.pi // ANGLE_TOLERANCE)
+
+        self.__lines: dict[int, Line] = {}
+        self.__keys: dict[int, list[tuple[int, int, int]]] = {}
+        self.__buckets: dict[tuple[int, int, int], set[int]] = {}
+        self.__next_id = 0
+
+        # число проверок `combine_lines`
+        self.checks = 0
+
+    def __len__(self):
+        return len(self.__lines)
+
+    @property
+    def lines(self) -> list[Line]:
+        return list(self.__lines.values())
+
+    def __angle_bucket(self, line: Line) -> int:
+        angle = math.atan2(line.point1.y - line.point0.y, line.point1.x - line.point0.x)
+        bucket = int((angle % math.pi) / math.pi * self.angle_buckets)
+        return min(bucket, self.angle_buckets - 1)
+
+    @staticmethod
+    def padding(line: Line) -> float:
+        """
+        Наибольшее расстояние от отрезка до конца отрезка, который `combine_lines`
+        считает лежащим на нем: TOLERANCE по расстоянию и отклонение на ANGLE_TOLERANCE
+        на всей длине отрезка.
+        """
+        length = math.hypot(
+            line.point1.x - line.point0.x, line.point1.y - line.point0.y
+        )
+        return TOLERANCE + length * math.tan(ANGLE_TOLERANCE)
+
+    def __cells(self, line: Line) -> list[tuple[int, int]]:
+        pad = self.padding(line)
+        left = math.floor((min(line.point0.x, line.point1.x) - pad) / self.cell_size)
+        right = math.floor((max(line.point0.x, line.point1.x) + pad) / self.cell_size)
+        bottom = math.floor((min(line.point0.y, line.point1.y) - pad) / self.cell_size)
+        top = math.floor((max(line.point0.y, line.point1.y) + pad) / self.cell_size)
+        return [(i, j) for i in range(left, right + 1) for j in range(bottom, top + 1)]
+
+    def add(self, line: Line) -> int:
+        """
+        Добавление отрезка без объединения.
+
+        :return: Номер отрезка в индексе.
+        """
+        line_id = self.__next_id
+        self.__next_id += 1
+
+        bucket = self.__angle_bucket(line)
+        keys = [(bucket, i, j) for i, j in self.__cells(line)]
+        for key in keys:
+            self.__buckets.setdefault(key, set()).add(line_id)
+
+        self.__lines[line_id] = line
+        self.__keys[line_id] = keys
+        return line_id
+
+    def remove(self, line_id: int):
+        for key in self.__keys.pop(line_id):
+            ids = self.__buckets[key]
+            ids.discard(line_id)
+            if not ids:
+                del self.__buckets[key]
+
+        del self.__lines[line_id]
+
+    def candidates(self, line: Line) -> list[int]:
+        """
+        Номера отрезков, с которыми отрезок может объединиться, в порядке добавления.
+        """
+        bucket = self.__angle_bucket(line)
+        found = set()
+
+        for i, j in self.__cells(line):
+            for shift in (-1, 0, 1):
+                key = ((bucket + shift) % self.angle_buckets, i, j)
+                found.update(self.__buckets.get(key, ()))
+
+        return sorted(found)
+
+    def merge(self, line: Line) -> Line:
+        """
+        Добавление отрезка с объединением: отрезок объединяется с кандидатами,
+        пока это возможно, объединенные отрезки удаляются из индекса.
+
+        :return: Итоговый отрезок.
+        """
+        merged = True
+        while merged:
+            merged = False
+
+            for line_id in self.candidates(line):
+                other = self.__lines[line_id]
+                if other == line:
+                    self.remove(line_id)
+                    continue
+
+                self.checks += 1
+                buffer = other.combine_lines(line) or line.combine_lines(other)
+                if buffer:
+                    self.remove(line_id)
+                    line = buffer
+                    merged = True
+                    break
+
+        self.add(line)
+        return line
+
+
 class Figures:
     """
     Класс "Фигуры"
@@ -775,7 +1051,7 @@ class Figures:
 
     def __init__(self):
         self.__points: list[Point] = []
-        self.__lines: list[Line] = []
+        self.__line_index = LineIndex()
         self.__straight_angles: list[StraightAngle] = []
         self.__circles: list[Circle] = []
         self.__rectangles: list[Rectangle] = []
@@ -794,7 +1070,11 @@ class Figures:
 
     @property
     def lines(self) -> list[Line]:
-        return self.__lines
+        return self.__line_index.lines
+
+    @property
+    def line_index(self) -> LineIndex:
+        return self.__line_index
 
     @property
     def straight_angles(self) -> list[StraightAngle]:
@@ -857,55 +1137,28 @@ class Figures:
         return False
 
     def check(self):
-        if self.__lines:
-            i = 0
-            j = 0
-
-            while i < len(self.__lines):
-                current_line = self.__lines[i]
-
-                while j < len(self.__lines):
-                    if i == j:
-                        j += 1
-                        continue
-
-                    next_line = self.__lines[j]
-
-                    if current_line == next_line:
-                        j += 1
-                        continue
-
-                    buffer = current_line.combine_lines(other=next_line)
-
-                    if buffer:
-                        self.__lines[j] = buffer
+        """
+        Объединение всех отрезков, которые можно объединить (см. `LineIndex`).
+        Каждый отрезок проверяется только с кандидатами из индекса.
+        """
+        lines = self.__line_index.lines
+        self.__line_index = LineIndex(self.__line_index.cell_size)
 
-                        if i > len(self.__lines) - 1:
-                            return
+        for line in lines:
+            self.__line_index.merge(line)
 
-                        self.__lines.pop(i)
-                        continue
-                    else:
-                        j += 1
+    def add_line(self, line: Line) -> Line:
+        """
+        Добавление отрезка с объединением с уже известными отрезками.
 
-                i += 1
-                j = 0
+        :return: Итоговый отрезок.
+        """
+        return self.__line_index.merge(line)
 
     def checking_for_overlapping_lines(self, line):
-        merger = False
-        index = 0
-
-        while index < len(self.__lines):
-            new_line = self.__lines[index].combine_lines(line)
-
-            if new_line:
-                self.__lines[index] = new_line
-                line = new_line
-                merger = True
-
-            index += 1
-
-        return merger
+        count = len(self.__line_index)
+        self.__line_index.merge(line)
+        return len(self.__line_index) <= count
 
     def get_line(self, queue_of_points: list[Point]) -> bool:
         is_line = False
@@ -927,10 +1180,7 @@ class Figures:
             # print(new_line)ee
 
             if new_line:
-                # if not self.__lines or not self.checking_for_overlapping_lines(new_line):
-                self.__lines.append(new_line)
-
-                self.check()
+                self.add_line(new_line)
 
             # if not self.__lines:
             #     self.__lines.append(new_line)
@@ -1115,7 +1365,7 @@ class Figures:
                 # ДОПИЛИТЬ #
                 ############
                 if is_neighbours:
-                    for line in self.__lines:
+                    for line in self.lines:
                         if not rectangle_side.merge_the_lines(line):
                             continue
 
@@ -1179,7 +1429,7 @@ class Figures:
 
                                     for i in range(len(rect.larger_rectangle_points)):
                                         pts = rect.larger_rectangle_points
-                                        self.__lines.append(pts[(i + 1) % 4] + pts[i])
+                                        self.add_line(pts[(i + 1) % 4] + pts[i])
 
         return is_rectangle
 
@@ -0,0 +1,255 @@
+"""
+KD-дерево точек для поиска соседей.
+"""
+
+import heapq
+
+import numpy as np
+
+from geometry.geometry import EPS
+
+
+def coordinates(point) -> np.ndarray:
+    """
+    Координаты точки (объекта с `x`, `y` или пары чисел).
+    """
+    if hasattr(point, "x"):
+        return np.array([point.x, point.y], dtype=float)
+    return np.asarray(point, dtype=float).reshape(2)
+
+
+class PointTree:
+    """
+    Индекс точек для поиска соседей в радиусе и ближайших соседей.
+
+    Основная часть точек хранится в статическом KD-дереве без указателей: массив точек
+    переставлен так, что узел диапазона [lo, hi) - его середина, левое поддерево -
+    [lo, mid), правое - [mid + 1, hi), ось разбиения узла - ось наибольшего разброса.
+    Диапазоны не длиннее `leaf_size` проверяются целиком векторно.
+
+    Новые точки попадают в буфер вставки, который проверяется векторным перебором.
+    Когда буфер становится больше `buffer_size` и доли `1 / buffer_ratio` точек
+    дерева, дерево строится заново по всем точкам: стоимость перестроения делится
+    на много вставок, а перебор буфера остается в разы короче перебора всех точек.
+
+    Номер точки - порядковый номер ее добавления.
+    """
+
+    # во сколько раз буфер вставки может быть меньше дерева до перестроения
+    buffer_ratio = 32
+
+    def __init__(self, points=(), leaf_size: int = 16, buffer_size: int = 64):
+        """
+        :param points: Начальные точки;
+        :param leaf_size: Число точек, проверяемых без разбиения;
+        :param buffer_size: Минимальный размер буфера вставки до перестроения дерева.
+        """
+        self.leaf_size = max(1, leaf_size)
+        self.buffer_size = buffer_size
+
+        self._points = np.zeros((0, 2), dtype=float)
+        self._tree = np.zeros((0, 2), dtype=float)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._axes = np.zeros(0, dtype=np.int8)
+        self._buffer = np.zeros((max(buffer_size, 1), 2), dtype=float)
+        self._buffered = 0
+
+        # число перестроений дерева
+        self.rebuilds = 0
+
+        points = [coordinates(point) for point in points]
+        if points:
+            self._points = np.array(points, dtype=float)
+            self.rebuild()
+
+    def __len__(self):
+        return len(self._points) + self._buffered
+
+    @property
+    def _pending(self) -> np.ndarray:
+        return self._buffer[: self._buffered]
+
+    @property
+    def points(self) -> np.ndarray:
+        """
+        Все точки в порядке добавления (n, 2).
+        """
+        if not self._buffered:
+            return self._points
+        return np.concatenate([self._points, self._pending])
+
+    def _flush(self):
+        if self._buffered:
+            self._points = np.concatenate([self._points, self._pending])
+            self._buffered = 0
+
+    def insert(self, point) -> int:
+        """
+        Добавление точки.
+
+        :return: Номер точки.
+        """
+        if self._buffered == len(self._buffer):
+            buffer = np.zeros((2 * len(self._buffer), 2), dtype=float)
+            buffer[: self._buffered] = self._pending
+            self._buffer = buffer
+
+        self._buffer[self._buffered] = coordinates(point)
+        self._buffered += 1
+
+        if self._buffered > max(self.buffer_size, len(self._tree) // self.buffer_ratio):
+            self.rebuild()
+        return len(self) - 1
+
+    def extend(self, points) -> np.ndarray:
+        """
+        Добавление набора точек с перестроением дерева.
+
+        :return: Номера точек.
+        """
+        start = len(self)
+        points = np.asarray(
+            [coordinates(point) for point in points], dtype=float
+        ).reshape(-1, 2)
+
+        self._flush()
+        self._points = np.concatenate([self._points, points])
+        self.rebuild()
+        return np.arange(start, len(self))
+
+    def rebuild(self):
+        """
+        Построение дерева по всем точкам, буфер вставки очищается.
+        """
+        self._flush()
+
+        ids = np.arange(len(self._points))
+        axes = np.zeros(len(ids), dtype=np.int8)
+
+        stack = [(0, len(ids))]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= self.leaf_size:
+                continue
+
+            part = self._points[ids[lo:hi]]
+            axis = int(np.argmax(part.max(axis=0) - part.min(axis=0)))
+            mid = (lo + hi) // 2
+
+            order = np.argpartition(part[:, axis], mid - lo)
+            ids[lo:hi] = ids[lo:hi][order]
+            axes[mid] = axis
+
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+        self._ids = ids
+        self._axes = axes
+        self._tree = self._points[ids]
+        self.rebuilds += 1
+
+    def within(self, point, radius: float) -> np.ndarray:
+        """
+        Номера точек на расстоянии не больше `radius` от точки, по возрастанию.
+        """
+        query = coordinates(point)
+        squared = radius**2
+        found = []
+
+        stack = [(0, len(self._tree))] if len(self._tree) else []
+        while stack:
+            lo, hi = stack.pop()
+
+            if hi - lo <= self.leaf_size:
+                delta = self._tree[lo:hi] - query
+                near = np.flatnonzero((delta**2).sum(axis=1) <= squared)
+                found.append(self._ids[lo + near])
+                continue
+
+            mid = (lo + hi) // 2
+            axis = self._axes[mid]
+            node = self._tree[mid]
+            diff = query[axis] - node[axis]
+
+            if ((node - query) ** 2).sum() <= squared:
+                found.append(self._ids[mid : mid + 1])
+
+            if diff <= radius:
+                stack.append((lo, mid))
+            if diff >= -radius:
+                stack.append((mid + 1, hi))
+
+        if self._buffered:
+            delta = self._pending - query
+            near = np.flatnonzero((delta**2).sum(axis=1) <= squared)
+            found.append(near + len(self._points))
+
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(found))
+
+    def nearest(self, point, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Ближайшие точки.
+
+        :param point: Точка;
+        :param k: Число соседей;
+        :return: Номера точек и расстояния до них по возрастанию расстояния.
+        """
+        query = coordinates(point)
+
+        # k лучших кандидатов: куча (-квадрат расстояния, номер)
+        best = []
+
+        def offer(squared: np.ndarray, ids: np.ndarray):
+            for distance, point_id in zip(squared.tolist(), ids.tolist()):
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, point_id))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, point_id))
+
+        def bound() -> float:
+            return -best[0][0] if len(best) == k else np.inf
+
+        if self._buffered:
+            delta = self._pending - query
+            offer(
+                (delta**2).sum(axis=1),
+                np.arange(self._buffered) + len(self._points),
+            )
+
+        # обход ближней ветви первым, дальняя отсекается по расстоянию до плоскости
+        stack = [(0, len(self._tree), 0.0)] if len(self._tree) else []
+        while stack:
+            lo, hi, plane = stack.pop()
+            if plane > bound():
+                continue
+
+            if hi - lo <= self.leaf_size:
+                delta = self._tree[lo:hi] - query
+                offer((delta**2).sum(axis=1), self._ids[lo:hi])
+                continue
+
+            mid = (lo + hi) // 2
+            axis = self._axes[mid]
+            node = self._tree[mid]
+            diff = query[axis] - node[axis]
+
+            offer(np.array([((node - query) ** 2).sum()]), self._ids[mid : mid + 1])
+
+            near, far = (
+                ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            )
+            stack.append((*far, diff**2))
+            stack.append((*near, plane))
+
+        result = sorted((-distance, point_id) for distance, point_id in best)
+        ids = np.array([point_id for _, point_id in result], dtype=np.int64)
+        distances = np.sqrt([distance for distance, _ in result])
+        return ids, distances
+
+    def __contains__(self, point) -> bool:
+        """
+        Есть ли точка, совпадающая с данной (ближе EPS, как `Point.__eq__`).
+        """
+        return len(self.within(point, EPS)) > 0
@@ -0,0 +1,496 @@
+"""
+Неизменяемые фигуры с `__slots__`.
+
+Повторяют интерфейс фигур `geometry.geometry` (сравнения, расстояния, пересечения,
+проверки параллельности и принадлежности) с теми же допусками, но не хранят словарь
+атрибутов и вычисляют производные величины (направление, длину, единичную нормаль,
+описанный прямоугольник) один раз при создании.
+"""
+
+import math
+
+from geometry import geometry
+from geometry.geometry import ANGLE_TOLERANCE, EPS, TOLERANCE, quantize
+
+TWO_PI = 2 * math.pi
+
+# запись атрибутов неизменяемых фигур при создании
+_set = object.__setattr__
+
+
+def direction(x0: float, y0: float, x1: float, y1: float) -> float:
+    """
+    Направление вектора (x0, y0) -> (x1, y1) в диапазоне [0, 2pi).
+    """
+    alpha = math.atan2(y1 - y0, x1 - x0)
+    return TWO_PI + alpha if alpha < 0 else alpha
+
+
+def angle_between(alpha: float, beta: float) -> float:
+    """
+    Угол между прямыми с направлениями alpha и beta (как `Line.angle_between_lines`).
+    """
+    result = alpha - beta if alpha > beta else beta - alpha
+    return result - math.pi if result - math.pi > ANGLE_TOLERANCE else result
+
+
+class Primitive:
+    """
+    Базовый класс неизменяемых фигур: атрибуты задаются только при создании.
+    """
+
+    __slots__ = ("color",)
+
+    object_type = None
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return type(self), self._arguments()
+
+    def _arguments(self) -> tuple:
+        raise NotImplementedError
+
+    def to_geometry(self) -> geometry.Geometry:
+        """
+        Такая же фигура из `geometry.geometry`.
+        """
+        raise NotImplementedError
+
+
+class Point(Primitive):
+    """
+    Точка.
+    """
+
+    __slots__ = ("x", "y")
+
+    object_type = "point"
+
+    def __init__(self, x: float, y: float, color: tuple[int, int, int] = (0, 0, 255)):
+        _set(self, "x", x)
+        _set(self, "y", y)
+        _set(self, "color", color)
+
+    @classmethod
+    def from_geometry(cls, point) -> "Point":
+        return cls(point.x, point.y, point.color)
+
+    def _arguments(self) -> tuple:
+        return self.x, self.y, self.color
+
+    def to_geometry(self) -> geometry.Point:
+        return geometry.Point(self.x, self.y, self.color)
+
+    @property
+    def point(self) -> tuple[float, float]:
+        return self.x, self.y
+
+    def distance(self, other) -> float:
+        return math.hypot(other.x - self.x, other.y - self.y)
+
+    def vector(self, other) -> tuple[float, float]:
+        return other.x - self.x, other.y - self.y
+
+    def almost_eq(self, other, tolerance=TOLERANCE) -> bool:
+        return self.distance(other) <= tolerance
+
+    def __eq__(self, other) -> bool:
+        return self.distance(other) < EPS
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self, step: float = EPS) -> tuple[int, int]:
+        return quantize(self.x, step), quantize(self.y, step)
+
+    @property
+    def anchor(self) -> "Point":
+        return self
+
+    def __add__(self, other: "Point") -> "Line":
+        return Line(self, other)
+
+    def __str__(self):
+        return f"Точка с координатами ({self.x}, {self.y})"
+
+    def __repr__(self):
+        return f"Point({self.x, self.y})"
+
+
+class Line(Primitive):
+    """
+    Прямая (отрезок) по двум точкам.
+
+    `dx`, `dy` - вектор от начала к концу, `length` - длина, `angle` - направление
+    в диапазоне [0, 2pi), `normal` - единичная нормаль, `offset` - определитель
+    концов (свободный член уравнения прямой), `bbox` - (left, bottom, right, top).
+    """
+
+    __slots__ = (
+        "point0",
+        "point1",
+        "dx",
+        "dy",
+        "length",
+        "angle",
+        "normal",
+        "offset",
+        "bbox",
+    )
+
+    object_type = "line"
+
+    def __init__(
+        self, point0: Point, point1: Point, color: tuple[int, int, int] = (255, 0, 0)
+    ):
+        x0, y0, x1, y1 = point0.x, point0.y, point1.x, point1.y
+        dx, dy = x1 - x0, y1 - y0
+        length = math.hypot(dx, dy)
+
+        _set(self, "point0", point0)
+        _set(self, "point1", point1)
+        _set(self, "color", color)
+        _set(self, "dx", dx)
+        _set(self, "dy", dy)
+        _set(self, "length", length)
+        _set(self, "angle", direction(x0, y0, x1, y1))
+        _set(self, "normal", (-dy / length, dx / length) if length else (0.0, 0.0))
+        _set(self, "offset", x0 * y1 - x1 * y0)
+        _set(self, "bbox", (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)))
+
+    @classmethod
+    def from_geometry(cls, line) -> "Line":
+        return cls(
+            Point.from_geometry(line.point0),
+            Point.from_geometry(line.point1),
+            line.color,
+        )
+
+    def _arguments(self) -> tuple:
+        return self.point0, self.point1, self.color
+
+    def to_geometry(self) -> geometry.Line:
+        return geometry.Line(
+            self.point0.to_geometry(), self.point1.to_geometry(), self.color
+        )
+
+    @property
+    def line(self) -> tuple[Point, Point]:
+        return self.point0, self.point1
+
+    @property
+    def median_point(self) -> Point:
+        return Point(
+            (self.point0.x + self.point1.x) / 2, (self.point0.y + self.point1.y) / 2
+        )
+
+    def __eq__(self, other) -> bool:
+        return self.point0 == other.point0 and self.point1 == other.point1
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self, step: float = EPS) -> tuple[int, ...]:
+        return self.point0.key(step) + self.point1.key(step)
+
+    @property
+    def anchor(self) -> Point:
+        return self.median_point
+
+    def __str__(self):
+        return f"Прямая, состоящая из точек ({self.point0.point}, {self.point1.point})"
+
+    def __repr__(self):
+        return f"Line(Point{self.point0.point}, Point{self.point1.point})"
+
+    def intersection(self, other: "Line") -> Point | None:
+        """
+        Точка пересечения прямых или None для параллельных прямых.
+        """
+        div = self.dx * other.dy - other.dx * self.dy
+        if div == 0:
+            return None
+
+        return Point(
+            (other.offset * self.dx - self.offset * other.dx) / div,
+            (other.offset * self.dy - self.offset * other.dy) / div,
+        )
+
+    def angle_between_lines(self, other: "Line") -> float:
+        return angle_between(self.angle, other.angle)
+
+    def distance(self, other: "Point | Line") -> float:
+        """
+        Расстояние от прямой до точки или до другой прямой.
+        """
+        if isinstance(other, (Line, geometry.Line)):
+            if not isinstance(other, Line):
+                other = Line.from_geometry(other)
+            if self == other or self.intersection(other):
+                return 0.0
+            other = other.point0
+        elif not isinstance(other, (Point, geometry.Point)):
+            raise TypeError(f"Неизвестный тип параметра other: {type(other)}")
+
+        return math.fabs(
+            (-self.dy * other.x + self.dx * other.y + self.offset) / self.length
+        )
+
+    def _on_segment(self, point: Point) -> bool:
+        """
+        Нахождение точки на отрезке с угловым допуском (как в `geometry.Line`).
+        """
+        x0, y0 = self.point0.x, self.point0.y
+        x1, y1 = self.point1.x, self.point1.y
+
+        if not (
+            angle_between(self.angle, direction(x0, y0, point.x, point.y))
+            < ANGLE_TOLERANCE
+        ):
+            return False
+
+        return (
+            math.pi - ANGLE_TOLERANCE
+            < angle_between(
+                direction(point.x, point.y, x0, y0),
+                direction(point.x, point.y, x1, y1),
+            )
+            < math.pi + ANGLE_TOLERANCE
+        )
+
+    def parallel(self, other: "Line") -> bool:
+        angle = angle_between(self.angle, other.angle)
+        return (
+            math.pi - ANGLE_TOLERANCE <= angle <= math.pi + ANGLE_TOLERANCE
+            or angle <= ANGLE_TOLERANCE
+        )
+
+    def perpendicular(self, other: "Line") -> bool:
+        angle = angle_between(self.angle, other.angle)
+        return math.pi / 2 - ANGLE_TOLERANCE <= angle <= math.pi / 2 + ANGLE_TOLERANCE
+
+    def combine_lines(self, other: "Line") -> "Line | None":
+        """
+        Объединение двух отрезков в один (см. `geometry.Line.combine_lines`).
+        """
+        if not self.parallel(other):
+            return None
+
+        if not self.distance(other) <= TOLERANCE:
+            return None
+
+        first = self._on_segment(other.point0)
+        second = self._on_segment(other.point1)
+
+        if first and second:
+            return self
+
+        if first:
+            if other.point1.distance(self.point1) <= other.point1.distance(self.point0):
+                return Line(self.point0, other.point1)
+            return Line(self.point1, other.point1)
+
+        if second:
+            if other.point0.distance(self.point1) <= other.point0.distance(self.point0):
+                return Line(self.point0, other.point0)
+            return Line(self.point1, other.point0)
+
+        return None
+
+    def is_point_on_it(self, point: Point) -> bool:
+        cross = (point.x - self.point0.x) * self.dy - (
+            point.y - self.point0.y
+        ) * self.dx
+        return math.fabs(cross) < TOLERANCE
+
+
+class Circle(Primitive):
+    """
+    Окружность. `bbox` - описанный прямоугольник (left, bottom, right, top).
+    """
+
+    __slots__ = ("center", "radius", "bbox")
+
+    object_type = "circle"
+
+    def __init__(
+        self, center: Point, radius: float, color: tuple[int, int, int] = (0, 0, 0)
+    ):
+        _set(self, "center", center)
+        _set(self, "radius", radius)
+        _set(self, "color", color)
+        _set(
+            self,
+            "bbox",
+            (
+                center.x - radius,
+                center.y - radius,
+                center.x + radius,
+                center.y + radius,
+            ),
+        )
+
+    @classmethod
+    def from_geometry(cls, circle) -> "Circle":
+        return cls(Point.from_geometry(circle.center), circle.radius, circle.color)
+
+    def _arguments(self) -> tuple:
+        return self.center, self.radius, self.color
+
+    def to_geometry(self) -> geometry.Circle:
+        return geometry.Circle(self.center.to_geometry(), self.radius, self.color)
+
+    @property
+    def square(self) -> float:
+        return math.pi * self.radius**2
+
+    def __contains__(self, point: Point) -> bool:
+        return self.center.distance(point) < self.radius + TOLERANCE
+
+    def __eq__(self, other) -> bool:
+        return (
+            self.center.distance(other.center) < TOLERANCE
+            and math.fabs(self.radius - other.radius) < TOLERANCE
+        )
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self, step: float = TOLERANCE) -> tuple[int, int, int]:
+        return self.center.key(step) + (quantize(self.radius, step),)
+
+    @property
+    def anchor(self) -> Point:
+        return self.center
+
+    def __str__(self):
+        return (
+            f"Окружность с центром O{self.center.point} и радиусом R = {self.radius})"
+        )
+
+    def __repr__(self):
+        return f"Circle(Point{self.center.point}, {self.radius})"
+
+
+class Rectangle(Primitive):
+    """
+    Прямоугольник (граница поля при `object_type="border"`).
+
+    Вершины упорядочиваются против часовой стрелки. При создании вычисляются
+    центр, площадь, описанный прямоугольник `bbox`, стороны и их внутренние
+    нормали для проверки принадлежности точки.
+    """
+
+    __slots__ = (
+        "vertices",
+        "object_type",
+        "center",
+        "square",
+        "bbox",
+        "sides",
+        "_normals",
+    )
+
+    def __init__(
+        self,
+        vertices: list[Point],
+        color: tuple[int, int, int] = (0, 0, 0),
+        object_type: str = "rectangle",
+    ):
+        vertices = list(vertices)
+        cx = sum(vertex.x for vertex in vertices) / 4
+        cy = sum(vertex.y for vertex in vertices) / 4
+
+        # вершины против часовой стрелки относительно центра
+        vertices.sort(key=lambda vertex: math.atan2(vertex.y - cy, vertex.x - cx))
+
+        xs = [vertex.x for vertex in vertices]
+        ys = [vertex.y for vertex in vertices]
+
+        sides = tuple(Line(vertices[(i + 1) % 4], vertices[i]) for i in range(4))
+
+        # обход против часовой стрелки - площадь со знаком положительна
+        area = sum(xs[i] * ys[(i + 1) % 4] - xs[(i + 1) % 4] * ys[i] for i in range(4))
+        sign = 1.0 if area < 0 else -1.0
+        normals = tuple(
+            (
+                sign * side.normal[0],
+                sign * side.normal[1],
+                sign
+                * (side.normal[0] * side.point0.x + side.normal[1] * side.point0.y),
+            )
+            for side in sides
+        )
+
+        _set(self, "vertices", tuple(vertices))
+        _set(self, "color", color)
+        _set(self, "object_type", object_type)
+        _set(self, "center", Point(cx, cy))
+        _set(
+            self,
+            "square",
+            vertices[0].distance(vertices[1]) * vertices[1].distance(vertices[2]),
+        )
+        _set(self, "bbox", (min(xs), min(ys), max(xs), max(ys)))
+        _set(self, "sides", sides)
+        _set(self, "_normals", normals)
+
+    @classmethod
+    def from_geometry(cls, rectangle) -> "Rectangle":
+        return cls(
+            [Point.from_geometry(vertex) for vertex in rectangle.vertices],
+            rectangle.color,
+            rectangle.object_type,
+        )
+
+    def _arguments(self) -> tuple:
+        return self.vertices, self.color, self.object_type
+
+    def to_geometry(self) -> geometry.Rectangle:
+        vertices = [vertex.to_geometry() for vertex in self.vertices]
+        if self.object_type == "border":
+            return geometry.Border(vertices, self.color)
+        return geometry.Rectangle(vertices, self.color)
+
+    def __contains__(self, point: Point) -> bool:
+        """
+        Нахождение точки в прямоугольнике, расширенном на TOLERANCE.
+        """
+        x, y = point.x, point.y
+        for nx, ny, c in self._normals:
+            if nx * x + ny * y - c < -TOLERANCE:
+                return False
+        return True
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (Rectangle, geometry.Rectangle)):
+            return NotImplemented
+        return all(
+            any(vertex.almost_eq(other_vertex) for other_vertex in other.vertices)
+            for vertex in self.vertices
+        )
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self, step: float = TOLERANCE) -> tuple[tuple[int, int], ...]:
+        return tuple(sorted(vertex.key(step) for vertex in self.vertices))
+
+    @property
+    def anchor(self) -> Point:
+        return self.center
+
+    def __str__(self):
+        name = "Граница поля" if self.object_type == "border" else "Прямоугольник"
+        return f"{name} с вершинами " + ", ".join(
+            f"{letter}{vertex.point}" for letter, vertex in zip("ABCD", self.vertices)
+        )
+
+    def __repr__(self):
+        name = "Border" if self.object_type == "border" else "Rectangle"
+        return f"{name}([" + ", ".join(f"Point{v.point}" for v in self.vertices) + "])"
@@ -6,7 +6,9 @@ from pyglet import shapes
 from pyglet.window import key, mouse
 from pymunk.pyglet_util import DrawOptions
 
-from game.dispatcher import Player
+from game.dispatcher import Player, World
+from game.mappingworker import CartographyWorker
+from game.raycast import PymunkBatchQuery
 from game.scene import Scene
 
 width = 1280
@@ -36,9 +38,16 @@ scene.set_scene()
 players = []
 keys = {}
 
-player = Player(space=space, position=player_position, angle=player_angle)
+# картография в фоновом потоке, такт отрисовки не ждет обработки сканов
+cartography = CartographyWorker(max_queue=4, policy="coalesce").start()
+
+player = Player(
+    space=space, position=player_position, angle=player_angle, mapper=cartography
+)
 players.append(player)
 
+world = World(players, PymunkBatchQuery(space))
+
 key_vector = {"x": 0.0, "y": 0.0, "alpha": 0.0}
 target = {"x": width // 2, "y": height // 2}
 
@@ -219,8 +228,7 @@ def draw_rocket(rockets):
 def update(dt):
     send_to_train()
     sprites.clear()
-    for item in players:
-        data = item.step()
+    for item, data in zip(players, world.step()):
         color = (200, 0, 0)
 
         sprites.append(
@@ -293,3 +301,4 @@ def update(dt):
 if __name__ == "__main__":
     pyglet.clock.schedule_interval(update, 1 / 10.0)
     pyglet.app.run()
+    cartography.stop(flush=False)
@@ -0,0 +1,64 @@
+import numpy as np
+
+from geometry import geometry, primitives
+from geometry.arrays import PointArray, SegmentArray
+
+rng = np.random.default_rng(0)
+
+
+def random_segments(count):
+    starts = rng.integers(0, 50, (count, 2)).astype(float)
+    ends = rng.integers(0, 50, (count, 2)).astype(float)
+    ends[(starts == ends).all(axis=1)] += 1
+    return SegmentArray(starts, ends)
+
+
+def test_segment_kernels_match_lines():
+    segments = random_segments(40)
+    points = PointArray(rng.integers(0, 50, (30, 2)))
+    lines = [
+        geometry.Line(geometry.Point(*a), geometry.Point(*b))
+        for a, b in zip(segments.starts.tolist(), segments.ends.tolist())
+    ]
+    old_points = [geometry.Point(*p) for p in points.data.tolist()]
+
+    parallel = segments.parallel(segments, pairwise=True)
+    perpendicular = segments.perpendicular(segments, pairwise=True)
+    crossing = segments.intersection(segments, pairwise=True)
+    distance = segments.distance(segments, pairwise=True)
+    to_points = segments.distance(points, pairwise=True)
+    on_line = segments.is_point_on_it(points, pairwise=True)
+
+    for i, line in enumerate(lines):
+        for j, other in enumerate(lines):
+            assert parallel[i, j] == line.parallel(other)
+            assert perpendicular[i, j] == line.perpendicular(other)
+            assert np.isclose(distance[i, j], line.distance(other))
+
+            expected = line.intersection(other)
+            if expected is None:
+                assert np.isnan(crossing[i, j]).all()
+            else:
+                assert np.allclose(crossing[i, j], expected.point)
+
+        for j, point in enumerate(old_points):
+            assert np.isclose(to_points[i, j], line.distance(point))
+            assert on_line[i, j] == line.is_point_on_it(point)
+
+    # поэлементное сравнение совпадает с диагональю попарного
+    assert (segments.parallel(segments[::-1]) == parallel[:, ::-1].diagonal()).all()
+
+
+def test_point_containment():
+    points = PointArray(rng.uniform(-20, 120, (500, 2)))
+
+    circle = primitives.Circle(primitives.Point(50, 50), 30)
+    assert (points.in_circle(circle) == [p in circle for p in points.to_points()]).all()
+    assert (points.in_circles([[50, 50]], [30])[:, 0] == points.in_circle(circle)).all()
+
+    rectangle = primitives.Rectangle(
+        [primitives.Point(*p) for p in [(0, 0), (100, 0), (100, 60), (0, 60)]]
+    )
+    inside = points.in_rectangle(rectangle)
+    assert (inside == [p in rectangle for p in points.to_points()]).all()
+    assert inside.any() and not inside.all()
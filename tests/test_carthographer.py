@@ -1,4 +1,10 @@
-from game.cartographer import Cartographer
+import gc
+import tracemalloc
+
+import numpy as np
+
+from game.cartographer import Cartographer, Cluster
+from game.snapshot import load_arrays
 
 
 def test_creation():
@@ -22,3 +28,153 @@ def test_creation():
     cartographer.append(new_points)
 
     assert len(cartographer.clusters) == 2
+
+
+def test_grid_neighbours():
+    cartographer = Cartographer()
+
+    # точки в соседних ячейках хэша, но ближе CLUSTER_DISTANCE друг к другу
+    cartographer.append([(19, 19), (21, 21), (40, 25)])
+    assert len(cartographer.clusters) == 1
+
+    # повторная точка не создает новых записей
+    cartographer.append([(21, 21), (21.2, 20.9)])
+    assert len(cartographer.grid) == 3
+
+    cartographer.append([(100, 100)])
+    assert len(cartographer.clusters) == 2
+    assert cartographer.grid.near((105, 105)) == [3]
+
+
+def test_merge_statistics():
+    cartographer = Cartographer()
+    cartographer.append([(0, 0), (10, 0), (60, 0), (70, 0)])
+    assert len(cartographer.clusters) == 2
+
+    # точка-мост объединяет оба кластера
+    cartographer.append([(35, 0), (25, 0), (45, 0)])
+    (cluster,) = cartographer.clusters
+
+    assert cluster.count == 7
+    assert cluster.center == (35.0, 0.0)
+    assert cluster.bbox == (0, 0, 70, 0)
+    assert cluster.radius == 35.0
+    assert len({cartographer.find(i) for i in cartographer.grid.owners}) == 1
+
+
+def test_cluster_storage():
+    cluster = Cluster([(i, 0) for i in range(100)])
+    cluster.append((50, 0))
+    cluster.append((50, 1))
+
+    assert cluster.points.dtype == np.float32
+    assert cluster.count == 101
+    assert (50, 1) in cluster and (50, 2) not in cluster
+
+    assert cluster.belong((115, 0))
+    assert not cluster.belong((140, 0))
+
+    assert cluster.is_same(Cluster([(115, 10)]))
+    assert not cluster.is_same(Cluster([(115, 30)]))
+
+
+def test_clusters_share_grid_points():
+    wall = [(x, y) for x in range(0, 100) for y in (0, 1, 2)]
+    line = [(500 + x, 0) for x in range(50)]
+
+    cartographer = Cartographer(cluster_budget=100)
+    cartographer.append(line)
+    cartographer.append(wall)
+    grid = cartographer.grid
+
+    # кластеры хранят номера точек сетки, уплотнение сетки их перенумеровывает
+    assert grid.removed < cartographer.evicted
+    ids = np.concatenate([cluster.ids for cluster in cartographer.clusters])
+    assert sorted(ids.tolist()) == np.flatnonzero(grid.owners >= 0).tolist()
+
+    first, second = cartographer.clusters
+    assert sorted(map(tuple, first.points.tolist())) == line
+    assert np.array_equal(second.points, grid.points[second.ids])
+
+
+def test_voxel_downsampling_and_budget():
+    wall = [(x, y) for x in range(0, 100) for y in (0, 1, 2)]
+
+    cartographer = Cartographer(voxel_size=5, points_per_voxel=2)
+    for _ in range(3):
+        cartographer.append(wall)
+
+    # 20 вокселей по 2 точки, остальные попадания засчитываются соседним точкам
+    assert len(cartographer.grid) == 40
+    assert cartographer.report()["dropped"] == 3 * (len(wall) - 40)
+    assert cartographer.grid.hits.sum() == 3 * len(wall)
+
+    cartographer = Cartographer(cluster_budget=100)
+    cartographer.append(wall)
+    (cluster,) = cartographer.clusters
+    assert cluster.count <= 100
+    assert cluster.count == len(cartographer.grid)
+
+
+def test_memory_limit_bounds_footprint():
+    rng = np.random.default_rng(2)
+    scans = [rng.uniform(0, 2000, (500, 2)).tolist() for _ in range(10)]
+
+    # первый прогон выделяет память, не относящуюся к картографу (импорты, кэши numpy)
+    Cartographer(memory_limit=20_000).append(scans[0])
+
+    cartographer = Cartographer(memory_limit=200_000)
+    gc.collect()
+    tracemalloc.start()
+    for scan in scans:
+        cartographer.append(scan)
+    gc.collect()
+    footprint = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # лимит ограничивает всю выделенную картографом память, а не только массивы точек
+    assert cartographer.report()["evicted"] > 0
+    assert cartographer.memory_usage() <= 200_000
+    assert footprint <= 200_000
+
+
+def test_eviction_touches_only_evicted_cluster():
+    cartographer = Cartographer(cluster_budget=100)
+    cartographer.append([(500 + x, 0) for x in range(50)])
+    (line,) = cartographer.clusters
+    version = line.version
+
+    cartographer.append([(x, y) for x in range(0, 100) for y in (0, 1, 2)])
+    assert cartographer.report()["evicted"] > 0
+    assert line.version == version and line.count == 50
+
+
+def test_save_load(tmp_path):
+    rng = np.random.default_rng(1)
+    cartographer = Cartographer(voxel_size=4, points_per_voxel=2)
+    cartographer.append(rng.uniform(0, 400, (1500, 2)).tolist())
+
+    path = tmp_path / "map.bin"
+    cartographer.save(path)
+    restored = Cartographer.load(path)
+
+    assert np.array_equal(restored.grid.points, cartographer.grid.points)
+    assert restored.report()["voxels"] == cartographer.report()["voxels"]
+    assert restored.memory_usage() <= cartographer.memory_usage()
+    assert [(c.id, c.count, c.center, c.bbox) for c in restored.clusters] == [
+        (c.id, c.count, c.center, c.bbox) for c in cartographer.clusters
+    ]
+
+    # восстановленный картограф продолжает работу так же, как исходный
+    more = rng.uniform(0, 400, (300, 2)).tolist()
+    cartographer.append(more)
+    restored.append(more)
+    assert len(restored.grid) == len(cartographer.grid)
+    assert restored.dropped == cartographer.dropped
+    assert sorted(c.count for c in restored.clusters) == sorted(
+        c.count for c in cartographer.clusters
+    )
+
+    meta, arrays = load_arrays(path)
+    assert isinstance(arrays["points"], np.memmap)
+    assert meta["voxel_size"] == 4
@@ -0,0 +1,116 @@
+import numpy as np
+
+from game.cartographer import Cartographer
+from game.detection import ShapeDetector, fit_circle
+from game.map import Map
+from game.raycast import MapRaycaster
+from game.sightingsystem import Lidar
+
+rng = np.random.default_rng(0)
+
+
+def noisy(points: np.ndarray) -> np.ndarray:
+    return points + rng.normal(0, 0.5, points.shape)
+
+
+def test_fit_circle():
+    angles = np.linspace(0, np.pi, 50)
+    x, y, r = fit_circle(
+        np.column_stack([3 + 7 * np.cos(angles), 5 + 7 * np.sin(angles)])
+    )
+    assert abs(x - 3) < 1e-6 and abs(y - 5) < 1e-6 and abs(r - 7) < 1e-6
+
+
+def test_detect_shapes():
+    detector = ShapeDetector()
+
+    # дуга окружности на 40000 точек
+    angles = rng.uniform(0, np.pi, 40000)
+    arc = noisy(np.column_stack([500 + 80 * np.cos(angles), 300 + 80 * np.sin(angles)]))
+    (circle,) = detector.detect(arc)
+    assert circle.object_type == "circle"
+    assert abs(circle.center.x - 500) < 1 and abs(circle.radius - 80) < 1
+
+    # две видимые стороны прямоугольника
+    t = rng.uniform(0, 1, 2000)
+    corner = noisy(
+        np.concatenate(
+            [
+                np.column_stack([100 + 150 * t, np.full_like(t, 100)]),
+                np.column_stack([np.full_like(t, 100), 100 + 100 * t]),
+            ]
+        )
+    )
+    (rectangle,) = detector.detect(corner)
+    assert rectangle.object_type == "rectangle"
+    xs = sorted(vertex.x for vertex in rectangle.vertices)
+    assert abs(xs[0] - 100) < 1 and abs(xs[-1] - 250) < 1
+
+    # прямая стена
+    wall = noisy(np.column_stack([np.linspace(0, 300, 500), np.full(500, 40.0)]))
+    (line,) = detector.detect(wall)
+    assert line.object_type == "line"
+
+
+def test_cartographer_detect():
+    field = Map("configs/field.yaml")
+    lidar = Lidar("lidar", "configs/lidar_test.yaml")
+    lidar.set_batch_measurement_method(MapRaycaster(field))
+
+    cartographer = Cartographer()
+    for position in [(640, 360), (500, 100), (600, 650), (1150, 100), (50, 400)]:
+        for alpha in (0, np.pi):
+            lidar.update_navigation(*position, alpha)
+            lidar.receive({"distance": True})
+            lidar.step()
+
+            scan = lidar.scan
+            cartographer.integrate(
+                np.tile([lidar.x, lidar.y], (len(scan), 1)),
+                np.column_stack([scan.x, scan.y]),
+                scan.measurement,
+            )
+
+    cartographer.detect()
+
+    assert cartographer.border is not None
+    assert len(cartographer.map.circles) == 2
+    for circle in cartographer.map.circles.values():
+        assert abs(circle["radius"] - 80) < 2
+    assert len(cartographer.map.rectangles) == 2
+
+
+def test_detect_only_changed_clusters():
+    cartographer = Cartographer()
+
+    angles = np.linspace(0, np.pi, 200)
+    for x in (200, 600, 1000):
+        cartographer.append(
+            list(
+                zip(
+                    (x + 80 * np.cos(angles)).tolist(),
+                    (300 + 80 * np.sin(angles)).tolist(),
+                )
+            )
+        )
+
+    assert len(cartographer.detect()) == 3
+    assert cartographer.refits == 3
+
+    # без новых точек ничего не пересчитывается
+    cartographer.detect()
+    assert cartographer.refits == 3
+
+    # новые точки одного кластера - пересчитывается только он
+    cartographer.append(
+        list(
+            zip(
+                (600 + 80 * np.cos(-angles)).tolist(),
+                (300 + 80 * np.sin(-angles)).tolist(),
+            )
+        )
+    )
+    assert cartographer.dirty
+    assert len(cartographer.detect()) == 3
+    assert cartographer.refits == 4
+    assert not any(cluster.updated for cluster in cartographer.clusters)
@@ -0,0 +1,68 @@
+import shutil
+
+import numpy as np
+
+from game.distancefield import DistanceField
+from game.map import Map
+from game.navigation import NavigationSystem
+from game.raycast import MapRaycaster
+
+
+def test_clearance():
+    field = DistanceField.compute(Map("configs/field.yaml"), resolution=5.0)
+
+    # центр поля, центр окружности, за границей, центр квадрата
+    assert abs(field.clearance(640, 360) - 212.6) < 1.0
+    assert abs(field.clearance(1000, 200) + 80) < 1.0
+    assert field.clearance(5, 5) < 0
+    assert abs(field.clearance(175, 175) + 75) < 1.0
+
+    assert field.is_free(640, 360, radius=100)
+    assert not field.is_free(640, 360, radius=300)
+
+
+def test_sphere_tracing_matches_exact_queries():
+    field_map = Map("configs/field.yaml")
+    field = DistanceField.compute(field_map, resolution=5.0)
+
+    rng = np.random.default_rng(0)
+    starts = rng.uniform((300, 300), (700, 450), size=(1000, 2))
+    angles = rng.uniform(-np.pi, np.pi, size=1000)
+    ends = starts + 500 * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+    _, expected, expected_hits = MapRaycaster(field_map)(starts, ends)
+    _, distances, hits = field(starts, ends)
+
+    both = hits & expected_hits
+    assert (hits == expected_hits).mean() > 0.98
+    assert np.median(np.abs(distances[both] - expected[both])) < field.resolution
+
+
+def test_cache_next_to_map(tmp_path):
+    path = str(tmp_path / "field.yaml")
+    shutil.copy("configs/field.yaml", path)
+
+    field = DistanceField.for_map(path, resolution=10.0)
+    assert (tmp_path / "field.sdf.npz").exists()
+
+    cached = DistanceField.for_map(path, resolution=10.0)
+    assert np.array_equal(cached.values, field.values)
+
+    other = DistanceField.for_map(path, resolution=20.0)
+    assert other.values.shape != field.values.shape
+
+
+def test_navigation_with_distance_field():
+    field = DistanceField.compute(Map("configs/field.yaml"), resolution=5.0)
+
+    config = {"v_max": 10, "max_angle_speed": np.radians(10)}
+    navigation = NavigationSystem(900, 200, 0, config)
+    navigation.set_measurement_method(field.segment_query_first)
+
+    for _ in range(5):
+        navigation.receive({"v": 10, "alpha": 0})
+        navigation.step()
+
+    state = navigation.send()
+    assert state["collision"]
+    assert state["x"] == 910
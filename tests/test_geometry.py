@@ -1,6 +1,87 @@
-from geometry.geometry import Point
+import random
+
+from geometry.geometry import (
+    Circle,
+    FigureIndex,
+    Figures,
+    Line,
+    LineIndex,
+    Point,
+    Rectangle,
+    StraightAngle,
+)
 
 
 def test_point_1():
     assert (Point(1, 1) in [Point(1, 2), Point(1, 4), Point(1, 5)]) is False
     assert (Point(1, 1) in [Point(1, 1), Point(1, 4), Point(1, 5)]) is True
+
+
+def test_figures_merge_lines():
+    random.seed(0)
+    walls = [((0, 100), (1, 0)), ((200, 0), (0, 1)), ((600, 50), (0.6, 0.8))]
+    quads = [
+        [Point(x + dx * (t + k * 8), y + dy * (t + k * 8)) for k in range(4)]
+        for (x, y), (dx, dy) in walls
+        for t in range(0, 600, 12)
+    ]
+    random.shuffle(quads)
+
+    figures = Figures()
+    for quad in quads:
+        figures.get_line(quad)
+
+    # каждая стена - один отрезок
+    assert len(figures.lines) == len(walls)
+    for line in figures.lines:
+        assert line.point0.distance(line.point1) > 590
+
+    # кандидатов на объединение проверяется немного на каждый отрезок
+    assert figures.line_index.checks < 10 * len(quads)
+
+    figures.check()
+    assert len(figures.lines) == len(walls)
+
+
+def test_line_index_merges_across_cell_boundary():
+    # отрезки по разные стороны границы ячеек
+    for y in (98, 50, 0, -2, 197):
+        first = Line(Point(0, y), Point(100, y))
+        second = Line(Point(50, y + 3), Point(150, y + 3))
+        assert first.combine_lines(second)
+
+        index = LineIndex()
+        index.merge(first)
+        index.merge(second)
+        assert len(index) == 1
+
+
+def test_figures_are_hashable():
+    vertices = [Point(0, 0), Point(10, 0), Point(10, 5), Point(0, 5)]
+    figures = {
+        Point(1, 1),
+        Circle(Point(5, 5), 10),
+        Rectangle(vertices),
+        StraightAngle(Point(0, 5), Point(0, 0), Point(5, 0)),
+        Point(1, 2) + Point(3, 4),
+    }
+    assert Circle(Point(5, 5), 10) in figures
+    assert Rectangle(list(reversed(vertices))) == Rectangle(vertices)
+    assert hash(Rectangle(list(reversed(vertices)))) == hash(Rectangle(vertices))
+
+
+def test_figure_index_respects_tolerance():
+    index = FigureIndex()
+    assert index.add(Circle(Point(2.9, 2.9), 10))
+
+    # центр по другую сторону границы ячейки, но ближе TOLERANCE
+    assert Circle(Point(3.1, 3.1), 11) in index
+    assert not index.add(Circle(Point(3.1, 3.1), 11))
+    assert Circle(Point(9, 9), 10) not in index
+    assert len(index) == 1
+
+    points = FigureIndex(match=lambda known, new: known.almost_eq(new))
+    for x in range(0, 100, 10):
+        points.add(Point(x, 0))
+    assert Point(41, 1) in points and Point(45, 0) not in points
+    assert Point(71, 1).__contains__(points)
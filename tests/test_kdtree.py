@@ -0,0 +1,43 @@
+import numpy as np
+
+from geometry.geometry import Point
+from geometry.kdtree import PointTree
+
+rng = np.random.default_rng(0)
+
+
+def brute_within(points, query, radius):
+    return np.flatnonzero(((points - query) ** 2).sum(axis=1) <= radius**2)
+
+
+def test_queries_match_brute_force():
+    points = rng.uniform(0, 1000, (3000, 2))
+    tree = PointTree(points[:2000])
+    for point in points[2000:]:
+        tree.insert(point)
+
+    assert len(tree) == 3000
+    assert 1 < tree.rebuilds < 20
+    assert np.array_equal(tree.points, points)
+
+    for query in rng.uniform(0, 1000, (50, 2)):
+        radius = rng.uniform(0, 80)
+        assert np.array_equal(
+            tree.within(query, radius), brute_within(points, query, radius)
+        )
+
+        ids, distances = tree.nearest(query, k=5)
+        expected = np.argsort(np.hypot(*(points - query).T))[:5]
+        assert np.array_equal(ids, expected)
+        assert np.allclose(distances, np.hypot(*(points[expected] - query).T))
+
+
+def test_point_containment():
+    tree = PointTree([Point(1, 1), Point(5, 5)])
+    tree.insert((7, 3))
+
+    assert Point(5, 5) in tree
+    assert Point(7, 3).__contains__(tree)
+    assert Point(4, 4) not in tree
+    assert tree.nearest(Point(6, 4))[0][0] in (1, 2)
+    assert np.array_equal(tree.within((0, 0), 8), [0, 1, 2])
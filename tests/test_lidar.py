@@ -0,0 +1,51 @@
+from math import radians
+
+import numpy as np
+
+from game.map import Map
+from game.raycast import MapRaycaster
+from game.sightingsystem import Lidar, Locator
+
+EPS = 1e-6
+
+full_config = {
+    "min_range": 5,
+    "max_range": 400,
+    "max_angle_speed": radians(2),
+    "cone_opening_angle": radians(180),
+    "zero": radians(0),
+    "place": [5, 15],
+    "ray_count": 2000,
+    "ray_step": radians(0.18),
+}
+
+
+def test_create_lidar():
+    lidar = Lidar("test", "configs/lidar_test.yaml")
+    assert lidar.ray_count == 2000
+    assert abs(lidar.ray_step - radians(0.18)) < EPS
+
+
+def test_lidar_matches_locator():
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+
+    lidar = Lidar("lidar", full_config)
+    locator = Locator("locator", full_config)
+
+    for item in (lidar, locator):
+        item.set_batch_measurement_method(raycaster)
+        item.update_navigation(640, 360, radians(30))
+        item.receive({"turn": radians(45), "distance": True})
+        item.step()
+
+    scan, reference = lidar.send()["distance"], locator.send()["distance"]
+    assert len(scan) == 2000
+    assert np.array_equal(scan.measurement, reference.measurement)
+    assert np.allclose(scan.x, reference.x)
+    assert np.allclose(scan.y, reference.y)
+    assert np.allclose(scan.value, reference.value)
+
+    # точки в сск лежат по направлению своих лучей
+    angles = lidar.ssk_alpha + lidar.offsets
+    assert np.allclose(scan.ssk_x, scan.value * np.cos(angles))
+    assert np.allclose(scan.ssk_y, scan.value * np.sin(angles))
@@ -48,3 +48,73 @@ def test_locator_step():
     laser.step()
     ans = laser.send()
     assert ans == {}
+
+
+def test_locator_sweep_reuses_rays():
+    from game.map import Map
+    from game.raycast import MapRaycaster
+
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+    config = dict(full_config, max_range=400, ray_step=radians(5))
+
+    locator = Locator("sweep", config)
+    locator.set_batch_measurement_method(raycaster)
+    locator.enable_sweep(angle_tolerance=radians(0.01))
+
+    reference = Locator("reference", config)
+    reference.set_batch_measurement_method(raycaster)
+
+    cast = []
+    for tick in range(20):
+        for item in (locator, reference):
+            item.update_navigation(640, 360, radians(30))
+            item.receive({"turn": radians(tick), "distance": True})
+            item.step()
+
+        cast.append(locator.rays_cast)
+        for ray, other in zip(locator.send()["distance"], reference.send()["distance"]):
+            assert ray["measurement"] is other["measurement"]
+            assert abs(ray["value"] - other["value"]) < EPS
+
+    # после первого оборота на 5 градусов замеряется только новое направление
+    assert cast[:5] == [11] * 5
+    assert cast[5:] == [1] * 15
+
+    # сдвиг начала лучей сбрасывает память
+    locator.update_navigation(700, 360, radians(30))
+    locator.receive({"turn": radians(19), "distance": True})
+    locator.step()
+    assert locator.rays_cast == 11
+
+
+def test_locator_schedule_spreads_rays():
+    from game.map import Map
+    from game.raycast import MapRaycaster
+    from game.sightingsystem import ScanSchedule
+
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+    config = dict(full_config, max_range=400, ray_step=radians(5))
+
+    locator = Locator("schedule", config)
+    locator.set_batch_measurement_method(raycaster)
+    locator.set_schedule(ScanSchedule.interleaved(11, 3, max_rays_per_tick=3))
+
+    reference = Locator("reference", config)
+    reference.set_batch_measurement_method(raycaster)
+
+    cast = []
+    for tick in range(locator.schedule.period):
+        for item in (locator, reference):
+            item.update_navigation(640, 360, radians(30))
+            item.receive({"distance": True})
+            item.step()
+
+        cast.append(locator.rays_cast)
+        scan = locator.send()["distance"]
+        assert scan.stamp == tick
+        assert scan.complete is (tick == locator.schedule.period - 1)
+
+    assert max(cast) == 3
+    assert sum(cast) == 11
+    assert sorted(set(scan.stamps.tolist())) == list(range(locator.schedule.period))
+    assert scan == reference.send()["distance"]
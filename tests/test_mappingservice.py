@@ -0,0 +1,38 @@
+import numpy as np
+
+from game.cartographer import Cartographer
+from game.mappingservice import MappingService
+from game.occupancy import OccupancyGrid
+
+
+def wall_scan(origin, count=50):
+    starts = np.tile(origin, (count, 1)).astype(float)
+    points = np.column_stack([np.full(count, 90.0), np.linspace(10, 90, count)])
+    return starts, points, np.ones(count, dtype=bool)
+
+
+def test_trains_share_one_map():
+    bounds = (0, 0, 100, 100)
+    service = MappingService(OccupancyGrid(bounds, resolution=2), regions=4)
+    first, second = service.mapper("first"), service.mapper("second")
+
+    first.integrate(*wall_scan((10, 20)))
+    second.integrate(*wall_scan((10, 80)))
+    assert service.merge() == 2
+
+    reference = OccupancyGrid(bounds, resolution=2)
+    cartographer = Cartographer()
+    for origin in ((10, 20), (10, 80)):
+        reference.integrate(*wall_scan(origin))
+        cartographer.integrate(*wall_scan(origin))
+
+    # карта занятости совпадает с картой, построенной по всем сканам подряд
+    assert np.allclose(service.grid.log_odds, reference.log_odds)
+
+    # стену, увиденную обоими поездами, общая карта хранит один раз
+    assert len(service.cartographer.grid) == len(cartographer.grid)
+    assert len(first.clusters) == 1
+
+    report = service.report()
+    assert report["trains"] == 2 and report["deltas"] == 2
+    service.close()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from game.cartographer import Cartographer
+from game.mappingworker import CartographyWorker
+
+
+def scan(x):
+    points = np.column_stack([np.full(10, float(x)), np.arange(10) * 2.0])
+    return np.zeros_like(points), points, np.ones(len(points), dtype=bool)
+
+
+def test_worker_matches_cartographer():
+    reference = Cartographer()
+    with CartographyWorker() as worker:
+        for x in (0, 100, 10, 300):
+            reference.integrate(*scan(x))
+            worker.integrate(*scan(x))
+        worker.flush()
+
+        assert len(worker.clusters) == len(reference.clusters) == 3
+        assert sorted(len(cluster) for cluster in worker.clusters) == sorted(
+            cluster.count for cluster in reference.clusters
+        )
+        first = worker.clusters
+
+        # неизменившиеся кластеры не копируются заново
+        worker.integrate(*scan(300))
+        worker.flush()
+        assert worker.clusters[0] is first[0]
+
+    metrics = worker.metrics()
+    assert metrics["processed"] == metrics["submitted"] == 5
+    assert metrics["queue_depth"] == 0
+
+
+@pytest.mark.parametrize(
+    "policy, processed, dropped, coalesced",
+    [("coalesce", 2, 0, 3), ("drop_oldest", 2, 3, 0), ("drop_newest", 2, 3, 0)],
+)
+def test_backpressure_policy(policy, processed, dropped, coalesced):
+    # поток не запущен, очередь переполняется
+    worker = CartographyWorker(max_queue=2, policy=policy)
+    for x in range(5):
+        worker.integrate(*scan(100 * x))
+
+    metrics = worker.metrics()
+    assert metrics["queue_depth"] == metrics["max_depth"] == 2
+    assert metrics["dropped"] == dropped
+    assert metrics["coalesced"] == coalesced
+
+    worker.start()
+    worker.stop()
+    assert worker.processed == processed
+    expected = {"coalesce": 5, "drop_oldest": 2, "drop_newest": 2}[policy]
+    assert len(worker.clusters) == expected
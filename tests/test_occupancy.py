@@ -0,0 +1,73 @@
+import numpy as np
+
+from game.dispatcher import TPlayer
+from game.map import Map
+from game.occupancy import OccupancyGrid
+from game.raycast import MapRaycaster
+from game.sightingsystem import ScanSchedule
+
+
+def test_single_ray():
+    grid = OccupancyGrid((0, 0, 100, 100), resolution=10)
+
+    grid.integrate([[5, 5]], [[95, 5]], [True])
+    assert grid.log_odds[0, 9] > 0
+    assert (grid.log_odds[0, :9] < 0).all()
+    assert (grid.log_odds[1:] == 0).all()
+
+    # луч без касания освобождает всю трассу
+    grid.integrate([[5, 15]], [[95, 15]], [False])
+    assert (grid.log_odds[1] < 0).all()
+
+    for _ in range(100):
+        grid.integrate([[5, 5]], [[95, 5]], [True])
+    assert grid.log_odds.max() == grid.max_log_odds
+    assert grid.log_odds.min() == grid.min_log_odds
+
+
+def test_player_with_occupancy_grid():
+    field = Map("configs/field.yaml")
+    raycaster = MapRaycaster(field)
+    grid = OccupancyGrid.from_map(field, resolution=5)
+
+    player = TPlayer(
+        640, 360, 0.0, raycaster.segment_query_first, {}, raycaster, mapper=grid
+    )
+    for _ in range(20):
+        player.step()
+
+    assert grid.scans == 19
+    assert not player.cartographer.clusters
+
+    cells = grid.cell(np.array(player.points))
+    assert (grid.log_odds[cells[:, 1], cells[:, 0]] > 0).all()
+    assert grid.free().sum() > grid.occupied().sum()
+
+
+class Recorder:
+    def __init__(self):
+        self.scans = []
+
+    def integrate(self, starts, points, hits):
+        self.scans.append((np.array(starts), np.array(points), np.array(hits)))
+
+
+def test_player_with_schedule_integrates_fresh_rays():
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+    recorder = Recorder()
+
+    player = TPlayer(
+        640, 360, 0.0, raycaster.segment_query_first, {}, raycaster, mapper=recorder
+    )
+    player.locator.set_schedule(ScanSchedule.interleaved(player.locator.ray_count, 3))
+
+    origins = []
+    for _ in range(10):
+        player.step()
+        origins.append((player.locator.x, player.locator.y))
+
+    # на первом такте запросов еще нет, дальше - фаза расписания и луч лазера
+    assert len(recorder.scans) == 9
+    for (starts, _, _), origin in zip(recorder.scans, origins[1:]):
+        assert len(starts) in (4 + 1, 3 + 1)
+        assert np.allclose(starts[:-1], origin)
@@ -0,0 +1,82 @@
+import math
+import pickle
+
+import numpy as np
+import pytest
+
+from geometry import geometry, primitives
+
+rng = np.random.default_rng(0)
+
+
+def random_lines(count):
+    lines = []
+    for x0, y0, x1, y1 in rng.integers(0, 50, (count, 4)).tolist():
+        if (x0, y0) != (x1, y1):
+            lines.append(
+                (
+                    geometry.Line(geometry.Point(x0, y0), geometry.Point(x1, y1)),
+                    primitives.Line(primitives.Point(x0, y0), primitives.Point(x1, y1)),
+                )
+            )
+    return lines
+
+
+def same(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return a.point0 == b.point0 and a.point1 == b.point1
+
+
+def test_line_matches_geometry():
+    lines = random_lines(60)
+    for old, new in lines:
+        point = geometry.Point(*rng.integers(0, 50, 2).tolist())
+        assert new.distance(point) == pytest.approx(old.distance(point))
+        assert new.is_point_on_it(point) == old.is_point_on_it(point)
+
+        for other_old, other_new in lines:
+            assert new.angle_between_lines(other_new) == pytest.approx(
+                old.angle_between_lines(other_old)
+            )
+            assert new.parallel(other_new) == old.parallel(other_old)
+            assert new.perpendicular(other_new) == old.perpendicular(other_old)
+            assert same(new.combine_lines(other_new), old.combine_lines(other_old))
+
+            crossing = new.intersection(other_new)
+            expected = old.intersection(other_old)
+            assert (crossing is None) == (expected is None)
+            if crossing is not None:
+                assert crossing.x == pytest.approx(expected.x)
+                assert crossing.y == pytest.approx(expected.y)
+
+
+def test_immutable_and_slotted():
+    line = primitives.Line(primitives.Point(0, 0), primitives.Point(3, 4))
+    assert line.length == 5 and line.bbox == (0, 0, 3, 4)
+    assert line.normal == pytest.approx((-0.8, 0.6))
+    assert not hasattr(line, "__dict__")
+
+    with pytest.raises(AttributeError):
+        line.length = 1
+
+    assert same(pickle.loads(pickle.dumps(line)), line)
+
+
+def test_circle_and_rectangle():
+    circle = primitives.Circle(primitives.Point(10, 10), 5)
+    assert primitives.Point(14, 16) in circle
+    assert primitives.Point(20, 20) not in circle
+    assert circle == geometry.Circle(geometry.Point(11, 10), 6)
+    assert circle.square == pytest.approx(math.pi * 25)
+
+    points = [(0, 0), (10, 0), (10, 20), (0, 20)]
+    rectangle = primitives.Rectangle([primitives.Point(*p) for p in points])
+    assert rectangle.square == 200 and rectangle.bbox == (0, 0, 10, 20)
+    assert primitives.Point(5, 10) in rectangle
+    assert primitives.Point(12, 10) in rectangle
+    assert primitives.Point(14, 10) not in rectangle
+
+    old = rectangle.to_geometry()
+    assert old.object_type == "rectangle"
+    assert sorted(vertex.point for vertex in old.vertices) == sorted(points)
@@ -0,0 +1,122 @@
+from math import radians
+
+import numpy as np
+import pymunk
+
+from game.map import Map
+from game.raycache import MeasurementCache
+from game.raycast import MapRaycaster, PymunkBatchQuery
+from game.scene import Scene
+from game.sightingsystem import Locator
+
+config = {
+    "min_range": 5,
+    "max_range": 300,
+    "max_angle_speed": radians(2),
+    "cone_opening_angle": radians(120),
+    "zero": radians(0),
+    "place": [5, 15],
+    "ray_count": 11,
+    "ray_step": radians(5),
+}
+
+
+def scan(locator, x, y, alpha):
+    locator.update_navigation(x, y, alpha)
+    locator.receive({"distance": True})
+    locator.step()
+    return locator.send()["distance"]
+
+
+def test_repeated_scans_are_cached():
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+
+    locator = Locator("cached", config)
+    locator.set_batch_measurement_method(raycaster)
+    cache = locator.enable_cache()
+
+    reference = Locator("reference", config)
+    reference.set_batch_measurement_method(raycaster)
+
+    first = scan(locator, 640, 360, radians(200))
+    assert cache.misses == 11 and cache.hits == 0
+
+    for _ in range(5):
+        assert scan(locator, 640, 360, radians(200)) == first
+
+    assert cache.misses == 11 and cache.hits == 55
+    assert scan(reference, 640, 360, radians(200)) == first
+
+
+def test_cache_tolerance():
+    method_calls = []
+
+    def method(starts, ends):
+        method_calls.append(len(starts))
+        return ends.copy(), np.hypot(*(ends - starts).T), np.zeros(len(starts), bool)
+
+    cache = MeasurementCache(position_tolerance=1.0, angle_tolerance=radians(1))
+
+    starts = np.array([[0.0, 0.0]])
+    cache.measure(method, starts, np.array([[100.0, 0.0]]))
+    cache.measure(method, starts + 0.2, np.array([[100.2, 1.0]]))
+    cache.measure(method, starts + 2.0, np.array([[102.0, 2.0]]))
+
+    assert method_calls == [1, 1]
+    assert cache.hits == 1 and cache.misses == 2
+    assert abs(cache.hit_rate - 1 / 3) < 1e-9
+
+
+def test_cache_is_bounded_and_invalidated_by_scene():
+    space = pymunk.Space()
+    scene = Scene(space, "configs/field.yaml")
+    scene.set_scene()
+
+    raycaster = MapRaycaster(scene.map)
+    cache = MeasurementCache(max_size=50, scene=scene)
+
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(100, 600, size=(200, 2))
+    ends = starts + 100
+
+    cache.measure(raycaster, starts, ends)
+    assert len(cache) == 50
+
+    cache.measure(raycaster, starts[-50:], ends[-50:])
+    assert cache.hits == 50
+
+    scene.set_scene()
+    cache.measure(raycaster, starts[-50:], ends[-50:])
+    assert cache.hits == 50
+    assert cache.misses == 250
+
+
+def test_rays_through_moving_bodies_are_not_cached():
+    space = pymunk.Space()
+    scene = Scene(space, "configs/field.yaml")
+    scene.set_scene()
+
+    body = pymunk.Body(1, 100)
+    body.position = (400, 300)
+    space.add(body, pymunk.Circle(body, 20))
+
+    cache = MeasurementCache(scene=scene)
+    method = PymunkBatchQuery(space)
+
+    starts = np.array([[300.0, 300.0], [300.0, 200.0]])
+    ends = np.array([[500.0, 300.0], [500.0, 200.0]])
+
+    points, _, hits = cache.measure(method, starts, ends)
+    assert hits[0] and abs(points[0, 0] - 380) < 1e-6
+
+    body.position = (450, 300)
+    points, _, hits = cache.measure(method, starts, ends)
+    assert hits[0] and abs(points[0, 0] - 430) < 1e-6
+
+    body.position = (900, 600)
+    points, _, hits = cache.measure(method, starts, ends)
+    assert np.array_equal(points, method(starts, ends)[0])
+
+    # второй луч не проходит через тело и берется из кэша
+    assert cache.hits == 2
+    assert cache.bypassed == 2
@@ -0,0 +1,206 @@
+from math import radians, cos, sin, sqrt
+
+import numpy as np
+import pymunk
+import pytest
+
+from game.dispatcher import TPlayer
+from game.map import Map
+from game.raycast import (
+    MapGeometry,
+    MapRaycaster,
+    PymunkBatchQuery,
+    batch_from_single,
+)
+from game.scene import Scene
+from game.sightingsystem import Locator
+
+EPS = 1e-6
+
+full_config = {
+    "min_range": 5,
+    "max_range": 400,
+    "max_angle_speed": radians(2),
+    "cone_opening_angle": radians(120),
+    "zero": radians(0),
+    "place": [5, 15],
+    "ray_count": 120,
+    "ray_step": radians(3),
+}
+
+
+def create_space():
+    space = pymunk.Space()
+    Scene(space, "configs/field.yaml").set_scene()
+    return space
+
+
+def per_ray_loop(locator, method, **kwargs):
+    """
+    Поштучный замер в том виде, в каком он был в `Locator.step`.
+    """
+    data = []
+    begin_angle = locator.ssk_alpha - (locator.ray_count - 1) * locator.ray_step / 2
+    for ray_num in range(locator.ray_count):
+        angle = (
+            locator.ship_alpha
+            + locator.shift_alpha
+            + begin_angle
+            + ray_num * locator.ray_step
+        )
+        distance = locator.max_range
+        point_x = locator.x + distance * cos(angle)
+        point_y = locator.y + distance * sin(angle)
+
+        result = method((locator.x, locator.y), (point_x, point_y), **kwargs)
+        if result:
+            point_x, point_y = result.point
+            distance = sqrt((locator.x - point_x) ** 2 + (locator.y - point_y) ** 2)
+
+        data.append((point_x, point_y, bool(result), distance))
+    return data
+
+
+def test_batch_from_single_without_collision():
+    starts = np.zeros((3, 2))
+    ends = np.array([[1.0, 0.0], [0.0, 2.0], [3.0, 4.0]])
+
+    points, distances, hits = batch_from_single(lambda p0, p1: None, starts, ends)
+
+    assert np.allclose(points, ends)
+    assert np.allclose(distances, [1.0, 2.0, 5.0])
+    assert not hits.any()
+
+
+def test_batch_locator_matches_per_ray_loop():
+    space = create_space()
+    kwargs = {"radius": 0.01, "shape_filter": pymunk.ShapeFilter()}
+
+    for x, y, alpha in [(640, 360, 0.0), (300, 300, radians(135)), (20, 20, 3.0)]:
+        single = Locator("single", full_config)
+        single.set_measurement_method(space.segment_query_first, **kwargs)
+
+        batch = Locator("batch", full_config)
+        batch.set_measurement_method(space.segment_query_first, **kwargs)
+        batch.set_batch_measurement_method(PymunkBatchQuery(space, **kwargs))
+
+        for locator in (single, batch):
+            locator.update_navigation(x, y, alpha)
+            locator.receive({"turn": alpha, "distance": True})
+            locator.step()
+
+        expected = per_ray_loop(single, space.segment_query_first, **kwargs)
+
+        for answer in (single.send(), batch.send()):
+            assert len(answer["distance"]) == len(expected)
+            for ray, (px, py, measurement, distance) in zip(
+                answer["distance"], expected
+            ):
+                assert abs(ray["x"] - px) < EPS
+                assert abs(ray["y"] - py) < EPS
+                assert ray["measurement"] is measurement
+                assert abs(ray["value"] - distance) < EPS
+
+
+def test_map_raycaster_matches_pymunk():
+    space = create_space()
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+
+    rng = np.random.default_rng(0)
+    starts = rng.uniform((300, 300), (700, 450), size=(500, 2))
+    angles = rng.uniform(-np.pi, np.pi, size=500)
+    ends = starts + 500 * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+    expected = batch_from_single(
+        space.segment_query_first,
+        starts,
+        ends,
+        radius=0.01,
+        shape_filter=pymunk.ShapeFilter(),
+    )
+    points, distances, hits = raycaster(starts, ends)
+
+    # у отрезков границы в pymunk есть толщина 2
+    assert (hits == expected[2]).mean() > 0.99
+    both = hits & expected[2]
+    assert np.all(np.abs(distances[both] - expected[1][both]) < 5)
+
+
+def test_map_raycaster_single_query():
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+
+    hit = raycaster.segment_query_first((500, 200), (1000, 200))
+    assert hit is not None
+    assert abs(hit.point[0] - 920) < EPS
+    assert abs(hit.point[1] - 200) < EPS
+
+    assert raycaster.segment_query_first((500, 300), (600, 300)) is None
+    assert raycaster.segment_query_first((1000, 200), (1010, 200)).alpha == 0.0
+
+
+def test_headless_player():
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+    player = TPlayer(640, 360, 0.0, raycaster.segment_query_first, {}, raycaster)
+
+    for _ in range(20):
+        player.step()
+
+    assert player.points
+
+
+@pytest.mark.parametrize("radius", [0.0, 3.0])
+def test_map_raycaster_matches_pymunk_inside_and_thick_rays(radius):
+    space = pymunk.Space()
+    body = pymunk.Body(body_type=pymunk.Body.STATIC)
+    body.position = (0, 0)
+    space.add(
+        body,
+        pymunk.Circle(body, 10),
+        pymunk.Segment(space.static_body, (100, -50), (160, 50), 0),
+    )
+    raycaster = MapRaycaster(MapGeometry([(100, -50, 160, 50)], [(0, 0, 10)]))
+
+    # лучи пересекают ограничивающие прямоугольники фигур: иначе pymunk
+    # не проверяет фигуру, даже если до нее меньше толщины луча
+    starts = np.array(
+        [
+            [0, 0],  # внутри окружности
+            [8.5, 8.5],  # внутри окружности, расширенной на толщину луча
+            [-50, 0],
+            [131, 0],  # ближе толщины луча к отрезку
+            [190, 100],  # на продолжении отрезка за его концом
+            [50, -20],
+            [50, -200],
+        ],
+        dtype=float,
+    )
+    ends = np.array(
+        [
+            [200, 0],
+            [208.5, 8.5],
+            [150, 0],
+            [331, 0],
+            [70, -100],
+            [250, -20],
+            [250, -200],
+        ],
+        dtype=float,
+    )
+
+    expected = batch_from_single(
+        space.segment_query_first,
+        starts,
+        ends,
+        radius=radius,
+        shape_filter=pymunk.ShapeFilter(),
+    )
+    batch = PymunkBatchQuery(space, radius)(starts, ends)
+
+    for points, distances, hits in (raycaster(starts, ends, radius), batch):
+        assert np.array_equal(hits, expected[2])
+        assert np.allclose(points, expected[0], atol=1e-6)
+        assert np.allclose(distances, expected[1], atol=1e-6)
+
+    hit = raycaster.segment_query_first((0, 0), (200, 0), radius)
+    assert hit.alpha == 0.0
+    assert hit.point == (200.0, 0.0)
@@ -0,0 +1,68 @@
+from copy import deepcopy
+from math import radians
+
+import numpy as np
+import pytest
+
+from game.map import Map
+from game.raycast import MapRaycaster
+from game.scanbuffer import ScanBuffer
+from game.sightingsystem import Locator
+
+config = {
+    "min_range": 5,
+    "max_range": 300,
+    "max_angle_speed": radians(2),
+    "cone_opening_angle": radians(120),
+    "zero": radians(0),
+    "place": [5, 15],
+    "ray_count": 11,
+    "ray_step": radians(5),
+}
+
+
+def test_buffer_is_dict_compatible():
+    scan = ScanBuffer(2)
+    scan.write(
+        [1.0, 2.0], [3.0, 4.0], [0.0, 0.0], [0.0, 0.0], [5.0, 6.0], [True, False]
+    )
+
+    assert len(scan) == 2
+    assert scan[0] == {
+        "x": 1.0,
+        "y": 3.0,
+        "ssk_x": 0.0,
+        "ssk_y": 0.0,
+        "value": 5.0,
+        "measurement": True,
+    }
+    assert scan[-1]["measurement"] is False
+    assert [ray["x"] for ray in scan] == [1.0, 2.0]
+
+    with pytest.raises(IndexError):
+        scan[2]
+
+    with pytest.raises(ValueError):
+        scan.x[0] = 10.0
+
+
+def test_locator_reuses_buffer():
+    locator = Locator("test", config)
+    locator.set_batch_measurement_method(MapRaycaster(Map("configs/field.yaml")))
+
+    columns = []
+    snapshots = []
+    for tick in range(3):
+        locator.update_navigation(640, 360, radians(60 * tick))
+        locator.receive({"turn": radians(60 * tick), "distance": True})
+        locator.step()
+
+        scan = locator.send()["distance"]
+        columns.append(scan.x)
+        snapshots.append(scan.copy())
+
+    assert all(column is columns[0] for column in columns)
+    assert deepcopy({"distance": scan})["distance"] is scan
+    assert snapshots[0] != snapshots[1]
+    assert snapshots[2] == locator.send()["distance"]
+    assert np.array_equal(snapshots[2].value, locator.scan.value)
@@ -0,0 +1,117 @@
+from math import radians
+
+import numpy as np
+import pymunk
+
+from game.dispatcher import Player, World
+from game.map import Map
+from game.raycast import MapRaycaster, PymunkBatchQuery
+from game.scene import Scene
+from game.scheduler import RayScheduler
+from game.sightingsystem import Locator
+from game.weapon import Cannon
+
+EPS = 1e-9
+
+
+def create_players(count):
+    space = pymunk.Space()
+    Scene(space, "configs/field.yaml").set_scene()
+
+    players = [
+        Player(space=space, position=(200 + 100 * i, 400), angle=radians(30 * i))
+        for i in range(count)
+    ]
+    return space, players
+
+
+def test_scheduler_single_query_per_stage():
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+    scheduler = RayScheduler(raycaster)
+
+    config = {
+        "min_range": 5,
+        "max_range": 300,
+        "max_angle_speed": radians(2),
+        "cone_opening_angle": radians(120),
+        "zero": radians(0),
+        "place": [0, 0],
+        "ray_count": 11,
+        "ray_step": radians(5),
+    }
+
+    locators = []
+    for i in range(5):
+        locator = Locator(f"locator_{i}", config)
+        locator.set_batch_measurement_method(raycaster)
+        locator.update_navigation(300 + 50 * i, 400, radians(10 * i))
+        locator.receive({"distance": True})
+        locators.append(locator)
+
+    bullet = Cannon(900, 200, 0.0, 5)
+    bullet.set_measurement_method(raycaster.segment_query_first)
+
+    scheduler.run(locators + [bullet])
+
+    assert scheduler.queries == 1
+    assert scheduler.rays == 5 * 11 + 1
+
+    for locator in locators:
+        expected = locator.send()["distance"]
+        locator.step()
+        for ray, other in zip(locator.send()["distance"], expected):
+            assert ray == other
+
+
+def test_world_matches_sequential_players():
+    _, sequential = create_players(3)
+    space, scheduled = create_players(3)
+    world = World(scheduled, PymunkBatchQuery(space))
+
+    for _ in range(30):
+        expected = [player.step() for player in sequential]
+        actual = world.step()
+
+        for first, second in zip(expected, actual):
+            assert first["points"] == second["points"]
+            assert first["locator"]["ray"] == second["locator"]["ray"]
+            assert first["laser"]["ray"] == second["laser"]["ray"]
+
+    # на первом такте визирным подсистемам еще не пришли запросы
+    assert world.scheduler.queries == 30 + 29
+    assert world.scheduler.rays == 30 * 3 + 29 * 3 * (1 + 11)
+
+
+def test_scheduler_uses_sensor_cache():
+    raycaster = MapRaycaster(Map("configs/field.yaml"))
+    scheduler = RayScheduler(raycaster)
+
+    config = {
+        "min_range": 5,
+        "max_range": 300,
+        "max_angle_speed": radians(2),
+        "cone_opening_angle": radians(120),
+        "zero": radians(0),
+        "place": [0, 0],
+        "ray_count": 11,
+        "ray_step": radians(5),
+    }
+
+    locator = Locator("cached", config)
+    locator.set_batch_measurement_method(raycaster)
+    cache = locator.enable_cache()
+
+    scans = []
+    for _ in range(3):
+        locator.update_navigation(640, 360, radians(200))
+        locator.receive({"distance": True})
+        scheduler.run([locator])
+        scans.append(locator.send()["distance"].copy())
+
+    assert scheduler.rays == 11
+    assert cache.hits == 2 * 11
+    assert scans[0] == scans[1] == scans[2]
+
+    locator.disable_cache()
+    locator.step()
+    assert locator.send()["distance"] == scans[0]
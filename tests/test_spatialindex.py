@@ -0,0 +1,67 @@
+import numpy as np
+
+from game.map import Map
+from game.raycast import MapGeometry, MapRaycaster
+from game.spatialindex import UniformGrid
+
+
+def random_rays(count, low, high, length, seed=0):
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform(low, high, size=(count, 2))
+    angles = rng.uniform(-np.pi, np.pi, size=count)
+    ends = starts + length * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    return starts, ends
+
+
+def test_grid_matches_brute_force():
+    field = Map("configs/field.yaml")
+    starts, ends = random_rays(2000, (0, 0), (1280, 720), 700)
+
+    expected = MapRaycaster(field).cast(starts, ends)
+
+    for cell_size in (7, 40, 500):
+        assert np.array_equal(
+            UniformGrid(field, cell_size).cast(starts, ends), expected
+        )
+
+
+def test_grid_with_many_obstacles():
+    rng = np.random.default_rng(1)
+    circles = np.column_stack(
+        [
+            rng.uniform(0, 5000, 3000),
+            rng.uniform(0, 5000, 3000),
+            rng.uniform(5, 30, 3000),
+        ]
+    )
+    border = [[0, 0], [5000, 0], [5000, 5000], [0, 5000]]
+    geometry = MapGeometry(MapGeometry._polygon_segments(border), circles)
+
+    starts, ends = random_rays(500, (0, 0), (5000, 5000), 300, seed=2)
+
+    expected = MapRaycaster(geometry)(starts, ends)
+    actual = UniformGrid(geometry, 100)(starts, ends)
+
+    for a, b in zip(actual, expected):
+        assert np.array_equal(a, b)
+
+
+def test_radius_and_aabb_queries():
+    grid = UniformGrid(Map("configs/field.yaml"))
+
+    segments, circles = grid.query_radius(1000, 200, 1)
+    assert segments.tolist() == [] and circles.tolist() == [0]
+
+    segments, circles = grid.query_radius(1000, 200, 80)
+    assert circles.tolist() == [0]
+
+    segments, circles = grid.query_radius(640, 360, 50)
+    assert segments.tolist() == [] and circles.tolist() == []
+
+    # угол поля и первый квадрат
+    segments, circles = grid.query_radius(95, 95, 10)
+    assert sorted(segments.tolist()) == [4, 7]
+
+    segments, circles = grid.query_aabb(0, 0, 20, 20)
+    assert sorted(segments.tolist()) == [0, 3]
+    assert circles.tolist() == []